@@ -4,7 +4,7 @@ import logging
 import os
 import pathlib
 import platform
-import pickle
+import json
 logger = logging.getLogger(__name__)
 
 default_linux = (
@@ -21,7 +21,8 @@ default_windows = (r"GOG Games/NWN Diamond",
 home = pathlib.Path.home()
 _join = pathlib.Path.joinpath
 _DEFAULT_DATA_EMPTY = False
-_CONFIG_FILE_NAME = "config_pickle"
+_CONFIG_FILE_NAME = "config_nwntool.json"
+_CONFIG_VERSION = 1
 
 if platform.system() == "Linux":
     default_directory = _join(home, pathlib.Path(r".local/share/NWNTool"))
@@ -94,10 +95,8 @@ class CurrentConfig(metaclass=singleton.Singleton):
             self._config = new_cfg
             logger.debug("Changing configuration.")
 
-    def save(self, file):
-        import json
-        with open(file, "w") as fi:
-            json.dump(self, fi)
+    def save(self, file=None):
+        save(file)
 
 
 class AbstractConfigFactory(object):
@@ -174,25 +173,56 @@ class CreateConfigFromStdStream(AbstractConfigFactory):
                 break
 
 
-# Default:
-config = CurrentConfig()
 MODULES_FILE = "modules_in_vault_list.txt"
 
 
-def save():
+def __getattr__(name):
+    u"""Current configuration (CurrentConfig) is created on the first access of Config.config."""
+    if name == "config":
+        return _current()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def _current() -> CurrentConfig:
+    current = globals().get("config")
+    if current is None:
+        current = globals()["config"] = CurrentConfig()
+    return current
+
+
+def to_dict(cfg: Config) -> dict:
+    return {"version": _CONFIG_VERSION,
+            "game": {"path": str(cfg.game_config.path), "path_local": str(cfg.game_config.path_to_local_vault)},
+            "program": {"main_directory": str(cfg.program_config.main_directory),
+                        "config_file": cfg.program_config.config_file}}
+
+
+def from_dict(data: dict) -> Config:
+    if data.get("version") != _CONFIG_VERSION:
+        raise ValueError("Unsupported version of configuration: {}".format(data.get("version")))
+    game = GameConfig(pathlib.Path(data["game"]["path"]), pathlib.Path(data["game"]["path_local"]))
+    program = ProgramConfig()
+    program.main_directory = data["program"]["main_directory"]
+    program.config_file = data["program"]["config_file"]
+    return Config(game, program)
+
+
+def save(file=None):
+    u"""Store current configuration as JSON, atomically."""
+    file = pathlib.Path(file or _CONFIG_FILE_NAME)
     logger.debug("Attempting to save config.")
-    with open(_CONFIG_FILE_NAME, "wb") as fi:
-        pickle.dump(config, fi)
+    tmp = file.with_suffix(file.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fo:
+        json.dump(to_dict(_current().config), fo, indent=2)
+    os.replace(tmp, file)
     logger.debug("Saved successfully.")
 
 
-def load():
-    r = None
+def load(file=None) -> CurrentConfig:
+    u"""Load configuration stored by save() and make it current."""
     logger.debug("Attempting to load config.")
-    with open(_CONFIG_FILE_NAME, "rb") as fi:
-        r = pickle.load(fi)
+    with open(file or _CONFIG_FILE_NAME, "r", encoding="utf-8") as fi:
+        current = _current()
+        current._config = from_dict(json.load(fi))
     logger.debug("Loaded successfully.")
-    return r
-
-
-
+    return current
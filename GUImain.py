@@ -1,6 +1,8 @@
-from PySide2.QtWidgets import QApplication, QMainWindow, QFileDialog
-from PySide2 import QtGui
+from PySide2.QtWidgets import QApplication, QMainWindow, QFileDialog, QHeaderView, QLineEdit
+from PySide2 import QtCore, QtGui
 from mainwindow import Ui_MainWindow
+from guiworkers import Workers, DiscoveryWorker, ScrapWorker, DownloadWorker, CatalogWorker
+from moduletable import ModuleTableModel
 import logging
 import session
 
@@ -22,6 +24,31 @@ class MainWindow(QMainWindow):
         self.ui.pushButton_4.clicked.connect(lambda name: self.get_directory_name(self.ui.lineEdit_4))  # Local directory for EE
         self.ui.pushButton_5.clicked.connect(lambda name: self.get_directory_name(self.ui.lineEdit_5))  # NWNTool dir
 
+        # Scans, scraping and downloads run on a thread pool, the window receives results through signals
+        self.workers = Workers()
+        self.modules = []  # modules found on disk
+        self.pages = []  # module pages scrapped from the vault
+
+        # The vault catalog, sorted and filtered by the model itself, rows are laid out as they are scrolled to
+        self.catalog = ModuleTableModel(parent=self)
+        self.catalog.filtered.connect(lambda count: self.ui.statusbar.showMessage(f"{count} modules"))
+        self.search = QLineEdit(self.ui.verticalLayoutWidget)
+        self.search.setPlaceholderText("Search modules")
+        self.search.setClearButtonEnabled(True)
+        self.search.textChanged.connect(self.catalog.schedule_filter)
+        self.search.returnPressed.connect(lambda: self.catalog.filter(self.search.text()))
+        self.ui.verticalLayout.insertWidget(self.ui.verticalLayout.indexOf(self.ui.tableView), self.search)
+        table = self.ui.tableView
+        table.setModel(self.catalog)
+        table.setSortingEnabled(True)
+        table.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        table.setWordWrap(False)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # no measuring of rows
+        table.verticalHeader().hide()
+        table.horizontalHeader().setStretchLastSection(True)
+        self.ui.actionOpen_Database.triggered.connect(self.choose_catalog)
+        self.ui.actionSearch.triggered.connect(self.search_vault)
+
     def get_directory_name(self, placeholder):
         dialog = QFileDialog()
         dialog.setFileMode(QFileDialog.FileMode.Directory)
@@ -29,6 +56,55 @@ class MainWindow(QMainWindow):
         placeholder.setText(path)
         logger.debug(f"Set Text {path} for {placeholder}")
 
+    def _start(self, worker, on_result, what):
+        worker.signals.result.connect(on_result)
+        worker.signals.progress.connect(lambda done, total: self.show_progress(what, done, total))
+        worker.signals.error.connect(lambda message: self.ui.statusbar.showMessage(f"{what} failed: {message}"))
+        worker.signals.cancelled.connect(lambda: self.ui.statusbar.showMessage(f"{what} cancelled."))
+        return self.workers.start(worker)
+
+    def show_progress(self, what, done, total):
+        if total:
+            self.ui.statusbar.showMessage(f"{what}: {done} of {total}")
+        else:
+            self.ui.statusbar.showMessage(f"{what}: {done}")
+
+    def scan_modules(self, roots=None, index=None) -> DiscoveryWorker:
+        u"""Find modules on disk in background, self.modules grows as directories are scanned."""
+        return self._start(DiscoveryWorker(roots, index), self.modules.extend, "Scanning modules")
+
+    def scrap_vault(self, links=None) -> ScrapWorker:
+        u"""Scrap module pages in background, self.pages grows as pages are parsed."""
+        return self._start(ScrapWorker(links), self.pages.extend, "Scrapping the vault")
+
+    def download_module(self, www, name) -> DownloadWorker:
+        u"""Download and extract a module in background."""
+        def downloaded(module):
+            self.ui.statusbar.showMessage(f"Downloaded {module.name}.")
+        return self._start(DownloadWorker(www, name), downloaded, f"Downloading {name}")
+
+    def open_catalog(self, path=None) -> CatalogWorker:
+        u"""Read the vault catalog in background and show it in the table.
+            :path - catalog file, by default the one in program's main directory."""
+        return self._start(CatalogWorker(path), self.catalog.set_rows, "Opening catalog")
+
+    def choose_catalog(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Database", "", "Catalog (*.sqlite);;All files (*)")
+        if path:
+            self.open_catalog(path)
+
+    def search_vault(self):
+        if self.catalog.rows.path is None:
+            self.open_catalog()
+        self.search.setFocus()
+        self.search.selectAll()
+
+    def closeEvent(self, event):
+        self.workers.cancel()
+        self.workers.wait()
+        self.catalog.rows.close()
+        super(MainWindow, self).closeEvent(event)
+
 
 def install():
     u"""GUI wizard to help with installation and configuration."""
@@ -0,0 +1,67 @@
+"""
+    Benchmark of the vault crawler against a local fixture HTTP server with injected latency.
+    Run: python benchmarks/bench_crawler.py [pages] [latency in ms]
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pathlib
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import scrapper  # noqa: E402
+from crawler import Crawler  # noqa: E402
+
+FIXTURE = pathlib.Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "module_page.html"
+
+
+def serve(latency):
+    page = FIXTURE.read_bytes()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(pages=200, latency=0.05):
+    server = serve(latency)
+    root = "http://127.0.0.1:{}".format(server.server_address[1])
+    links = ["{}/project/nwn1/module/module-{}".format(root, i) for i in range(pages)]
+
+    start = time.perf_counter()
+    for link in links[:max(1, pages // 10)]:
+        scrapper.scrap_nvn_vault(scrapper.Website(link))
+    sequential = (time.perf_counter() - start) / max(1, pages // 10) * pages
+
+    results = {"sequential (estimated)": sequential}
+    for workers in (4, 16, 32):
+        start = time.perf_counter()
+        with Crawler(workers=workers, per_host=workers) as crawler:
+            count = sum(1 for _ in crawler.crawl(links))
+        assert count == pages, "Crawler lost pages: {} of {}".format(count, pages)
+        results["crawler, {} workers".format(workers)] = time.perf_counter() - start
+
+    server.shutdown()
+    print("{} pages, {:.0f} ms latency".format(pages, latency * 1000))
+    for name, seconds in results.items():
+        print("{:28s} {:8.2f} s {:8.1f} pages/s".format(name, seconds, pages / seconds))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200, float(args[1]) / 1000 if len(args) > 1 else 0.05)
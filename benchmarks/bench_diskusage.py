@@ -0,0 +1,56 @@
+"""
+    Benchmark of the disk usage report on a synthetic library: cold index, warm index loaded from disk
+    and warm index in memory.
+    Run: python benchmarks/bench_diskusage.py [files]
+"""
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import diskusage  # noqa: E402
+from fsindex import DirectoryIndex  # noqa: E402
+
+EXTENSIONS = {"modules": ".mod", "hak": ".hak", "music": ".bmu", "movies": ".bik"}
+
+
+def build(root: pathlib.Path, files: int) -> dict:
+    roots = {"DE": [str(root / "diamond")], "EE": [str(root / "ee"), str(root / "ee_local")]}
+    directories = [pathlib.Path(r) / sub for paths in roots.values() for r in paths for sub in EXTENSIONS]
+    for n in range(files):
+        directory = directories[n % len(directories)]
+        directory.mkdir(parents=True, exist_ok=True)
+        directory.joinpath("file{}{}".format(n, EXTENSIONS[directory.name])).write_bytes(b"x" * (n % 512))
+    for directory in directories:
+        os.utime(directory, ns=(0, 10 ** 9))  # outside of the racy window of the index
+    return roots
+
+
+def measure(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main(files=30000):
+    with tempfile.TemporaryDirectory() as directory:
+        root = pathlib.Path(directory)
+        roots = build(root, files)
+        path = root / "index.json"
+        cold, report = measure(lambda: diskusage.DiskUsage(roots, index=DirectoryIndex(path)).report())
+        assert report["files"] == files
+        loaded, _ = measure(lambda: diskusage.DiskUsage(roots, index=DirectoryIndex(path)).report())
+        usage = diskusage.DiskUsage(roots, index=DirectoryIndex(path))
+        usage.report()
+        warm, _ = measure(usage.report)
+        print("{} files".format(files))
+        print("cold index             {:8.1f} ms".format(cold * 1000))
+        print("warm index from disk   {:8.1f} ms".format(loaded * 1000))
+        print("warm index in memory   {:8.1f} ms".format(warm * 1000))
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
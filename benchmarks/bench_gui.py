@@ -0,0 +1,86 @@
+"""
+    Benchmark of responsiveness of the GUI event thread while background workers (see guiworkers.py) scan
+    a synthetic installation and download a big archive from a local mock vault. A 1 ms timer runs on the
+    event thread, gaps between its ticks are frame times. The idle event loop is measured first: the
+    longest frames of a scenario are compared with it, on a loaded machine even an idle loop misses some
+    frames. Exits with status 1 if the 99th percentile of frames of a scenario exceeds the budget.
+    Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_gui.py [modules] [archive MB] [budget in ms]
+"""
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2.QtCore import QTimer  # noqa: E402
+from PySide2.QtWidgets import QApplication  # noqa: E402
+
+import Config  # noqa: E402
+import scrapper  # noqa: E402
+import synthetic  # noqa: E402
+from fsindex import DirectoryIndex  # noqa: E402
+from guiworkers import DiscoveryWorker, DownloadWorker, Workers  # noqa: E402
+
+
+def frames(worker=None, seconds=3.0) -> tuple:
+    u"""Run the event loop until the worker is done, or for given seconds without a worker.
+        Return (frame times in ms, wall time in s)."""
+    ticks = [time.perf_counter()]
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(1)
+    end = ticks[0] + seconds
+    while not worker.done.is_set() if worker is not None else time.perf_counter() < end:
+        QApplication.processEvents()
+        time.sleep(0.0005)
+    timer.stop()
+    QApplication.processEvents()
+    return sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:])), ticks[-1] - ticks[0]
+
+
+def summary(name, times, wall) -> float:
+    u"""Print percentiles of frame times, return the 99th one."""
+    p99 = times[int(len(times) * 0.99)]
+    print("{:28s} {:7.2f} s  frames: p50 {:6.2f} ms  p99 {:6.2f} ms  max {:6.2f} ms".format(
+        name, wall, times[len(times) // 2], p99, times[-1]))
+    return p99
+
+
+def main(modules=10000, archive_mb=256, budget=16.0):
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    workers = Workers()
+    longest = 0.0
+    summary("idle event loop", *frames())
+    with tempfile.TemporaryDirectory() as directory:
+        root = pathlib.Path(directory)
+        tree = synthetic.generate(root / "nwn", modules, mix={".mod": 1.0}, sizes={".mod": (0, 0)})
+        roots = [r for paths in tree.roots.values() for r in paths]
+        worker = workers.start(DiscoveryWorker(roots, DirectoryIndex(root / "index.json")))
+        longest = max(longest, summary("scan of {} modules".format(modules), *frames(worker)))
+
+        Config._current()._config = synthetic.game_config(tree, "EE")
+        # The vault runs in another process, building of archives must not compete with the event thread
+        vault = subprocess.Popen([sys.executable, str(ROOT / "mockvault.py"), "--port", "0", "--modules", "1",
+                                  "--archive-size", str(archive_mb * 1024 * 1024)], stdout=subprocess.PIPE, text=True)
+        try:
+            url = vault.stdout.readline().split()[2].rstrip(",")
+            scrapper.set_base_url(url)
+            worker = workers.start(DownloadWorker(url + "/project/nwn1/module/module-0", "module-0.zip"))
+            longest = max(longest, summary("download of {} MB".format(archive_mb), *frames(worker)))
+        finally:
+            vault.terminate()
+            vault.wait()
+    over = longest > budget
+    print("longest p99 frame {:.2f} ms, budget {:.0f} ms{}".format(longest, budget, "  OVER BUDGET" if over else ""))
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    sys.exit(main(int(arguments[0]) if arguments else 10000, int(arguments[1]) if len(arguments) > 1 else 256,
+                  float(arguments[2]) if len(arguments) > 2 else 16.0))
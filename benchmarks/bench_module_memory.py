@@ -0,0 +1,77 @@
+"""
+    Memory footprint of module records: compact ModuleInVault against a replica of the former
+    __dict__ based Module with fresh sub-objects per instance.
+    Run: python benchmarks/bench_module_memory.py [records]
+"""
+import pathlib
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from mainLib import File, ModuleInVault, Person  # noqa: E402
+
+AUTHORS = ["Author {}".format(n) for n in range(500)]
+TAGS = ["Adventure", "Puzzle", "Story", "Horror", "Multiplayer", "Roleplay"]
+
+
+class DictModule:
+    u"""Layout of mainLib.Module before it got __slots__."""
+
+    def __init__(self, name="Unknown Module Name"):
+        self.name = name
+        self.title = "Title"
+        self.is_part_of_series = False
+        self.compatibility = {"Diamond_edition": True, "Enhanced_edition": False}
+        self.series = None
+        self.requirements = {"OC": True, "Xp1": True, "Xp2": True}
+        self.dependencies = {File.FileType.hakpack: [], File.FileType.movie: [], File.FileType.music: []}
+        self.cep = False
+        self.cep_version = 0
+        self.author = Person("Unknown", "Author")
+        self.tags = []
+        self.language = "English"
+        self.version = 1.00
+        self._up_to_date = False
+
+
+class DictModuleInVault(DictModule):
+    def __init__(self, address):
+        self.www = address
+        self.file_address = ""
+        super(DictModuleInVault, self).__init__()
+
+
+def records(cls, count) -> list:
+    result = []
+    for n in range(count):
+        m = cls("https://neverwintervault.org/project/nwn1/module/module-{}".format(n))
+        m.title = "Module {}".format(n)
+        # Strings as they come from parsed pages: equal, but separate objects
+        m.author = "".join(AUTHORS[n % len(AUTHORS)])
+        m.tags = ["".join(TAGS[(n + i) % len(TAGS)]) for i in range(3)]
+        m.language = "".join(["Eng", "lish"])
+        result.append(m)
+    return result
+
+
+def footprint(cls, count) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = records(cls, count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(items) == count
+    return (after - before) / count
+
+
+def main(count=100000):
+    legacy = footprint(DictModuleInVault, count)
+    compact = footprint(ModuleInVault, count)
+    print("{} records (including title and address strings)".format(count))
+    print("__dict__ module       {:8.0f} bytes/record".format(legacy))
+    print("__slots__ module      {:8.0f} bytes/record {:5.1f}x".format(compact, legacy / compact))
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""
+    Benchmark of module page parsers: reference BeautifulSoup parser against vaultparser backends.
+    Run: python benchmarks/bench_parser.py [repeats] [fixture.html ...]
+"""
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import scrapper  # noqa: E402
+import vaultparser  # noqa: E402
+
+FIXTURES = pathlib.Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def measure(parser, pages, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for page in pages:
+            parser(page)
+    return (time.perf_counter() - start) / (repeats * len(pages))
+
+
+def main(repeats=200, files=None):
+    files = [pathlib.Path(f) for f in files] if files else [FIXTURES / "module_page.html"]
+    pages = [f.read_text(encoding="utf-8") for f in files]
+    reference = [scrapper.parse_nvn_vault(page) for page in pages]
+
+    parsers = {"BeautifulSoup (reference)": scrapper.parse_nvn_vault}
+    for backend in vaultparser.backends:
+        parsers["vaultparser, " + backend] = lambda page, backend=backend: vaultparser.parse_nvn_vault(page, backend)
+
+    base = None
+    print("{} pages, {} repeats".format(len(pages), repeats))
+    for name, parser in parsers.items():
+        assert [parser(page) for page in pages] == reference, "{} differs from reference".format(name)
+        seconds = measure(parser, pages, repeats)
+        base = base or seconds
+        print("{:28s} {:8.3f} ms/page {:6.1f}x".format(name, seconds * 1000, base / seconds))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200, args[1:])
@@ -0,0 +1,62 @@
+"""
+    Benchmark of registering modules: list scan of former NWN.save_module_unique against ModuleRegistry.
+    Run: python benchmarks/bench_registry.py [modules]
+"""
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from mainLib import ModuleInDir  # noqa: E402
+from registry import ModuleRegistry  # noqa: E402
+
+LIST_LIMIT = 5000  # list scans are quadratic, larger sizes take minutes
+
+
+def modules(count) -> list:
+    result = []
+    for n in range(count):
+        m = ModuleInDir("/nwn/modules/module{}.mod".format(n))
+        m.title = "Module {}".format(n)
+        m.author = "Author {}".format(n % 100)
+        result.append(m)
+    return result
+
+
+def list_unique(items):
+    registered = []
+    for module in items:
+        if all([module.__ne__(x) for x in registered]):
+            registered.append(module)
+    return registered
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main(count=100000):
+    items = modules(count)
+    print("{} modules".format(count))
+    if count <= LIST_LIMIT:
+        print("list, save_module_unique    {:10.1f} ms".format(measure(list_unique, items) * 1000))
+    else:
+        seconds = measure(list_unique, items[:LIST_LIMIT])
+        print("list, save_module_unique    {:10.1f} ms for {} modules, ~{:.0f} s estimated".format(
+            seconds * 1000, LIST_LIMIT, seconds * (count / LIST_LIMIT) ** 2))
+    registry = ModuleRegistry()
+    print("registry, add_many          {:10.1f} ms".format(measure(registry.add_many, items) * 1000))
+    print("registry, add_many again    {:10.1f} ms".format(measure(registry.add_many, items) * 1000))
+    lookups = [(m.title, m.version) for m in items]
+    print("registry, get               {:10.1f} ms".format(
+        measure(lambda: [registry.get(*k) for k in lookups]) * 1000))
+    print("registry, by_author         {:10.1f} ms".format(
+        measure(lambda: [registry.by_author("Author {}".format(n)) for n in range(100)]) * 1000))
+    print("registry, remove_many       {:10.1f} ms".format(measure(registry.remove_many, items) * 1000))
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,146 @@
+"""
+    Benchmark suite of scanning a synthetic installation (see synthetic.py) of 1k, 10k and 100k files:
+    NWN.find_modules, NWN.__init__, disk usage report and duplicate scan, each with a cold and a warm
+    index (or hash cache). Results are written to a JSON file, a previous one can be compared against:
+    exits with status 1 if any benchmark is slower than the threshold.
+    Run: python benchmarks/bench_scanning.py [--files 1000 10000 100000] [--output FILE]
+                                              [--compare OLD_FILE] [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import diskusage  # noqa: E402
+import duplicates  # noqa: E402
+import synthetic  # noqa: E402
+from discovery import file_type  # noqa: E402
+from fsindex import DirectoryIndex  # noqa: E402
+from mainLib import NWN  # noqa: E402
+
+# Small files keep full hashing of duplicates cheap, sizes do not matter for listing
+SIZES = {extension: (low // 16, high // 16) for extension, (low, high) in synthetic.SIZES.items()}
+DUPLICATES = 0.02
+
+
+def measure(function, repeats=3):
+    u"""Best wall time of repeats calls, ms, and the last result."""
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(files) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        root = pathlib.Path(directory)
+        start = time.perf_counter()
+        tree = synthetic.generate(root / "nwn", files, sizes=SIZES, duplicates=DUPLICATES)
+        results["generate"] = (time.perf_counter() - start) * 1000
+        config = synthetic.game_config(tree, "EE")
+        local = config.game_config.path_to_local_vault  # both 'modules' directories are scanned by NWN
+        paths = [os.path.join(d, name) for paths in tree.roots.values() for r in paths
+                 for d in (os.path.join(r, sub) for sub in synthetic.SUBDIRECTORIES.values())
+                 for name in os.listdir(d)]
+        found = [(path, file_type(path)) for path in paths]
+
+        def index(name="index.json", fresh=True):
+            path = root / name
+            if fresh and path.exists():
+                path.unlink()
+            return DirectoryIndex(path)
+
+        results["find_modules cold"], _ = measure(lambda: NWN.find_modules(local, index()))
+        warm = index("warm.json")
+        NWN.find_modules(local, warm)
+        results["find_modules warm"], _ = measure(lambda: NWN.find_modules(local, warm))
+
+        results["NWN.__init__ cold"], _ = measure(lambda: NWN(config, index()))
+        warm = index("warm.json")
+        NWN(config, warm)
+        results["NWN.__init__ warm"], _ = measure(lambda: NWN(config, warm))
+        NWN._instances.clear()
+
+        results["disk usage cold"], report = measure(lambda: diskusage.DiskUsage(tree.roots, index()).report())
+        assert report["files"] == files, report["files"]
+        usage = diskusage.DiskUsage(tree.roots, index("warm.json"))
+        usage.report()
+        results["disk usage warm"], _ = measure(usage.report)
+
+        def cache(fresh=True):
+            path = root / "hashes.json"
+            if fresh and path.exists():
+                path.unlink()
+            return duplicates.HashCache(path)
+
+        results["duplicates cold"], groups = measure(lambda: duplicates.DuplicateFinder(found, cache()).find())
+        assert sum(len(g.paths) - 1 for g in groups) == tree.duplicates
+        results["duplicates warm"], _ = measure(lambda: duplicates.DuplicateFinder(found, cache(False)).find())
+    return results
+
+
+def compare(old: dict, new: dict, threshold) -> bool:
+    u"""Print changes against old results. Return True if any benchmark is slower by more than threshold."""
+    regressed = False
+    for files, results in new["results"].items():
+        for name, ms in results.items():
+            before = old.get("results", {}).get(files, {}).get(name)
+            if before is None or name == "generate":
+                continue
+            change = (ms - before) / before if before else 0.0
+            slower = change > threshold
+            regressed = regressed or slower
+            print("{:>7s} {:20s} {:10.1f} -> {:10.1f} ms {:+7.1%}{}".format(
+                files, name, before, ms, change, "  REGRESSION" if slower else ""))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of scanning a synthetic NWN installation.")
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--output", default="bench_scanning.json", help="File results are written to.")
+    parser.add_argument("--compare", help="Results of a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown, default 0.2 (20%%).")
+    args = parser.parse_args()
+
+    output = {"commit": commit(), "python": platform.python_version(), "platform": platform.platform(),
+              "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": {}}
+    for files in args.files:
+        results = output["results"][str(files)] = run(files)
+        print("{} files".format(files))
+        for name, ms in results.items():
+            print("    {:20s} {:10.1f} ms".format(name, ms))
+    with open(args.output, "w", encoding="utf-8") as fo:
+        json.dump(output, fo, indent=2)
+    print("Results written to {}.".format(args.output))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fi:
+            old = json.load(fi)
+        print("Compared with {} ({}):".format(args.compare, old.get("commit", "")))
+        return 1 if compare(old, output, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
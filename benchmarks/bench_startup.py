@@ -0,0 +1,48 @@
+"""
+    Benchmark of start up time: import of mainLib and a cold run of 'run.py -ls', above the start up
+    of a bare interpreter. Exits with status 1 if any of them exceeds the budget.
+    Run: python benchmarks/bench_startup.py [repeats] [budget in ms]
+"""
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+HEAVY = ("scrapper", "bs4", "requests", "validators", "lxml")
+
+
+def best(command, repeats, cwd, env) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(repeats=10, budget=100.0):
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=str(ROOT), PYTHONDONTWRITEBYTECODE="1")
+        check = "import sys, mainLib; print(','.join(m for m in {!r} if m in sys.modules))".format(HEAVY)
+        heavy = subprocess.run([sys.executable, "-c", check], cwd=home, env=env, check=True,
+                               capture_output=True, text=True).stdout.strip()
+        baseline = best([sys.executable, "-c", "pass"], repeats, home, env)
+        results = {"import mainLib": best([sys.executable, "-c", "import mainLib"], repeats, home, env) - baseline,
+                   "run.py -ls": best([sys.executable, str(ROOT / "run.py"), "-ls"], repeats, home, env) - baseline}
+    print("bare interpreter   {:8.1f} ms".format(baseline * 1000))
+    failed = bool(heavy)
+    for name, seconds in results.items():
+        over = seconds * 1000 > budget
+        failed = failed or over
+        print("{:18s} {:8.1f} ms{}".format(name, seconds * 1000, "  OVER BUDGET" if over else ""))
+    if heavy:
+        print("mainLib imports heavy modules: {}".format(heavy))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    sys.exit(main(int(arguments[0]) if arguments else 10, float(arguments[1]) if len(arguments) > 1 else 100.0))
@@ -0,0 +1,109 @@
+"""
+    Benchmark of the catalog table of the GUI (see moduletable.py) with a synthetic catalog: loading of rows
+    on a worker, then on the event thread typing a query key by key, deleting it, sorting by every column
+    and scrolling through the whole view. Frame times are of single event loop iterations, an operation
+    takes several of them when its view is computed in steps. Repainting of the view alone is measured
+    first, it is the floor of every frame. Exits with status 1 if the 99th percentile of frames of some
+    operation exceeds the one of repainting by more than the budget.
+    Run: QT_QPA_PLATFORM=offscreen python benchmarks/bench_table.py [rows] [budget in ms]
+"""
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2.QtCore import Qt  # noqa: E402
+from PySide2.QtWidgets import QApplication, QHeaderView, QTableView  # noqa: E402
+
+import synthetic  # noqa: E402
+from catalog import CatalogStore  # noqa: E402
+from guiworkers import CatalogWorker, Workers  # noqa: E402
+from moduletable import COLUMNS, ModuleTableModel  # noqa: E402
+
+QUERY = "dragon tower"
+
+
+def timed(model, action) -> list:
+    u"""Run an action and the event loop until the model has shown its view, return frame times in ms."""
+    start = time.perf_counter()
+    action()
+    QApplication.processEvents()
+    frames = [(time.perf_counter() - start) * 1000]
+    while model.busy:
+        start = time.perf_counter()
+        QApplication.processEvents()
+        frames.append((time.perf_counter() - start) * 1000)
+    return frames
+
+
+def summary(name, operations) -> float:
+    u"""Print percentiles of frame times of operations, return the 99th one."""
+    times = sorted(t for frames in operations for t in frames)
+    p99 = times[int(len(times) * 0.99)]
+    print("{:20s} {:5d} x {:5d} frames  p50 {:7.2f} ms  p99 {:7.2f} ms  max {:7.2f} ms".format(
+        name, len(operations), len(times), times[len(times) // 2], p99, times[-1]))
+    return p99
+
+
+def main(count=100000, budget=16.0):
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    with tempfile.TemporaryDirectory() as directory:
+        path = pathlib.Path(directory).joinpath("catalog.sqlite")
+        with CatalogStore(path) as store:
+            store.upsert(synthetic.catalog_records(count))
+
+        model = ModuleTableModel()
+        view = QTableView()
+        view.setModel(model)
+        view.setSortingEnabled(True)
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.resize(800, 600)
+        view.show()
+        QApplication.processEvents()
+
+        start = time.perf_counter()
+        worker = Workers().start(CatalogWorker(path))
+        worker.signals.result.connect(model.set_rows)
+        while not worker.done.is_set():
+            QApplication.processEvents()
+            time.sleep(0.001)
+        loaded = time.perf_counter() - start
+        shown = timed(model, lambda: None)[0]
+        print("{} rows loaded on a worker in {:.2f} s, shown in {:.2f} ms".format(len(model.rows), loaded, shown))
+        floor = summary("repainting", [timed(model, view.viewport().repaint) for _ in range(200)])
+
+        # Keys typed slower than the debounce interval, each one applies a filter
+        longest = summary("typing", [timed(model, lambda: model.filter(QUERY[:i], sliced=True))
+                                     for i in range(1, len(QUERY) + 1)])
+        longest = max(longest, summary("deleting", [timed(model, lambda: model.filter(QUERY[:i], sliced=True))
+                                                    for i in range(len(QUERY) - 1, -1, -1)]))
+        longest = max(longest, summary("sorting", [timed(model, lambda: view.sortByColumn(column, order))
+                                                   for column in range(len(COLUMNS))
+                                                   for order in (Qt.AscendingOrder, Qt.DescendingOrder)]))
+        model.filter("dragon", sliced=True)
+        longest = max(longest, summary("sorting filtered", [timed(model, lambda: view.sortByColumn(column, order))
+                                                            for column in range(len(COLUMNS))
+                                                            for order in (Qt.AscendingOrder, Qt.DescendingOrder)]))
+        model.filter("")
+        scrollbar = view.verticalScrollBar()
+        steps = []
+        while model.canFetchMore() or scrollbar.value() < scrollbar.maximum():
+            steps.append(timed(model, lambda: scrollbar.setValue(scrollbar.value() + scrollbar.pageStep())))
+        longest = max(longest, summary("scrolling by pages", steps))
+        print("rows in the model after scrolling: {}".format(model.rowCount()))
+        view.close()
+        model.rows.close()
+    over = longest - floor > budget
+    print("longest p99 frame {:.2f} ms, {:.2f} ms over repainting, budget {:.0f} ms{}".format(
+        longest, longest - floor, budget, "  OVER BUDGET" if over else ""))
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    sys.exit(main(int(arguments[0]) if arguments else 100000, float(arguments[1]) if len(arguments) > 1 else 16.0))
@@ -0,0 +1,78 @@
+"""
+    End-to-end benchmark of crawling and downloading modules from a local mock vault (see mockvault.py)
+    with injected latency, bandwidth cap and error rate.
+    Run: python benchmarks/bench_vault.py [--modules 200] [--latency 50] [--bandwidth 4194304] [--errors 0.01]
+                                          [--workers 16] [--downloads 20]
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import requests  # noqa: E402
+
+import scrapper  # noqa: E402
+from crawler import Crawler  # noqa: E402
+from mockvault import MockVault  # noqa: E402
+
+
+def download(page, directory):
+    u"""Downloaded module, or None if the vault answered with an injected error."""
+    try:
+        return scrapper.download_scrapped_module(page, directory)
+    except requests.HTTPError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl and download benchmark against a mock vault.")
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=50.0, help="ms added to every response.")
+    parser.add_argument("--bandwidth", type=int, default=4 * 1024 * 1024, help="Bytes per second of a response.")
+    parser.add_argument("--errors", type=float, default=0.01, help="Share of requests answered with 503.")
+    parser.add_argument("--archive-size", type=int, default=1024 * 1024)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--downloads", type=int, default=20)
+    args = parser.parse_args()
+
+    with MockVault(args.modules, latency=args.latency / 1000, bandwidth=args.bandwidth, error_rate=args.errors,
+                   archive_size=args.archive_size) as vault:
+        scrapper.set_base_url(vault.url)
+        start = time.perf_counter()
+        links = None
+        while links is None:  # the list page itself may be answered with an injected error
+            try:
+                links = scrapper.create_list_of_links()
+            except requests.HTTPError:
+                pass
+        listed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with Crawler(workers=args.workers, per_host=args.workers) as crawler:
+            pages = list(crawler.crawl(links))
+            failed = len(crawler.failed)
+        crawled = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.workers) as pool:
+                results = list(pool.map(lambda page: download(page, directory), pages[:args.downloads]))
+            downloaded = time.perf_counter() - start
+        downloads = [m for m in results if m is not None]
+        size = sum(m.download.size for m in downloads)
+
+    print("{} modules, {:.0f} ms latency, {} B/s per response, {:.1%} errors".format(
+        args.modules, args.latency, args.bandwidth, args.errors))
+    print("list of links          {:8.2f} s".format(listed))
+    print("crawl                  {:8.2f} s {:8.1f} pages/s, {} failed".format(crawled, len(pages) / crawled, failed))
+    print("download               {:8.2f} s {:8.1f} MB/s, {} archives, {} failed".format(
+        downloaded, size / downloaded / 2 ** 20, len(downloads), len(results) - len(downloads)))
+    print("server                 {}".format(vault.stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+    Persistent catalog of modules scrapped from neverwintervault.org, stored in SQLite.
+    Sync fetches only pages which are new in the listing or which have changed since the last sync,
+    unchanged pages cost a conditional request answered from the http cache.
+"""
+import json
+import logging
+import pathlib
+import sqlite3
+import time
+
+import scrapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "catalog.sqlite"
+BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    www TEXT PRIMARY KEY,
+    title TEXT,
+    href TEXT,
+    size INTEGER,
+    compression TEXT,
+    author TEXT,
+    last_changed TEXT,
+    version TEXT,
+    game TEXT,
+    category TEXT,
+    language TEXT,
+    data TEXT NOT NULL,
+    listed INTEGER NOT NULL DEFAULT 1,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS modules_title ON modules (title);
+CREATE INDEX IF NOT EXISTS modules_author ON modules (author);
+CREATE TABLE IF NOT EXISTS sync (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    new INTEGER, updated INTEGER, unchanged INTEGER, removed INTEGER, failed INTEGER
+);
+"""
+
+_COLUMNS = ("www", "title", "href", "size", "compression", "author", "last_changed", "version", "game",
+            "category", "language", "data", "listed", "checked_at")
+
+
+def default_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_FILE_NAME)
+
+
+def _row(record: dict, checked_at: float) -> tuple:
+    size = record.get("size")
+    return (record["www"], record.get("title"), record.get("href"),
+            int(size) if str(size).isdigit() else None, record.get("compression"), record.get("author"),
+            record.get("last_changed"), record.get("version"), record.get("game"), record.get("category"),
+            record.get("language"), json.dumps(record), 1, checked_at)
+
+
+class SyncReport:
+    u"""Counters of a single sync operation."""
+
+    def __init__(self):
+        self.new = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return "SyncReport(new: {0}, updated: {1}, unchanged: {2}, removed: {3}, failed: {4}, {5:.1f} s)".format(
+            self.new, self.updated, self.unchanged, self.removed, self.failed, self.seconds)
+
+
+class CatalogStore:
+    u"""SQLite store of scrapped module records, keyed by address of a module page ('www')."""
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM modules WHERE listed = 1").fetchone()[0]
+
+    def __contains__(self, www):
+        return self.connection.execute("SELECT 1 FROM modules WHERE www = ?", (www,)).fetchone() is not None
+
+    def __iter__(self):
+        u"""Iterate over records of all modules present in the listing."""
+        for data, in self.connection.execute("SELECT data FROM modules WHERE listed = 1 ORDER BY title"):
+            yield json.loads(data)
+
+    def get(self, www):
+        row = self.connection.execute("SELECT data FROM modules WHERE www = ?", (www,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def table(self, columns=("www", "title")) -> list:
+        u"""Tuples of the given columns of all listed modules, without decoding of their records.
+            :columns - names from _COLUMNS"""
+        unknown = set(columns).difference(_COLUMNS)
+        if unknown:
+            raise ValueError("Unknown columns: {}".format(", ".join(sorted(unknown))))
+        return self.connection.execute("SELECT {} FROM modules WHERE listed = 1".format(", ".join(columns))).fetchall()
+
+    def changed_dates(self) -> dict:
+        u"""Map addresses of listed modules to their last known changed date."""
+        return dict(self.connection.execute("SELECT www, last_changed FROM modules WHERE listed = 1"))
+
+    def upsert(self, records, batch_size=BATCH_SIZE) -> int:
+        u"""Insert or replace records, each must have 'www' key. Records are written in batched transactions."""
+        now = time.time()
+        count = 0
+        batch = []
+        sql = "INSERT OR REPLACE INTO modules ({}) VALUES ({})".format(", ".join(_COLUMNS),
+                                                                       ", ".join("?" * len(_COLUMNS)))
+        for record in records:
+            batch.append(_row(record, now))
+            if len(batch) >= batch_size:
+                with self.connection:
+                    self.connection.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self.connection:
+                self.connection.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def touch(self, addresses):
+        u"""Mark modules as checked and listed without rewriting their records."""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany("UPDATE modules SET checked_at = ?, listed = 1 WHERE www = ?",
+                                        ((now, www) for www in addresses))
+
+    def unlist(self, addresses):
+        with self.connection:
+            self.connection.executemany("UPDATE modules SET listed = 0 WHERE www = ?", ((www,) for www in addresses))
+
+    def sync(self, links=None, changed=None, crawler=None, batch_size=BATCH_SIZE) -> SyncReport:
+        u"""Bring the catalog up to date with the vault.
+            :links - iterable of module pages, by default scrapper.create_list_of_links(),
+            :changed - dict, optional changed dates known from a listing, www: date; pages with a date equal
+                to the stored one are not requested at all,
+            :crawler - crawler.Crawler used to fetch pages, a default one is created if None.
+            Pages already in the catalog are revalidated through scrapper.cache, so unchanged pages are answered
+            with 304 and are not parsed again. If the cache is not enabled, it is enabled for this sync only."""
+        from crawler import Crawler
+        report = SyncReport()
+        start = time.monotonic()
+        with self.connection:
+            sync_id = self.connection.execute("INSERT INTO sync (started_at) VALUES (?)", (time.time(),)).lastrowid
+
+        own_cache = scrapper.cache is None
+        if own_cache:
+            scrapper.enable_cache()
+        own_crawler = crawler is None
+        crawler = crawler or Crawler()
+        try:
+            if links is None:
+                links = scrapper.create_list_of_links(crawler.session(scrapper.website_2.www()))
+            links = list(dict.fromkeys(links))
+            known = self.changed_dates()
+            changed = changed or {}
+
+            skipped = {www for www in links if www in known and www in changed and changed[www] == known[www]}
+            to_fetch = [www for www in links if www not in skipped]
+            removed = set(known).difference(links)
+
+            updates = []
+            unchanged = list(skipped)
+            for record in crawler.crawl(to_fetch):
+                www = record["www"]
+                if www not in known:
+                    report.new += 1
+                    updates.append(record)
+                elif record.get("last_changed") != known[www] or self.get(www) != record:
+                    report.updated += 1
+                    updates.append(record)
+                else:
+                    unchanged.append(www)
+                if len(updates) >= batch_size:
+                    self.upsert(updates, batch_size)
+                    updates = []
+            self.upsert(updates, batch_size)
+            self.touch(unchanged)
+            self.unlist(removed)
+
+            report.unchanged = len(unchanged)
+            report.removed = len(removed)
+            report.failed = len(crawler.failed)
+        finally:
+            if own_crawler:
+                crawler.close()
+            if own_cache:
+                scrapper.disable_cache()
+            else:
+                scrapper.cache.flush()
+
+        report.seconds = time.monotonic() - start
+        with self.connection:
+            self.connection.execute("UPDATE sync SET finished_at = ?, new = ?, updated = ?, unchanged = ?, "
+                                    "removed = ?, failed = ? WHERE id = ?",
+                                    (time.time(), report.new, report.updated, report.unchanged, report.removed,
+                                     report.failed, sync_id))
+        logger.info("Catalog synced: {}".format(report))
+        return report
+
+    def close(self):
+        self.connection.close()
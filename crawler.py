@@ -0,0 +1,133 @@
+"""
+    Concurrent crawler for module pages on neverwintervault.org.
+    Pages are fetched by a bounded pool of worker threads, every host gets its own keep-alive session
+    and its own limits of concurrent connections and requests per second.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import scrapper
+
+logger = logging.getLogger(__name__)
+
+
+class HostLimiter:
+    u"""Limits number of concurrent connections and rate of requests (per second) for a single host."""
+
+    def __init__(self, connections=4, rate=None):
+        self._semaphore = threading.BoundedSemaphore(connections)
+        self._interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        if self._interval:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._next_slot - now
+                self._next_slot = max(now, self._next_slot) + self._interval
+            if delay > 0:
+                time.sleep(delay)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._semaphore.release()
+        return False
+
+
+class Crawler:
+    u"""Crawl module pages with a pool of workers.
+        :workers - int, size of the worker pool,
+        :per_host - int, maximum number of concurrent connections to a single host,
+        :rate - float, maximum number of requests per second to a single host, None for no limit,
+        :timeout - float, timeout of a single request in seconds."""
+
+    def __init__(self, workers=8, per_host=4, rate=None, timeout=30):
+        self.workers = workers
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.failed = {}  # url: exception
+
+        self._sessions = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._limiters[host] = HostLimiter(self.per_host, self.rate)
+                logger.debug("New session for host: {}".format(host))
+            return self._sessions[host], self._limiters[host]
+
+    def session(self, url) -> requests.Session:
+        u"""Keep-alive session shared by all requests to the host of an url."""
+        return self._host(url)[0]
+
+    def scrap(self, url) -> dict:
+        u"""Fetch and parse a single module page. Url of the page is stored under 'www' key."""
+        session, limiter = self._host(url)
+        with limiter:
+            response = scrapper.get_page(url, session, timeout=self.timeout)
+        result = scrapper.parse_page(response)
+        result["www"] = url
+        return result
+
+    def crawl(self, links):
+        u"""Yield parsed module data as soon as pages are scrapped, not in order of links.
+            Pages which could not be fetched or parsed are logged and collected in failed."""
+        links = iter(links)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            def submit(count):
+                for url in links:
+                    pending[executor.submit(self.scrap, url)] = url
+                    count -= 1
+                    if count == 0:
+                        break
+
+            # Keep a bounded number of pages in flight, so links may be a lazy iterator of any length
+            submit(2 * self.workers)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except (requests.RequestException, TypeError, AttributeError, KeyError) as excep:
+                        logger.error("Could not scrap {}: {}".format(url, excep))
+                        self.failed[url] = excep
+                submit(len(done))
+
+    def crawl_vault(self):
+        u"""Yield data of all modules listed on neverwintervault.org."""
+        links = scrapper.create_list_of_links(self.session(scrapper.website_2.www()))
+        logger.info("Crawling {} module pages.".format(len(links)))
+        return self.crawl(links)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._limiters.clear()
@@ -0,0 +1,274 @@
+"""
+    Background service keeping the index of game directories, the search index and configuration warm
+    in memory and answering queries of run.py over a Unix domain socket.
+    Protocol: one JSON object per line in both directions,
+        request  {"command": "ls" | "search" | "disk_usage" | "refresh" | "ping" | "shutdown", "args": {...}}
+        response {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+    State is refreshed in the background, periodically or on changes reported by watcher.Watcher: unchanged
+    directories cost one stat each (see fsindex), search index, hak graph and disk usage reports are updated
+    only when a directory has changed. Changes reported by the watcher are applied to files of the changed
+    directories only, the vault catalog is not read again for them.
+"""
+import json
+import logging
+import os
+import pathlib
+import socket
+import socketserver
+import threading
+
+import discovery
+import diskusage
+import fsindex
+import hakgraph
+import registry
+import search
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "nwntool.sock"
+REFRESH_INTERVAL = 5.0  # seconds
+
+
+def default_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_FILE_NAME)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode("utf-8"))
+                response = {"ok": True, "result": self.server.daemon.handle(request["command"],
+                                                                             **request.get("args", {}))}
+            except Exception as excep:  # report any failure to the client, keep serving
+                logger.debug("Request {} failed: {}".format(line[:200], excep))
+                response = {"ok": False, "error": "{}: {}".format(type(excep).__name__, excep)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class Daemon:
+    u"""Index service.
+        :socket_path - path of the socket, by default in program's main directory,
+        :editions - dict, edition: list of game directories, by default diskusage.roots_by_edition(),
+        :index - fsindex.DirectoryIndex, :search_index - search.SearchIndex, shared ones by default,
+        :hak_graph - hakgraph.HakGraph, by default the one in program's main directory,
+        :interval - seconds between background refreshes, None disables them,
+        :watch - apply changes reported by watcher.Watcher instead of refreshing periodically."""
+
+    def __init__(self, socket_path=None, editions=None, index=None, search_index=None, hak_graph=None,
+                 interval=REFRESH_INTERVAL, watch=False):
+        self.socket_path = str(socket_path or default_path())
+        self.editions = editions if editions is not None else diskusage.roots_by_edition()
+        self.index = index if index is not None else fsindex.shared()
+        self.search_index = search_index if search_index is not None else search.shared()
+        self.hak_graph = hak_graph if hak_graph is not None else hakgraph.HakGraph()
+        self.interval = interval
+        self.watch = watch
+        self._watcher = None
+        self.usage = diskusage.DiskUsage(self.editions, index=self.index)
+        self.modules = []  # [{"title", "path"}]
+        self._files = {}  # path: discovery.Found of every game file
+        self._found = {}  # path: mainLib.ModuleInDir of every module file, including copies in several roots
+        self.refreshes = 0
+        self._reports = {}  # edition: disk usage report, dropped when anything changes
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+
+    @property
+    def roots(self) -> list:
+        return list(dict.fromkeys(root for roots in self.editions.values() for root in roots))
+
+    def refresh(self, force=False, directories=None) -> bool:
+        u"""Bring the state up to date with the disk. Return True if anything has changed.
+            :directories - changed directories (see watcher.Watcher), only files directly in them are read
+                again and the vault catalog is not; all roots are checked if None."""
+        if directories is not None:
+            return self._refresh_directories(directories)
+        misses = self.index.misses
+        files = {f.path: f for f in discovery.Discovery(self.roots, index=self.index).run().values()}
+        changed = force or self.index.misses != misses or not self.refreshes
+        if changed:
+            self._set_files(files)
+            search.refresh(self.search_index, modules=self._found.values())
+            self.hak_graph.update(files.values())
+            self.hak_graph.save()
+        self.refreshes += 1
+        return changed
+
+    def _root(self, directory) -> str:
+        return next((root for root in self.roots if directory.startswith(root.rstrip(os.sep) + os.sep)), directory)
+
+    def _refresh_directories(self, directories) -> bool:
+        u"""Apply changes of directories to the files, modules, search index and hak graph."""
+        from mainLib import File
+        directories = {str(d).rstrip(os.sep) for d in directories}
+        prefixes = tuple(d + os.sep for d in directories)
+        files = {path: f for path, f in self._files.items() if not path.startswith(prefixes)}
+        for directory in directories:
+            root = self._root(directory)
+            for _, entries in self.index.walk(directory):  # a removed directory yields nothing
+                for e in entries:
+                    kind = discovery.file_type(e.name)
+                    if not e.is_dir and kind is not None:
+                        files[e.path] = discovery.Found(root, e.path, kind, e.size, e.mtime_ns)
+        old = self._files
+        removed = [path for path in old if path not in files]
+        changed = [f for path, f in files.items() if path not in old or
+                   (old[path].size, old[path].mtime_ns) != (f.size, f.mtime_ns)]
+        self.refreshes += 1
+        if not removed and not changed:
+            return False
+        self._set_files(files)
+
+        for path in removed:
+            self.search_index.remove(path)
+        for f in changed:
+            if f.path in self._found:
+                self.search_index.add_module(self._found[f.path], search.module_stamp(f.size, f.mtime_ns))
+        self.search_index.save()
+
+        gone = {hakgraph.hak_name(path) for path in removed}
+        copies = [f for f in files.values() if f.path in old and f.file_type == File.FileType.hakpack and
+                  hakgraph.hak_name(f.path) in gone]
+        self.hak_graph.apply(changed + copies, removed)  # another copy of a removed hak takes its place
+        self.hak_graph.save()
+        logger.debug("Applied changes of {} directories: {} files changed, {} removed.".format(
+            len(directories), len(changed), len(removed)))
+        return True
+
+    def _set_files(self, files):
+        u"""Replace files of game directories, keeping modules of unchanged paths."""
+        from mainLib import File
+        self._files = files
+        order = {root: position for position, root in enumerate(self.roots)}
+        modules = sorted((f for f in files.values() if f.file_type == File.FileType.module),
+                         key=lambda f: order.get(f.root, len(order)))
+        self._found = {f.path: self._found.get(f.path) or discovery.module_of(f.path) for f in modules}
+        unique = {}  # copy of the first root, see discovery.Discovery.modules
+        for module in self._found.values():
+            unique.setdefault(registry.key(module), module)
+        with self._lock:
+            self.modules = [{"title": m.title, "path": m.path} for m in unique.values()]
+            self._reports = {}
+
+    # Commands
+
+    def handle(self, command, **args):
+        handler = getattr(self, "command_" + command, None)
+        if handler is None:
+            raise ValueError("Unknown command {}".format(command))
+        return handler(**args)
+
+    def command_ping(self):
+        return {"pid": os.getpid(), "modules": len(self.modules), "refreshes": self.refreshes}
+
+    def command_ls(self):
+        return self.modules
+
+    def command_search(self, query, limit=20, kind=None):
+        return [hit._asdict() for hit in self.search_index.search(query, limit, kind)]
+
+    def command_disk_usage(self, edition=""):
+        with self._lock:
+            report = self._reports.get(edition)
+        if report is None:
+            report = self.usage.report(edition)
+            with self._lock:
+                self._reports[edition] = report
+        return report
+
+    def command_refresh(self):
+        return self.refresh(force=True)
+
+    def command_shutdown(self):
+        threading.Thread(target=self.stop, daemon=True).start()
+        return True
+
+    # Service
+
+    def _refresh_periodically(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except OSError as excep:
+                logger.error("Refresh failed: {}".format(excep))
+
+    def start(self):
+        u"""Refresh the state, bind the socket and serve in background threads."""
+        if os.path.exists(self.socket_path):
+            try:
+                query("ping", socket_path=self.socket_path)
+                raise OSError("Daemon is already running at {}".format(self.socket_path))
+            except (ConnectionError, FileNotFoundError):
+                os.unlink(self.socket_path)  # left by a daemon which did not stop cleanly
+        self.refresh()
+        self.index.save()
+        self._server = _Server(self.socket_path, _Handler)
+        self._server.daemon = self
+        threading.Thread(target=self._server.serve_forever, name="daemon-server", daemon=True).start()
+        if self.watch:
+            import watcher
+            self._watcher = watcher.Watcher(lambda directories: self.refresh(directories=directories),
+                                            watcher.watched_directories(self.roots), index=self.index).start()
+        elif self.interval:
+            threading.Thread(target=self._refresh_periodically, name="daemon-refresh", daemon=True).start()
+        logger.info("Daemon serves {} modules at {}.".format(len(self.modules), self.socket_path))
+
+    def wait(self):
+        self._stop.wait()
+
+    def stop(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        self.index.save()
+        self._stop.set()
+
+    def serve_forever(self):
+        u"""Start and block until the shutdown command or KeyboardInterrupt."""
+        self.start()
+        try:
+            self.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def query(command, socket_path=None, timeout=10.0, **args):
+    u"""Send a command to a running daemon and return its result.
+        Raises OSError (e.g. FileNotFoundError, ConnectionRefusedError) if no daemon is running
+        and RuntimeError if the daemon could not answer."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(str(socket_path or default_path()))
+        s.sendall(json.dumps({"command": command, "args": args}).encode("utf-8") + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                raise ConnectionError("Daemon closed the connection")
+            data += chunk
+    response = json.loads(data.decode("utf-8"))
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    return response["result"]
@@ -0,0 +1,185 @@
+"""
+    Parallel discovery of game files in all configured NWN directories (Diamond, Enhanced Edition
+    and their local directories). Every subtree is scanned by a separate worker, results are merged
+    into one deduplicated set and streamed as soon as each subtree is done.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import namedtuple
+import json
+import logging
+import os
+import pathlib
+import threading
+
+import fsindex
+
+logger = logging.getLogger(__name__)
+
+SUBDIRECTORIES = ("modules", "hak", "music", "movies")
+# Keys of config.json with paths to game directories
+ROOT_KEYS = ("diamond_version", "diamond_version_local_dir", "enhanced_version", "enhanced_version_local_dir")
+
+Found = namedtuple("Found", ("root", "path", "file_type", "size", "mtime_ns"))
+
+
+CONFIG_FILE_NAME = "config.json"
+
+
+def config_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(CONFIG_FILE_NAME)
+
+
+def read_config(file=None) -> dict:
+    u"""Content of config.json, by default the one in program's main directory; None if there is no file."""
+    try:
+        with open(file or config_path(), "r", encoding="utf-8") as fi:
+            return json.load(fi)
+    except FileNotFoundError:
+        return None
+
+
+def roots_from_config(file=None) -> list:
+    u"""Game directories listed in config.json (see read_config), or directories of current configuration
+        if there is no file."""
+    data = read_config(file)
+    if data is not None:
+        roots = [data[key] for key in ROOT_KEYS if data.get(key)]
+    else:
+        import Config
+        game = Config.config.config.game_config
+        roots = [game.path, game.path_to_local_vault]
+    return list(dict.fromkeys(str(root) for root in roots))
+
+
+_types = {}  # extension: mainLib.File.FileType
+
+
+def file_type(name: str):
+    u"""mainLib.File.FileType of a file by its extension, None for files not used by the game."""
+    if not _types:
+        from mainLib import File
+        _types.update({"." + ext: kind for kind, ext in File._extensions.items()})
+    return _types.get(os.path.splitext(name)[1].lower())
+
+
+def module_of(path):
+    u"""mainLib.ModuleInDir of a module file, named after the file."""
+    from mainLib import ModuleInDir
+    name = pathlib.Path(path).name
+    module = ModuleInDir(path)
+    module.name = "".join(n[0] for n in name.split())
+    module.title = name.replace(".mod", "")
+    return module
+
+
+class Discovery:
+    u"""Scan roots and their SUBDIRECTORIES concurrently.
+        :roots - list of game directories, by default roots_from_config(),
+        :workers - size of the thread pool, by default one thread per subtree (at most 32),
+        :index - fsindex.DirectoryIndex, unchanged directories are not read again."""
+
+    def __init__(self, roots=None, workers=None, index=None, subdirectories=SUBDIRECTORIES):
+        self.roots = list(roots) if roots is not None else roots_from_config()
+        self.subdirectories = subdirectories
+        self.index = index if index is not None else fsindex.shared()
+        self.workers = workers
+        self.files = {}  # real path: Found
+        self._lock = threading.Lock()
+
+    def _tasks(self):
+        seen = set()
+        for root in self.roots:
+            for subdirectory in self.subdirectories:
+                path = os.path.join(root, subdirectory)
+                real = os.path.realpath(path)
+                if real not in seen:
+                    seen.add(real)
+                    yield root, path, real
+
+    def _scan(self, root, subtree) -> list:
+        found = []
+        for directory, entries in self.index.walk(subtree):
+            for e in entries:
+                if not e.is_dir:
+                    kind = file_type(e.name)
+                    if kind is not None:
+                        found.append(Found(root, e.path, kind, e.size, e.mtime_ns))
+        return found
+
+    def _results(self, tasks):
+        u"""Yield (subtree, real path, files found or OSError) as subtrees are scanned.
+            With a single worker subtrees are scanned in the calling thread, without a pool."""
+        workers = self.workers or min(32, len(tasks))
+        if workers == 1:
+            for root, subtree, real in tasks:
+                try:
+                    yield subtree, real, self._scan(root, subtree)
+                except OSError as excep:
+                    yield subtree, real, excep
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self._scan, root, subtree): (subtree, real) for root, subtree, real in tasks}
+            for future in as_completed(futures):
+                subtree, real = futures[future]
+                try:
+                    yield subtree, real, future.result()
+                except OSError as excep:
+                    yield subtree, real, excep
+
+    def _new_files(self):
+        u"""Yield (position of the subtree in _tasks, new files found in it or None if it could not be scanned)
+            as soon as each subtree is scanned."""
+        tasks = [task for task in self._tasks() if os.path.isdir(task[1])]
+        if not tasks:
+            return
+        positions = {subtree: position for position, (_, subtree, _) in enumerate(tasks)}
+        for subtree, real, found in self._results(tasks):
+            if isinstance(found, OSError):
+                logger.error("Could not scan {}: {}".format(subtree, found))
+                yield positions[subtree], None
+                continue
+            new = []
+            with self._lock:
+                for f in found:
+                    key = real + f.path[len(subtree):]
+                    if key not in self.files:
+                        self.files[key] = f
+                        new.append(f)
+            logger.debug("Scanned {}: {} files.".format(subtree, len(found)))
+            yield positions[subtree], new
+        self.index.save()
+
+    def scan(self):
+        u"""Yield lists of new files found in every subtree as soon as the subtree is scanned.
+            Subtrees reachable from several roots (e.g. the same directory configured twice
+            or a symlink) are scanned and reported once."""
+        for _, new in self._new_files():
+            if new is not None:
+                yield new
+
+    def modules(self):
+        u"""Yield mainLib.ModuleInDir for every module, as soon as its directory and the directories of
+            preceding roots are scanned. A module present in several roots (same title and version, see
+            registry.key) is yielded once, the copy of the first root."""
+        from mainLib import File
+        import registry
+        done, position = {}, 0
+        seen = set()
+        for found_at, new in self._new_files():
+            done[found_at] = new
+            while position in done:
+                for f in done.pop(position) or ():
+                    if f.file_type == File.FileType.module:
+                        module = module_of(f.path)
+                        key = registry.key(module)
+                        if key not in seen:
+                            seen.add(key)
+                            yield module
+                position += 1
+
+    def run(self) -> dict:
+        u"""Scan everything, return all files found: real path: Found."""
+        for _ in self.scan():
+            pass
+        return self.files
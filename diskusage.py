@@ -0,0 +1,113 @@
+"""
+    Disk usage of tracked game directories, grouped by edition, directory and type of file.
+    Directories are walked in parallel through fsindex.DirectoryIndex, so on a warm index only
+    directories whose mtime has changed are read again.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+
+import discovery
+import fsindex
+
+logger = logging.getLogger(__name__)
+
+EDITIONS = {"DE": ("diamond_version", "diamond_version_local_dir"),
+            "EE": ("enhanced_version", "enhanced_version_local_dir")}
+OTHER = "other"
+
+
+def roots_by_edition(file=None) -> dict:
+    u"""Game directories of each edition from config.json (see discovery.read_config), or directories
+        of current configuration (Enhanced Edition by default) if there is no file."""
+    data = discovery.read_config(file)
+    if data is not None:
+        roots = {edition: [data[key] for key in keys if data.get(key)] for edition, keys in EDITIONS.items()}
+    else:
+        import Config
+        game = Config.config.config.game_config
+        roots = {"EE": [str(game.path), str(game.path_to_local_vault)]}
+    return {edition: list(dict.fromkeys(str(r) for r in paths)) for edition, paths in roots.items()}
+
+
+class DiskUsage:
+    u"""Bytes and number of files in tracked directories.
+        :roots - dict, edition: list of game directories, by default roots_by_edition(),
+        :index - fsindex.DirectoryIndex used to list directories."""
+
+    def __init__(self, roots=None, index=None, workers=None, subdirectories=discovery.SUBDIRECTORIES):
+        self.roots = roots if roots is not None else roots_by_edition()
+        self.index = index if index is not None else fsindex.shared()
+        self.workers = workers
+        self.subdirectories = subdirectories
+
+    def _tasks(self, edition=None):
+        for name, roots in self.roots.items():
+            if edition and name != edition:
+                continue
+            seen = set()
+            for root in roots:
+                for subdirectory in self.subdirectories:
+                    path = os.path.join(root, subdirectory)
+                    real = os.path.realpath(path)
+                    if real not in seen and os.path.isdir(path):
+                        seen.add(real)
+                        yield name, path
+
+    def _scan(self, path) -> dict:
+        usage = {}  # type name: [files, bytes]
+        for _, entries in self.index.walk(path):
+            for e in entries:
+                if not e.is_dir:
+                    kind = discovery.file_type(e.name)
+                    counter = usage.setdefault(kind.name if kind is not None else OTHER, [0, 0])
+                    counter[0] += 1
+                    counter[1] += e.size
+        return usage
+
+    def report(self, edition=None) -> dict:
+        u"""Disk usage of one edition ('DE' or 'EE') or all of them (None or empty string):
+            {"total": bytes, "files": n, "editions": {edition: {"total", "files",
+             "directories": {path: {"total", "files", "types": {type: {"files", "bytes"}}}}}}}"""
+        tasks = list(self._tasks(edition or None))
+        result = {"total": 0, "files": 0, "editions": {}}
+        if not tasks:
+            return result
+        with ThreadPoolExecutor(max_workers=self.workers or min(32, len(tasks))) as executor:
+            scanned = list(executor.map(lambda task: self._scan(task[1]), tasks))
+        self.index.save()
+
+        for (name, path), usage in zip(tasks, scanned):
+            ed = result["editions"].setdefault(name, {"total": 0, "files": 0, "directories": {}})
+            types = {kind: {"files": files, "bytes": size} for kind, (files, size) in sorted(usage.items())}
+            total = sum(t["bytes"] for t in types.values())
+            files = sum(t["files"] for t in types.values())
+            ed["directories"][path] = {"total": total, "files": files, "types": types}
+            ed["total"] += total
+            ed["files"] += files
+            result["total"] += total
+            result["files"] += files
+        return result
+
+
+def human(size) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return "{:.1f} {}".format(size, unit) if unit != "B" else "{} B".format(size)
+        size /= 1024
+    return "{:.1f} TiB".format(size)
+
+
+def table(report: dict) -> str:
+    u"""Human readable table of a report."""
+    lines = ["{:4s} {:50s} {:8s} {:>7s} {:>12s}".format("ed.", "directory", "type", "files", "size")]
+    for edition, ed in report["editions"].items():
+        for path, directory in ed["directories"].items():
+            for kind, usage in directory["types"].items():
+                lines.append("{:4s} {:50s} {:8s} {:7d} {:>12s}".format(
+                    edition, path[-50:], kind, usage["files"], human(usage["bytes"])))
+        lines.append("{:4s} {:50s} {:8s} {:7d} {:>12s}".format(edition, "total", "", ed["files"],
+                                                               human(ed["total"])))
+    lines.append("{:4s} {:50s} {:8s} {:7d} {:>12s}".format("", "total", "", report["files"],
+                                                           human(report["total"])))
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+"""
+    Streaming downloads of module archives.
+    Data is written to a partial file in chunks and hashed on the fly, so memory usage does not depend
+    on size of the archive. Interrupted downloads are resumed with HTTP Range requests.
+"""
+import hashlib
+import logging
+import os
+import pathlib
+
+import requests
+
+from exceptions import IncompleteDownloadException
+from session import register, count_bytes
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = ".part"
+DEFAULT_DIRECTORY_NAME = "downloads"
+
+
+def default_directory() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_DIRECTORY_NAME)
+
+
+class Download:
+    u"""Result of a finished download: path to the file, its size in bytes and sha256 hex digest."""
+
+    def __init__(self, path, size, sha256):
+        self.path = pathlib.Path(path)
+        self.size = size
+        self.sha256 = sha256
+
+    def __repr__(self):
+        return "Download(path: {0}, size: {1}, sha256: {2})".format(self.path, self.size, self.sha256)
+
+
+def _hash_existing(path, digest) -> int:
+    u"""Feed already downloaded part of a file to the digest, return its size."""
+    size = 0
+    with open(path, "rb") as fi:
+        for chunk in iter(lambda: fi.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size
+
+
+@register
+def download(url: str, path, expected_size=None, session=None, retries=3, chunk_size=CHUNK_SIZE,
+             timeout=30, progress=None) -> Download:
+    u"""Download url to a path. Data is streamed to path + '.part' which is renamed when download is complete.
+        :expected_size - int or str, size of the file in bytes, e.g. 'size' returned by scrapper.scrap_nvn_vault,
+        :retries - int, how many times an interrupted transfer is resumed before giving up,
+        :progress - callable(downloaded bytes, expected size or None) called after every chunk, an exception
+            raised by it (e.g. exceptions.CancelledException) stops the download, the partial file is kept.
+        Raise IncompleteDownloadException if size of downloaded data does not match expected size."""
+    path = pathlib.Path(path)
+    part = path.with_name(path.name + PART_SUFFIX)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    expected_size = int(expected_size) if expected_size else None
+    getter = session.get if session is not None else requests.get
+
+    digest = hashlib.sha256()
+    offset = _hash_existing(part, digest) if part.exists() else 0
+    if expected_size is not None and offset > expected_size:
+        logger.debug("Partial file is larger than expected, starting again: {}".format(part))
+        digest, offset = hashlib.sha256(), 0
+        part.unlink()
+
+    attempt = 0
+    while expected_size is None or offset < expected_size:
+        headers = {"Range": "bytes={}-".format(offset)} if offset else {}
+        try:
+            with getter(url, headers=headers, stream=True, allow_redirects=True, timeout=timeout) as r:
+                if r.status_code == 416 and offset:  # Range not satisfiable, nothing left to download
+                    break
+                r.raise_for_status()
+                if offset and r.status_code != 206:
+                    logger.debug("Server does not support ranges, starting again: {}".format(url))
+                    digest, offset = hashlib.sha256(), 0
+                mode = "ab" if offset else "wb"
+                logger.debug("Downloading {} from byte {}.".format(url, offset))
+                with open(part, mode) as fi:
+                    for chunk in r.iter_content(chunk_size):
+                        fi.write(chunk)
+                        digest.update(chunk)
+                        offset += len(chunk)
+                        count_bytes(len(chunk))
+                        if progress is not None:
+                            progress(offset, expected_size)
+            if expected_size is None or offset >= expected_size:
+                break
+            logger.info("Connection closed at byte {} of {}.".format(offset, expected_size))
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as excep:
+            logger.info("Download interrupted at byte {} ({}).".format(offset, excep))
+        attempt += 1
+        if attempt > retries:
+            break
+        logger.info("Resuming download, attempt {} of {}.".format(attempt, retries))
+
+    if expected_size is not None and offset != expected_size:
+        raise IncompleteDownloadException(url, offset, expected_size)
+
+    os.replace(part, path)
+    logger.info("Downloaded {} bytes to {}.".format(offset, path))
+    return Download(path, offset, digest.hexdigest())
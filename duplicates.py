@@ -0,0 +1,220 @@
+"""
+    Finder of duplicated game files (modules, hakpacks, music, movies) across all NWN installations.
+    Candidates are grouped by type and size, then compared by a hash of the head and the tail of a file,
+    and only files which still collide are hashed in full. Hashes are kept in a persistent cache keyed
+    by (device, inode, size, mtime), so rescans do not read unchanged files.
+"""
+from collections import defaultdict
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "hash_cache.json"
+CHUNK_SIZE = 1024 * 1024
+PARTIAL_SIZE = 64 * 1024  # bytes hashed at the head and at the tail of a file
+
+
+def default_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_FILE_NAME)
+
+
+class HashCache:
+    u"""Persistent cache of partial and full hashes of files, keyed by (device, inode, size, mtime)."""
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path) if path else default_path()
+        self.hits = 0
+        self.misses = 0
+        self._hashes = {}
+        self._changed = False
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as fi:
+                self._hashes = json.load(fi)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            logger.error("Corrupted hash cache, starting with an empty one: {}".format(self.path))
+
+    @staticmethod
+    def key(st) -> str:
+        return "{}:{}:{}:{}".format(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get(self, st, kind):
+        value = self._hashes.get(self.key(st), {}).get(kind)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, st, kind, value):
+        with self._lock:
+            self._hashes.setdefault(self.key(st), {})[kind] = value
+            self._changed = True
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fo:
+                json.dump(self._hashes, fo)
+            os.replace(tmp, self.path)
+            self._changed = False
+
+
+def partial_hash(path, size) -> str:
+    u"""Hash of the first and the last PARTIAL_SIZE bytes of a file."""
+    digest = hashlib.blake2b(str(size).encode())
+    with open(path, "rb") as fi:
+        digest.update(fi.read(PARTIAL_SIZE))
+        if size > PARTIAL_SIZE:
+            fi.seek(max(PARTIAL_SIZE, size - PARTIAL_SIZE))
+            digest.update(fi.read(PARTIAL_SIZE))
+    return digest.hexdigest()
+
+
+def full_hash(path) -> str:
+    digest = hashlib.blake2b()
+    with open(path, "rb") as fi:
+        for chunk in iter(lambda: fi.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DuplicateGroup:
+    u"""Files with identical content. The first path is kept when duplicates are replaced by hardlinks.
+        :stats - path: os.stat_result of a file when it was hashed, hardlink() skips files changed since."""
+
+    def __init__(self, file_type, size, paths, stats=None):
+        self.file_type = file_type
+        self.size = size
+        self.paths = paths
+        self.stats = stats or {}
+
+    @property
+    def wasted(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+    def __repr__(self):
+        return "DuplicateGroup({0}, {1} bytes, {2})".format(self.file_type, self.size, self.paths)
+
+
+class DuplicateFinder:
+    u"""Find duplicates among files.
+        :files - iterable of (path, mainLib.File.FileType) pairs, by default all files found
+            by discovery.Discovery,
+        :cache - HashCache, default one is stored in program's main directory."""
+
+    def __init__(self, files=None, cache=None):
+        if files is None:
+            from discovery import Discovery
+            files = ((f.path, f.file_type) for f in Discovery().run().values())
+        self.files = [(str(path), kind) for path, kind in files]
+        self.cache = cache if cache is not None else HashCache()
+        self.hashed_bytes = 0
+
+    def _hash(self, path, st, kind):
+        value = self.cache.get(st, kind)
+        if value is None:
+            if kind == "partial":
+                value = partial_hash(path, st.st_size)
+                self.hashed_bytes += min(st.st_size, 2 * PARTIAL_SIZE)
+            else:
+                value = full_hash(path)
+                self.hashed_bytes += st.st_size
+            self.cache.put(st, kind, value)
+        return value
+
+    def find(self) -> list:
+        u"""List of DuplicateGroup, the biggest waste of space first."""
+        by_size = defaultdict(list)
+        for path, kind in self.files:
+            try:
+                st = os.stat(path)
+            except OSError as excep:
+                logger.debug("Skipping {}: {}".format(path, excep))
+                continue
+            by_size[(kind, st.st_size)].append((path, st))
+
+        groups = []
+        for (kind, size), candidates in by_size.items():
+            # Hardlinks of the same inode do not waste space, keep one path per inode
+            inodes = {}
+            for path, st in candidates:
+                inodes.setdefault((st.st_dev, st.st_ino), (path, st))
+            if len(inodes) < 2:
+                continue
+            by_partial = defaultdict(list)
+            for path, st in inodes.values():
+                by_partial[self._hash(path, st, "partial")].append((path, st))
+            for colliding in by_partial.values():
+                if len(colliding) < 2:
+                    continue
+                if size <= 2 * PARTIAL_SIZE:  # partial hash covered whole file
+                    groups.append(DuplicateGroup(kind, size, sorted(path for path, _ in colliding), dict(colliding)))
+                    continue
+                by_full = defaultdict(list)
+                for path, st in colliding:
+                    by_full[self._hash(path, st, "full")].append((path, st))
+                groups.extend(DuplicateGroup(kind, size, sorted(path for path, _ in same), dict(same))
+                              for same in by_full.values() if len(same) > 1)
+        self.cache.save()
+        groups.sort(key=lambda g: g.wasted, reverse=True)
+        logger.info("Found {} groups of duplicates, hashed {} bytes.".format(len(groups), self.hashed_bytes))
+        return groups
+
+
+def _unchanged(group: DuplicateGroup, path, st) -> bool:
+    u"""Whether a file still has the size, mtime and inode it had when it was hashed."""
+    hashed = group.stats.get(path)
+    if st.st_size != group.size:
+        return False
+    return hashed is None or (hashed.st_mtime_ns, hashed.st_ino, hashed.st_dev) == (st.st_mtime_ns, st.st_ino,
+                                                                                     st.st_dev)
+
+
+def hardlink(group: DuplicateGroup) -> int:
+    u"""Replace duplicates by hardlinks to the first file of a group. Return number of bytes freed.
+        Files changed since they were hashed, files which are not byte-identical to the first one any more
+        and files on another device are left untouched. A file is replaced atomically (link, then rename)."""
+    import filecmp
+    keep = group.paths[0]
+    keep_st = os.stat(keep)
+    if not _unchanged(group, keep, keep_st):
+        logger.warning("{} changed since it was hashed, its duplicates are left untouched.".format(keep))
+        return 0
+    freed = 0
+    for path in group.paths[1:]:
+        st = os.stat(path)
+        if (st.st_dev, st.st_ino) == (keep_st.st_dev, keep_st.st_ino):
+            continue  # already a hardlink of the kept file
+        if st.st_dev != keep_st.st_dev:
+            logger.info("Cannot hardlink across devices: {} and {}".format(keep, path))
+            continue
+        if not _unchanged(group, path, st) or not filecmp.cmp(keep, path, shallow=False):
+            logger.warning("{} changed since it was hashed, it is left untouched.".format(path))
+            continue
+        tmp = path + ".nwntool-link"
+        try:
+            os.unlink(tmp)  # left by an interrupted run
+        except FileNotFoundError:
+            pass
+        os.link(keep, tmp)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            os.unlink(tmp)
+            raise
+        if st.st_nlink == 1:  # other links of a replaced file keep its data
+            freed += group.size
+        logger.debug("Replaced {} by a hardlink to {}.".format(path, keep))
+    return freed
@@ -0,0 +1,341 @@
+"""
+    Reader of ERF containers (.mod, .hak, .erf, .nwm) of Neverwinter Nights.
+    A file is memory mapped and only the header, the key list and the resource list are parsed,
+    resources (e.g. module.ifo) are decoded on demand, so metadata of big modules is read in milliseconds.
+    Format: BioWare Aurora Engine, Encapsulated Resource File Format and Generic File Format (GFF V3.2).
+"""
+import logging
+import mmap
+import struct
+
+from exceptions import InvalidErfException
+from session import count_bytes
+
+logger = logging.getLogger(__name__)
+
+ERF_TYPES = (b"MOD ", b"HAK ", b"ERF ", b"NWM ")
+RES_TYPE_IFO = 2014
+DIAMOND_LAST_VERSION = (1, 69)  # last version of Diamond Edition, EE starts with 1.74
+
+_HEADER = struct.Struct("<4s4s9I")
+_HEADER_SIZE = 160
+_KEY = struct.Struct("<16sIHH")
+_RESOURCE = struct.Struct("<II")
+_GFF_HEADER = struct.Struct("<4s4s12I")
+_GFF_STRUCT = struct.Struct("<III")
+_GFF_FIELD = struct.Struct("<III")
+_U32 = struct.Struct("<I")
+
+# GFF field types
+BYTE, CHAR, WORD, SHORT, DWORD, INT, DWORD64, INT64, FLOAT, DOUBLE, CEXOSTRING, RESREF, CEXOLOCSTRING, VOID, \
+    STRUCT, LIST = range(16)
+_SIMPLE = {BYTE: "<B", CHAR: "<b", WORD: "<H", SHORT: "<h", DWORD: "<I", INT: "<i", FLOAT: "<f"}
+_COMPLEX = {DWORD64: "<Q", INT64: "<q", DOUBLE: "<d"}
+_ENCODING = "cp1252"
+
+
+class ErfFile:
+    u"""Memory mapped ERF file, resources are read lazily. Use as a context manager or call close()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fi:
+            try:
+                self._map = mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise InvalidErfException(path)
+        try:
+            self._read_header()
+        except (struct.error, InvalidErfException):
+            self._map.close()
+            raise InvalidErfException(path)
+        self._resources = None
+
+    def _read_header(self):
+        if len(self._map) < _HEADER_SIZE:
+            raise InvalidErfException(self.path)
+        (self.file_type, self.version, self.language_count, _, self.entry_count, _, self._key_offset,
+         self._resource_offset, self.build_year, self.build_day, _) = _HEADER.unpack_from(self._map, 0)
+        if self.file_type not in ERF_TYPES or self.version != b"V1.0":
+            raise InvalidErfException(self.path)
+        end = max(self._key_offset + self.entry_count * _KEY.size,
+                  self._resource_offset + self.entry_count * _RESOURCE.size)
+        if end > len(self._map):
+            raise InvalidErfException(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        self._map.close()
+
+    @property
+    def resources(self) -> dict:
+        u"""(resref, resource type): (offset, size), parsed from key and resource lists on first use."""
+        if self._resources is None:
+            resources = {}
+            try:
+                for i in range(self.entry_count):
+                    resref, res_id, res_type, _ = _KEY.unpack_from(self._map, self._key_offset + i * _KEY.size)
+                    offset, size = _RESOURCE.unpack_from(self._map, self._resource_offset + res_id * _RESOURCE.size)
+                    name = resref.split(b"\0", 1)[0].decode(_ENCODING).lower()
+                    resources[(name, res_type)] = (offset, size)
+            except (struct.error, UnicodeDecodeError):
+                raise InvalidErfException(self.path)
+            self._resources = resources
+        return self._resources
+
+    def read(self, resref: str, res_type: int) -> bytes:
+        offset, size = self.resources[(resref.lower(), res_type)]
+        if offset + size > len(self._map):
+            raise InvalidErfException(self.path)
+        count_bytes(size)
+        return self._map[offset:offset + size]
+
+    def module_info(self) -> dict:
+        u"""Decoded module.ifo of a .mod file, see module_info().
+            A missing, truncated or garbled module.ifo raises InvalidErfException."""
+        try:
+            return _module_info(Gff(self.read("module", RES_TYPE_IFO)).root())
+        except (KeyError, IndexError, struct.error, ValueError, UnicodeDecodeError, TypeError, AttributeError,
+                RecursionError) as excep:
+            logger.debug("Invalid module.ifo in {}: {}".format(self.path, excep))
+            raise InvalidErfException(self.path)
+
+
+class Gff:
+    u"""Reader of Generic File Format (V3.x) data, e.g. module.ifo."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        if len(data) < _GFF_HEADER.size:
+            raise ValueError("Truncated GFF header")
+        header = _GFF_HEADER.unpack_from(data, 0)
+        self.file_type, self.version = header[0], header[1]
+        (self._struct_offset, struct_count, self._field_offset, field_count, self._label_offset, label_count,
+         self._field_data_offset, field_data_size, self._field_indices_offset, field_indices_size,
+         self._list_indices_offset, list_indices_size) = header[2:]
+        if not self.version.startswith(b"V3."):
+            raise ValueError("Unknown GFF version: {}".format(self.version))
+        for offset, size in ((self._struct_offset, struct_count * _GFF_STRUCT.size),
+                             (self._field_offset, field_count * _GFF_FIELD.size),
+                             (self._label_offset, label_count * 16),
+                             (self._field_data_offset, field_data_size),
+                             (self._field_indices_offset, field_indices_size),
+                             (self._list_indices_offset, list_indices_size)):
+            if offset + size > len(data):
+                raise ValueError("GFF block at {} of {} bytes is out of data".format(offset, size))
+
+    def _bytes(self, offset, size) -> bytes:
+        if offset + size > len(self.data):
+            raise ValueError("GFF data at {} of {} bytes is out of data".format(offset, size))
+        return self.data[offset:offset + size]
+
+    def root(self) -> dict:
+        return self._struct(0)
+
+    def _label(self, index) -> str:
+        offset = self._label_offset + index * 16
+        return self.data[offset:offset + 16].split(b"\0", 1)[0].decode(_ENCODING)
+
+    def _struct(self, index) -> dict:
+        _, data, count = _GFF_STRUCT.unpack_from(self.data, self._struct_offset + index * _GFF_STRUCT.size)
+        if count == 1:
+            fields = [data]
+        else:
+            fields = struct.unpack_from("<{}I".format(count), self.data, self._field_indices_offset + data)
+        return dict(self._field(i) for i in fields)
+
+    def _field(self, index):
+        kind, label, data = _GFF_FIELD.unpack_from(self.data, self._field_offset + index * _GFF_FIELD.size)
+        raw = _U32.pack(data)
+        offset = self._field_data_offset + data
+        if kind in _SIMPLE:
+            value = struct.unpack_from(_SIMPLE[kind], raw)[0]
+        elif kind in _COMPLEX:
+            value = struct.unpack_from(_COMPLEX[kind], self.data, offset)[0]
+        elif kind == CEXOSTRING:
+            size = _U32.unpack_from(self.data, offset)[0]
+            value = self._bytes(offset + 4, size).decode(_ENCODING)
+        elif kind == RESREF:
+            size = self.data[offset]
+            value = self._bytes(offset + 1, size).decode(_ENCODING)
+        elif kind == CEXOLOCSTRING:
+            _, str_ref, count = struct.unpack_from("<3I", self.data, offset)
+            value, position = {}, offset + 12
+            for _ in range(count):
+                string_id, size = struct.unpack_from("<2I", self.data, position)
+                value[string_id] = self._bytes(position + 8, size).decode(_ENCODING)
+                position += 8 + size
+            value = LocString(str_ref, value)
+        elif kind == VOID:
+            size = _U32.unpack_from(self.data, offset)[0]
+            value = self._bytes(offset + 4, size)
+        elif kind == STRUCT:
+            value = self._struct(data)
+        elif kind == LIST:
+            position = self._list_indices_offset + data
+            count = _U32.unpack_from(self.data, position)[0]
+            indices = struct.unpack_from("<{}I".format(count), self.data, position + 4)
+            value = [self._struct(i) for i in indices]
+        else:
+            raise ValueError("Unknown GFF field type: {}".format(kind))
+        return self._label(label), value
+
+
+class LocString:
+    u"""Localized string: reference to dialog.tlk and strings by language id (0 - English)."""
+
+    def __init__(self, str_ref, strings):
+        self.str_ref = str_ref
+        self.strings = strings
+
+    def __str__(self):
+        if 0 in self.strings:
+            return self.strings[0]
+        return next(iter(self.strings.values()), "")
+
+    def __repr__(self):
+        return "LocString({0}, {1})".format(self.str_ref, self.strings)
+
+
+def _version(text: str) -> tuple:
+    try:
+        return tuple(int(n) for n in text.split(".")[:2])
+    except ValueError:
+        return ()
+
+
+def _module_info(ifo: dict) -> dict:
+    haks = [h.get("Mod_Hak", "") for h in ifo.get("Mod_HakList", [])]
+    if not haks and ifo.get("Mod_Hak"):  # before HotU a module could use a single hak
+        haks = [ifo["Mod_Hak"]]
+    expansions = ifo.get("Expansion_Pack", 0)
+    min_version = ifo.get("Mod_MinGameVer", "")
+    return {"title": str(ifo.get("Mod_Name", "")),
+            "description": str(ifo.get("Mod_Description", "")),
+            "haks": [h for h in haks if h],
+            "custom_tlk": ifo.get("Mod_CustomTlk", ""),
+            "requirements": {"OC": True, "Xp1": bool(expansions & 1), "Xp2": bool(expansions & 2)},
+            "min_game_version": min_version,
+            "compatibility": {"Diamond_edition": _version(min_version) <= DIAMOND_LAST_VERSION,
+                              "Enhanced_edition": True}}
+
+
+def module_info(path) -> dict:
+    u"""Metadata of a module read from module.ifo: title, description, haks, custom_tlk,
+        requirements (expansions), min_game_version and compatibility with Diamond and Enhanced Edition."""
+    with ErfFile(path) as erf:
+        return erf.module_info()
+
+
+def hak_contents(path) -> list:
+    u"""List of (resref, resource type) stored in a hakpack."""
+    with ErfFile(path) as erf:
+        return list(erf.resources)
+
+
+class _GffWriter:
+    def __init__(self):
+        self.structs, self.fields, self.labels = [], [], []
+        self.field_data, self.field_indices, self.list_indices = bytearray(), bytearray(), bytearray()
+
+    def label(self, name) -> int:
+        if name not in self.labels:
+            self.labels.append(name)
+        return self.labels.index(name)
+
+    def add_struct(self, fields: dict, struct_type=0xFFFFFFFF) -> int:
+        index = len(self.structs)
+        self.structs.append(None)
+        field_ids = [self.add_field(name, kind, value) for name, (kind, value) in fields.items()]
+        if len(field_ids) == 1:
+            data = field_ids[0]
+        else:
+            data = len(self.field_indices)
+            self.field_indices += struct.pack("<{}I".format(len(field_ids)), *field_ids)
+        self.structs[index] = (struct_type, data, len(field_ids))
+        return index
+
+    def add_field(self, name, kind, value) -> int:
+        index = len(self.fields)
+        self.fields.append(None)
+        if kind in _SIMPLE:
+            data = _U32.unpack(struct.pack(_SIMPLE[kind], value).ljust(4, b"\0"))[0]
+        else:
+            data = len(self.field_data)
+            if kind == CEXOSTRING:
+                encoded = value.encode(_ENCODING)
+                self.field_data += _U32.pack(len(encoded)) + encoded
+            elif kind == RESREF:
+                encoded = value.encode(_ENCODING)
+                self.field_data += bytes([len(encoded)]) + encoded
+            elif kind == CEXOLOCSTRING:
+                strings = b"".join(struct.pack("<2I", i, len(s.encode(_ENCODING))) + s.encode(_ENCODING)
+                                   for i, s in value.items())
+                self.field_data += struct.pack("<3I", 8 + len(strings), 0xFFFFFFFF, len(value)) + strings
+            elif kind == STRUCT:
+                data = self.add_struct(value)
+            elif kind == LIST:
+                indices = [self.add_struct(item) for item in value]
+                data = len(self.list_indices)
+                self.list_indices += struct.pack("<{}I".format(len(indices) + 1), len(indices), *indices)
+            else:
+                raise ValueError("Unsupported GFF field type: {}".format(kind))
+        self.fields[index] = (kind, self.label(name), data)
+        return index
+
+    def build(self, file_type=b"IFO ") -> bytes:
+        structs = b"".join(_GFF_STRUCT.pack(*s) for s in self.structs)
+        fields = b"".join(_GFF_FIELD.pack(*f) for f in self.fields)
+        labels = b"".join(n.encode(_ENCODING).ljust(16, b"\0") for n in self.labels)
+        offset = _GFF_HEADER.size
+        header = [file_type, b"V3.2"]
+        for block, count in ((structs, len(self.structs)), (fields, len(self.fields)), (labels, len(self.labels)),
+                             (self.field_data, len(self.field_data)), (self.field_indices, len(self.field_indices)),
+                             (self.list_indices, len(self.list_indices))):
+            header += [offset, count]
+            offset += len(block)
+        return _GFF_HEADER.pack(*header) + structs + fields + labels + bytes(self.field_data) + \
+            bytes(self.field_indices) + bytes(self.list_indices)
+
+
+def build_module_ifo(title, haks=(), expansions=0, min_game_version="1.69", custom_tlk="") -> bytes:
+    u"""Minimal module.ifo with fields read by module_info()."""
+    writer = _GffWriter()
+    writer.add_struct({"Mod_Name": (CEXOLOCSTRING, {0: title}),
+                       "Mod_HakList": (LIST, [{"Mod_Hak": (CEXOSTRING, hak)} for hak in haks]),
+                       "Mod_CustomTlk": (CEXOSTRING, custom_tlk),
+                       "Expansion_Pack": (WORD, expansions),
+                       "Mod_MinGameVer": (CEXOSTRING, min_game_version),
+                       "Mod_Entry_Area": (RESREF, "start")})
+    return writer.build()
+
+
+def write_erf(path, resources, file_type=b"MOD ", padding=0):
+    u"""Write an ERF file. Resources is a list of (resref, resource type, data),
+        padding adds a given number of zero bytes after resources (e.g. to simulate big files)."""
+    count = len(resources)
+    key_offset = _HEADER_SIZE
+    resource_offset = key_offset + count * _KEY.size
+    data_offset = resource_offset + count * _RESOURCE.size
+    keys, table, offset = bytearray(), bytearray(), data_offset
+    for i, (resref, res_type, data) in enumerate(resources):
+        keys += _KEY.pack(resref.encode(_ENCODING)[:16], i, res_type, 0)
+        table += _RESOURCE.pack(offset, len(data))
+        offset += len(data)
+    header = _HEADER.pack(file_type, b"V1.0", 0, 0, count, key_offset, key_offset, resource_offset, 124, 1,
+                          0xFFFFFFFF).ljust(_HEADER_SIZE, b"\0")
+    with open(path, "wb") as fo:
+        fo.write(header)
+        fo.write(keys)
+        fo.write(table)
+        for _, _, data in resources:
+            fo.write(data)
+        if padding:
+            fo.seek(padding - 1, 1)
+            fo.write(b"\0")
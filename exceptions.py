@@ -54,3 +54,28 @@ class CreateConfigFromStdStreamAbortedException(GeneralException):
     u"""Thrown by a function CreateConfigFromStdStream if user type exit."""
     def __init__(self):
         super(CreateConfigFromStdStreamAbortedException, self).__init__("Config not created.")
+
+
+class IncompleteDownloadException(GeneralException):
+    u"""Size of downloaded file does not match size announced by the vault."""
+    def __init__(self, url, size, expected_size):
+        super(IncompleteDownloadException, self).__init__(
+            "Downloaded {0} of {1} bytes from {2}".format(size, expected_size, url))
+
+
+class InvalidErfException(GeneralException):
+    u"""File is not a valid ERF container (.mod, .hak, .erf, .nwm)."""
+    def __init__(self, path):
+        super(InvalidErfException, self).__init__("Not a valid ERF file: {0}".format(path))
+
+
+class InvalidModuleFileException(GeneralException):
+    u"""File of modules (see modulefile) is corrupted or written by a newer version of the program."""
+    def __init__(self, path, reason):
+        super(InvalidModuleFileException, self).__init__("Invalid module file {0}: {1}".format(path, reason))
+
+
+class CancelledException(GeneralException):
+    u"""Work (e.g. a download) was cancelled by a user."""
+    def __init__(self, what=""):
+        super(CancelledException, self).__init__("Cancelled {0}".format(what).strip())
@@ -0,0 +1,181 @@
+"""
+    Selective extraction of module archives downloaded from neverwintervault.org.
+    Only files used by the game are extracted. Members of zip and rar archives are streamed straight to their
+    game subdirectory, game files of 7z archives are extracted by 7z executable in one pass inside the game
+    directory and moved into place.
+"""
+import logging
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import time
+import zipfile
+
+from exceptions import UnknownCompressionException
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Extension of a file: subdirectory of local game directory
+DESTINATIONS = {".mod": "modules",
+                ".hak": "hak",
+                ".bmu": "music",
+                ".bik": "movies",
+                ".tlk": "tlk"}
+
+_MAGIC = {b"PK\x03\x04": "zip",
+          b"Rar!\x1a\x07": "rar",
+          b"7z\xbc\xaf\x27\x1c": "7z"}
+
+
+class ExtractionReport:
+    u"""Files extracted from an archive: list of paths, number of bytes and time of extraction."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.files = []
+        self.skipped = []
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return "ExtractionReport({0}: {1} files, {2} skipped, {3} bytes, {4:.1f} MB/s)".format(
+            self.archive, len(self.files), len(self.skipped), self.bytes, self.bytes_per_second / 1024 / 1024)
+
+
+def destination(member_name: str, directory) -> pathlib.Path:
+    u"""Path in the game directory for a member of an archive, None if the game does not need the file."""
+    name = pathlib.PurePosixPath(member_name.replace("\\", "/")).name
+    subdirectory = DESTINATIONS.get(pathlib.PurePosixPath(name).suffix.lower())
+    if not name or subdirectory is None:
+        return None
+    return pathlib.Path(directory).joinpath(subdirectory, name)
+
+
+def detect_compression(path, compression=None) -> str:
+    u"""Type of an archive: 'zip', 'rar' or '7z', by compression reported by the vault or by magic bytes."""
+    if compression:
+        for kind in ("7z", "zip", "rar"):
+            if kind in compression:
+                return kind
+    with open(path, "rb") as fi:
+        head = fi.read(8)
+    for magic, kind in _MAGIC.items():
+        if head.startswith(magic):
+            return kind
+    raise UnknownCompressionException
+
+
+def _write(source, target: pathlib.Path) -> int:
+    u"""Stream file object to target through a temporary file in the same directory."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".part")
+    size = 0
+    with open(tmp, "wb") as fo:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            fo.write(chunk)
+            size += len(chunk)
+    os.replace(tmp, target)
+    return size
+
+
+class _Staged:
+    u"""Member already extracted to a temporary directory on the file system of the game directory,
+        it is moved into place instead of being written again."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def move(self, target: pathlib.Path) -> int:
+        size = self.path.stat().st_size
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(self.path, target)
+        except OSError:  # a subdirectory on another file system
+            with open(self.path, "rb") as source:
+                _write(source, target)
+        return size
+
+
+def _members_zip(path, directory):
+    with zipfile.ZipFile(path, "r") as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield info.filename, lambda info=info: archive.open(info, "r")
+
+
+def _members_rar(path, directory):
+    import rarfile
+    with rarfile.RarFile(str(path)) as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield info.filename, lambda info=info: archive.open(info, "r")
+
+
+def _members_7z(path, directory):
+    u"""Members of a 7z archive. Game files are extracted by a single run of 7z executable to a temporary
+        directory inside the game directory and moved into place from there, so a solid archive is
+        decompressed only once and no byte is written twice.
+        Names are passed in a list file with wildcards disabled (-spd), a name is never taken for a pattern."""
+    executable = shutil.which("7z") or shutil.which("7za") or shutil.which("7zr")
+    if executable is None:
+        logger.error("7z executable not found, could not decompress the file.")
+        raise UnknownCompressionException
+    listing = subprocess.run([executable, "l", "-slt", "-ba", str(path)], check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True).stdout
+    names, name = [], None
+    for line in listing.splitlines() + [""]:
+        if line.startswith("Path = "):
+            name = line[len("Path = "):]
+        elif line.startswith("Attributes = ") and name is not None:
+            if not line[len("Attributes = "):].startswith("D"):
+                names.append(name)
+            name = None
+    wanted = [name for name in names if destination(name, directory) is not None]
+    pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".extract-", dir=str(directory)) as tmp:
+        output = pathlib.Path(tmp).joinpath("out")
+        if wanted:
+            listfile = pathlib.Path(tmp).joinpath("members.txt")
+            listfile.write_text("\n".join(wanted) + "\n", encoding="utf-8")
+            subprocess.run([executable, "x", "-y", "-spd", "-scsUTF-8", "-o" + str(output), str(path),
+                            "@" + str(listfile)], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for name in names:
+            yield name, lambda name=name: _Staged(output.joinpath(name))
+
+
+_READERS = {"zip": _members_zip, "rar": _members_rar, "7z": _members_7z}
+
+
+def extract(archive, directory, compression=None) -> ExtractionReport:
+    u"""Extract game files (see DESTINATIONS) from archive to subdirectories of directory,
+        usually local directory of the game. Other members (readme, screenshots) are skipped.
+        :compression - str, type of compression reported by the vault, detected from the file if None."""
+    kind = detect_compression(archive, compression)
+    report = ExtractionReport(archive)
+    start = time.monotonic()
+    for name, opener in _READERS[kind](archive, directory):
+        target = destination(name, directory)
+        if target is None:
+            report.skipped.append(name)
+            continue
+        with opener() as source:
+            report.bytes += source.move(target) if isinstance(source, _Staged) else _write(source, target)
+        report.files.append(target)
+        logger.debug("Extracted {} to {}.".format(name, target))
+    report.seconds = time.monotonic() - start
+    logger.info(repr(report))
+    return report
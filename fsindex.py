@@ -0,0 +1,132 @@
+"""
+    Persistent index of game directories.
+    Listing of every scanned directory is stored together with its mtime, a directory is read again
+    only when its mtime has changed, so listing a large (or network mounted) library costs one stat
+    per directory instead of a scan.
+"""
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "fs_index.json"
+_VERSION = 1
+# Directory modified so recently could change again within resolution of its mtime, do not trust the listing
+_RACY_SECONDS = 2.0
+
+Entry = namedtuple("Entry", ("name", "path", "is_dir", "size", "mtime_ns"))
+
+
+def default_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_FILE_NAME)
+
+
+class DirectoryIndex:
+    u"""Cached listings of directories, invalidated by mtime of a directory.
+        Note: a file rewritten in place does not change mtime of its directory, its size is refreshed
+        when anything else in the directory changes."""
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path) if path else default_path()
+        self.hits = 0
+        self.misses = 0
+        self._directories = {}  # path: (mtime_ns, scanned_at, [[name, is_dir, size, mtime_ns], ...])
+        self._changed = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fi:
+                data = json.load(fi)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.error("Corrupted directory index, starting with an empty one: {}".format(self.path))
+            return
+        if data.get("version") == _VERSION:
+            self._directories = data["directories"]
+        logger.debug("Loaded index of {} directories from {}.".format(len(self._directories), self.path))
+
+    def save(self):
+        u"""Write the index to disk, if anything has changed."""
+        with self._lock:
+            if not self._changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fo:
+                json.dump({"version": _VERSION, "directories": self._directories}, fo)
+            os.replace(tmp, self.path)
+            self._changed = False
+
+    def __contains__(self, directory):
+        return str(directory) in self._directories
+
+    def _read(self, directory: str) -> list:
+        entries = []
+        with os.scandir(directory) as it:
+            for d in it:
+                try:
+                    is_dir = d.is_dir()  # d_type from the directory listing, no stat call
+                    if is_dir:
+                        entries.append([d.name, True, 0, 0])
+                    else:
+                        st = d.stat()
+                        entries.append([d.name, False, st.st_size, st.st_mtime_ns])
+                except OSError as excep:
+                    logger.debug("Skipping {}: {}".format(d.path, excep))
+        return entries
+
+    def scan(self, directory) -> list:
+        u"""List of entries of a directory, read from disk only if the directory has changed."""
+        key = str(directory)
+        mtime_ns = os.stat(key).st_mtime_ns
+        cached = self._directories.get(key)
+        if cached is not None and cached[0] == mtime_ns and cached[1] - mtime_ns / 1e9 > _RACY_SECONDS:
+            self.hits += 1
+            entries = cached[2]
+        else:
+            self.misses += 1
+            scanned_at = time.time()
+            entries = self._read(key)
+            with self._lock:
+                self._directories[key] = [mtime_ns, scanned_at, entries]
+                self._changed = True
+        return [Entry(name, os.path.join(key, name), is_dir, size, mtime) for name, is_dir, size, mtime in entries]
+
+    def walk(self, directory):
+        u"""Yield (directory, entries) for a directory and all its subdirectories."""
+        stack = [str(directory)]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = self.scan(current)
+            except OSError as excep:
+                logger.debug("Could not scan {}: {}".format(current, excep))
+                continue
+            yield current, entries
+            stack.extend(e.path for e in entries if e.is_dir)
+
+    def forget(self, directory):
+        u"""Remove a directory from the index, it will be read from disk on the next scan."""
+        with self._lock:
+            if self._directories.pop(str(directory), None) is not None:
+                self._changed = True
+
+
+_shared = None
+
+
+def shared() -> DirectoryIndex:
+    u"""Index used by mainLib.NWN, stored in program's main directory."""
+    global _shared
+    if _shared is None:
+        _shared = DirectoryIndex()
+    return _shared
@@ -0,0 +1,204 @@
+"""
+    Background workers of the GUI: discovery of modules on disk, scraping of the vault and downloads
+    run on QThreadPool, so the Qt event thread only receives results through signals.
+    Results are sent in batches and progress is throttled (see Worker.interval), so the event thread
+    handles a few signals per frame however fast the work goes. Cancellation is cooperative: a worker
+    checks its flag between items (files, pages, downloaded chunks).
+"""
+import logging
+import threading
+import time
+
+from PySide2.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from exceptions import CancelledException
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500  # items of a single result signal
+INTERVAL = 0.05  # seconds between progress or result signals of a worker
+
+
+class WorkerSignals(QObject):
+    u"""Signals of a worker. QRunnable is not a QObject, so it cannot have signals of its own.
+        :progress - (done, total), total is 0 if it is not known,
+        :result - list of new items (modules, scrapped pages) or a result of the whole work (download),
+        :error - message of an exception which stopped the work,
+        :finished - emitted last, whether the work has succeeded, failed or was cancelled."""
+    started = Signal()
+    progress = Signal(object, object)  # sizes of downloads do not fit in a C int
+    result = Signal(object)
+    error = Signal(str)
+    cancelled = Signal()
+    finished = Signal()
+
+
+class Worker(QRunnable):
+    u"""Base of workers, subclasses implement work()."""
+    interval = INTERVAL
+    batch_size = BATCH_SIZE
+
+    def __init__(self):
+        super(Worker, self).__init__()
+        self.setAutoDelete(False)  # the owner keeps it to cancel it and to read its state
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+        self._batch = []
+        self._last_emit = 0.0
+        self.done = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        u"""Raise CancelledException if the worker was cancelled, called by work() between items."""
+        if self._cancelled.is_set():
+            raise CancelledException(type(self).__name__)
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_emit >= self.interval:
+            self._last_emit = now
+            return True
+        return False
+
+    def add(self, items):
+        u"""Queue new items, they are emitted in batches at most every interval seconds."""
+        self._batch.extend(items)
+        if len(self._batch) >= self.batch_size or self._due():
+            self.flush()
+
+    def flush(self):
+        while self._batch:
+            batch, self._batch = self._batch[:self.batch_size], self._batch[self.batch_size:]
+            self.signals.result.emit(batch)
+
+    def report(self, done, total=0, force=False):
+        if force or self._due():
+            self.signals.progress.emit(done, total or 0)
+
+    def work(self):
+        raise NotImplementedError
+
+    def run(self):
+        self.signals.started.emit()
+        try:
+            self.work()
+            self.flush()
+        except CancelledException:
+            self.flush()
+            self.signals.cancelled.emit()
+        except Exception as excep:  # reported to the window, a worker must not take the pool down
+            logger.error("{} failed: {}".format(type(self).__name__, excep))
+            self.signals.error.emit("{}: {}".format(type(excep).__name__, excep))
+        finally:
+            self.signals.finished.emit()
+            self.done.set()  # after the signals are queued, so a thread seeing it can process all of them
+
+
+class DiscoveryWorker(Worker):
+    u"""Find modules in game directories (see discovery.Discovery), emit lists of mainLib.ModuleInDir.
+        Progress is (modules found, 0)."""
+
+    def __init__(self, roots=None, index=None):
+        super(DiscoveryWorker, self).__init__()
+        self.roots = roots
+        self.index = index
+        self.found = 0
+
+    def work(self):
+        from discovery import Discovery
+        # One scanning thread: every other Python thread holding the GIL delays the event thread by a switch interval
+        for module in Discovery(self.roots, index=self.index, workers=1).modules():
+            self.check()
+            self.found += 1
+            self.add((module,))
+            self.report(self.found)
+        self.report(self.found, self.found, force=True)
+
+
+class ScrapWorker(Worker):
+    u"""Scrap module pages concurrently (see crawler.Crawler), emit lists of parsed pages.
+        :links - urls of module pages, by default all modules listed on the vault."""
+
+    def __init__(self, links=None, workers=8):
+        super(ScrapWorker, self).__init__()
+        self.links = links
+        self.workers = workers
+        self.failed = {}
+
+    def work(self):
+        import scrapper
+        from crawler import Crawler
+        with Crawler(workers=self.workers) as crawler:
+            links = self.links
+            if links is None:
+                links = scrapper.create_list_of_links(crawler.session(scrapper.website_2.www()))
+            self.check()
+            for done, page in enumerate(crawler.crawl(links), 1):
+                self.add((page,))
+                self.report(done, len(links))
+                self.check()
+            self.failed = crawler.failed
+        self.report(len(links), len(links), force=True)
+
+
+class DownloadWorker(Worker):
+    u"""Download a module and extract it, see mainLib.NWN.download_module_from_vault.
+        Emits the scrapper.ScrappedModule as a result, progress is (downloaded bytes, size).
+        A cancelled download keeps its partial file and is resumed by the next download of the module."""
+
+    def __init__(self, www, name):
+        super(DownloadWorker, self).__init__()
+        self.www = www
+        self.name = name
+
+    def _progress(self, done, total):
+        self.check()
+        self.report(done, total, force=done == total)
+
+    def work(self):
+        from mainLib import NWN
+        module = NWN.download_module_from_vault(self.www, self.name, progress=self._progress)
+        self.signals.result.emit(module)
+
+
+class CatalogWorker(Worker):
+    u"""Read the vault catalog (see moduletable.CatalogRows), emit CatalogRows ready to be sorted and filtered.
+        :path - catalog file, by default catalog.default_path()."""
+
+    def __init__(self, path=None):
+        super(CatalogWorker, self).__init__()
+        self.path = path
+
+    def work(self):
+        from moduletable import CatalogRows
+        rows = CatalogRows.load(self.path)
+        self.check()
+        rows.prepare()
+        self.signals.result.emit(rows)
+
+
+class Workers:
+    u"""Workers of a window running on a thread pool, cancelled together when the window is closed."""
+
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else QThreadPool.globalInstance()
+        self.running = []
+
+    def start(self, worker: Worker) -> Worker:
+        self.running.append(worker)
+        worker.signals.finished.connect(lambda: self.running.remove(worker))
+        self.pool.start(worker)
+        return worker
+
+    def cancel(self):
+        for worker in list(self.running):
+            worker.cancel()
+
+    def wait(self, timeout=-1) -> bool:
+        return self.pool.waitForDone(timeout)
@@ -0,0 +1,263 @@
+"""
+    Dependency graph of modules and hakpacks.
+    Forward index (module: haks it needs) is read from module.ifo of every module and persisted, reverse
+    index (hak: modules using it) and sets of missing and orphaned haks are kept up to date on every change,
+    so queries do not rescan anything. Modules are read again only when their size or mtime has changed.
+"""
+import json
+import logging
+import os
+import pathlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "hak_graph.json"
+_VERSION = 1
+
+
+def default_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_FILE_NAME)
+
+
+def hak_name(name) -> str:
+    u"""Name of a hak as used in module.ifo: resref without extension, case insensitive."""
+    name = os.path.basename(str(name))
+    if name.lower().endswith(".hak"):
+        name = name[:-4]
+    return name.lower()
+
+
+class HakGraph:
+    u"""Modules, the hakpacks they need and hakpacks available on disk.
+        Modules are identified by path, hakpacks by hak_name()."""
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path) if path else default_path()
+        self._modules = {}  # module path: [size, mtime_ns, [hak names in load order]]
+        self._available = {}  # hak name: path
+        self._reverse = {}  # hak name: set of module paths
+        self._missing = set()  # needed by a module and not available
+        self._orphaned = set()  # available and not needed by any module
+        self._changed = False
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fi:
+                data = json.load(fi)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.error("Corrupted hak graph, starting with an empty one: {}".format(self.path))
+            return
+        if data.get("version") != _VERSION:
+            return
+        for name, path in data["haks"].items():
+            self._add_hak(name, path)
+        for path, (size, mtime_ns, haks) in data["modules"].items():
+            self._set_module(path, size, mtime_ns, haks)
+        self._changed = False
+        logger.debug("Loaded graph of {} modules and {} haks from {}.".format(len(self._modules),
+                                                                              len(self._available), self.path))
+
+    def save(self):
+        u"""Write the graph to disk, if anything has changed."""
+        with self._lock:
+            if not self._changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fo:
+                json.dump({"version": _VERSION, "modules": self._modules, "haks": self._available}, fo)
+            os.replace(tmp, self.path)
+            self._changed = False
+
+    # Edges and vertices, every change keeps the reverse index, missing and orphaned haks consistent
+
+    def _add_edge(self, module, hak):
+        users = self._reverse.setdefault(hak, set())
+        if not users:
+            self._orphaned.discard(hak)
+            if hak not in self._available:
+                self._missing.add(hak)
+        users.add(module)
+
+    def _remove_edge(self, module, hak):
+        users = self._reverse.get(hak)
+        if users is None:
+            return
+        users.discard(module)
+        if not users:
+            del self._reverse[hak]
+            self._missing.discard(hak)
+            if hak in self._available:
+                self._orphaned.add(hak)
+
+    def _add_hak(self, name, path):
+        self._available[name] = str(path)
+        self._missing.discard(name)
+        if not self._reverse.get(name):
+            self._orphaned.add(name)
+        self._changed = True
+
+    def _remove_hak(self, name):
+        if self._available.pop(name, None) is None:
+            return
+        self._orphaned.discard(name)
+        if self._reverse.get(name):
+            self._missing.add(name)
+        self._changed = True
+
+    def _set_module(self, path, size, mtime_ns, haks):
+        old = self._modules.get(path)
+        for hak in (old[2] if old else ()):
+            self._remove_edge(path, hak)
+        haks = list(dict.fromkeys(hak_name(h) for h in haks))
+        self._modules[path] = [size, mtime_ns, haks]
+        for hak in haks:
+            self._add_edge(path, hak)
+        self._changed = True
+
+    # Updates
+
+    def update_module(self, path, size=None, mtime_ns=None) -> bool:
+        u"""Read haks of a module, if it is new or its size or mtime has changed. Return True if read."""
+        path = str(path)
+        if size is None or mtime_ns is None:
+            st = os.stat(path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        with self._lock:
+            known = self._modules.get(path)
+            if known is not None and known[0] == size and known[1] == mtime_ns:
+                return False
+        import erf
+        from exceptions import InvalidErfException
+        try:
+            haks = erf.module_info(path)["haks"]
+        except (InvalidErfException, OSError) as excep:
+            logger.warning("Could not read haks of {}: {}".format(path, excep))
+            haks = []
+        with self._lock:
+            self._set_module(path, size, mtime_ns, haks)
+        return True
+
+    def remove_module(self, path):
+        path = str(path)
+        with self._lock:
+            old = self._modules.pop(path, None)
+            if old is None:
+                return
+            for hak in old[2]:
+                self._remove_edge(path, hak)
+            self._changed = True
+
+    def add_hak(self, path):
+        with self._lock:
+            self._add_hak(hak_name(path), path)
+
+    def remove_hak(self, name):
+        with self._lock:
+            self._remove_hak(hak_name(name))
+
+    def update(self, files) -> int:
+        u"""Synchronize the graph with all files found on disk.
+            :files - iterable of discovery.Found (or anything with path, file_type, size and mtime_ns),
+                modules and hakpacks not listed any more are removed.
+            Return number of modules read."""
+        from mainLib import File
+        modules, haks = {}, {}
+        for f in files:
+            if f.file_type == File.FileType.module:
+                modules[str(f.path)] = f
+            elif f.file_type == File.FileType.hakpack:
+                haks.setdefault(hak_name(f.path), str(f.path))
+        read = 0
+        for path, f in modules.items():
+            read += self.update_module(path, f.size, f.mtime_ns)
+        with self._lock:
+            for path in [p for p in self._modules if p not in modules]:
+                self.remove_module(path)
+            for name in [n for n in self._available if n not in haks]:
+                self._remove_hak(name)
+            for name, path in haks.items():
+                if self._available.get(name) != path:
+                    self._add_hak(name, path)
+        logger.info("Hak graph: {} modules ({} read), {} haks.".format(len(self._modules), read, len(haks)))
+        return read
+
+    def apply(self, files, removed=()) -> int:
+        u"""Apply changes of some files, e.g. of directories reported by watcher.Watcher.
+            :files - discovery.Found of new or changed modules and hakpacks,
+            :removed - paths of modules and hakpacks which do not exist any more.
+            Return number of modules read."""
+        from mainLib import File
+        with self._lock:
+            for path in removed:
+                path = str(path)
+                self.remove_module(path)
+                if self._available.get(hak_name(path)) == path:
+                    self._remove_hak(hak_name(path))
+        read = 0
+        for f in files:
+            if f.file_type == File.FileType.module:
+                read += self.update_module(f.path, f.size, f.mtime_ns)
+            elif f.file_type == File.FileType.hakpack and hak_name(f.path) not in self._available:
+                self.add_hak(f.path)
+        return read
+
+    # Queries
+
+    def __len__(self):
+        return len(self._modules)
+
+    def __contains__(self, module):
+        return str(module) in self._modules
+
+    def haks_of(self, module) -> list:
+        u"""Haks needed by a module, in load order."""
+        known = self._modules.get(str(module))
+        return list(known[2]) if known else []
+
+    def modules_using(self, hak) -> set:
+        u"""Modules which need a hak."""
+        return set(self._reverse.get(hak_name(hak), ()))
+
+    def hak_path(self, hak):
+        return self._available.get(hak_name(hak))
+
+    def missing(self) -> dict:
+        u"""Haks needed and not available: hak name: set of modules which need it."""
+        return {hak: set(self._reverse[hak]) for hak in self._missing}
+
+    def orphaned(self) -> dict:
+        u"""Haks available and not needed by any module: hak name: path."""
+        return {hak: self._available[hak] for hak in self._orphaned}
+
+    def closure(self, module) -> list:
+        u"""Everything a module needs to be played: list of (hak name, path or None if missing), in load order."""
+        return [(hak, self._available.get(hak)) for hak in self.haks_of(module)]
+
+    def is_playable(self, module) -> bool:
+        return all(hak in self._available for hak in self.haks_of(module))
+
+
+def refresh(graph=None, discovery=None) -> HakGraph:
+    u"""Update a graph (stored in program's main directory by default) with modules and haks from all
+        game directories and the hak directory of current configuration."""
+    import Config
+    import discovery as discovery_module
+    from mainLib import File
+    graph = graph if graph is not None else HakGraph()
+    discovery = discovery if discovery is not None else discovery_module.Discovery()
+    files = list(discovery.run().values())
+    hak_directory = str(Config.config.config.game_config.hak)
+    if os.path.isdir(hak_directory):
+        for _, entries in discovery.index.walk(hak_directory):
+            files.extend(discovery_module.Found(hak_directory, e.path, File.FileType.hakpack, e.size, e.mtime_ns)
+                         for e in entries if not e.is_dir and e.name.lower().endswith(".hak"))
+    graph.update(files)
+    graph.save()
+    return graph
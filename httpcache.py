@@ -0,0 +1,239 @@
+"""
+    Persistent cache of pages downloaded from neverwintervault.org.
+    Entries are keyed by url, revalidated with ETag / Last-Modified and evicted in LRU order
+    when total size of stored pages exceeds the limit.
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+
+import scrapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY_NAME = "http_cache"
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+_INDEX_FILE_NAME = "index.json"
+_FLUSH_EVERY = 100  # changes of the index between writes to disk
+
+
+def default_directory() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_DIRECTORY_NAME)
+
+
+class CachedResponse:
+    u"""Response returned by a ResponseCache. Body of a page which was parsed before is read from disk
+        only when text is needed, see ResponseCache.get."""
+
+    def __init__(self, url, path, entry, from_cache, text=None):
+        self.url = url
+        self.status_code = 200
+        self.from_cache = from_cache
+        self._path = path
+        self._entry = entry
+        self._text = text
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._path.read_text(encoding="utf-8")
+        return self._text
+
+    @property
+    def parsed(self):
+        u"""Result of parsing stored together with the page, None if page was not parsed yet."""
+        return self._entry.get("parsed")
+
+    def raise_for_status(self):
+        pass
+
+
+class ResponseCache:
+    u"""On-disk cache of http responses.
+        :directory - path, where cached pages are stored, by default inside program's main directory,
+        :max_size - int, maximum number of bytes of all cached pages."""
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = pathlib.Path(directory) if directory else default_directory()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.RLock()
+        self._changes = 0
+        self._size = 0
+        self._entries = OrderedDict()  # key: entry, least recently used first
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._remove_orphans()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+        return False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return self._key(url) in self._entries
+
+    @staticmethod
+    def _key(url) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _body(self, key) -> pathlib.Path:
+        return self.directory.joinpath(key + ".html")
+
+    def _load(self):
+        index = self.directory.joinpath(_INDEX_FILE_NAME)
+        try:
+            with open(index, "r", encoding="utf-8") as fi:
+                entries = json.load(fi)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.error("Corrupted index of http cache, starting with an empty one: {}".format(index))
+            return
+        for key, entry in entries:
+            if self._body(key).exists():
+                self._entries[key] = entry
+                self._size += entry["size"]
+        logger.debug("Loaded {} cached pages from {}.".format(len(self._entries), self.directory))
+
+    def _remove_orphans(self):
+        u"""Remove pages missing from the index (e.g. stored after its last write), urls of them are not known,
+            so they could not be revalidated nor counted in size of the cache."""
+        removed = 0
+        for path in self.directory.iterdir():
+            if path.suffix in (".html", ".tmp") and path.stem not in self._entries:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError as excep:
+                    logger.warning("Could not remove {}: {}".format(path, excep))
+        if removed:
+            logger.info("Removed {} pages missing from index of http cache {}.".format(removed, self.directory))
+
+    def flush(self):
+        u"""Write index of the cache to disk."""
+        with self._lock:
+            index = self.directory.joinpath(_INDEX_FILE_NAME)
+            tmp = index.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fi:
+                json.dump(list(self._entries.items()), fi)
+            os.replace(tmp, index)
+            self._changes = 0
+
+    def _changed(self):
+        self._changes += 1
+        if self._changes >= _FLUSH_EVERY:
+            self.flush()
+
+    def _evict(self):
+        while self._size > self.max_size and self._entries:
+            key, entry = self._entries.popitem(last=False)
+            self._size -= entry["size"]
+            self.evictions += 1
+            try:
+                self._body(key).unlink()
+            except FileNotFoundError:
+                pass
+            logger.debug("Evicted from http cache: {}".format(entry["url"]))
+
+    def _store(self, url, response) -> dict:
+        key = self._key(url)
+        body = response.text.encode("utf-8")
+        tmp = self._body(key).with_suffix(".tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, self._body(key))
+
+        entry = {"url": url,
+                 "etag": response.headers.get("ETag"),
+                 "last_modified": response.headers.get("Last-Modified"),
+                 "size": len(body)}
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._size -= old["size"]
+            self._entries[key] = entry
+            self._size += entry["size"]
+            self._evict()
+            self._changed()
+        return entry
+
+    def get(self, url, session=None, **kwargs) -> CachedResponse:
+        u"""Get a page, revalidated against the server if it is stored in the cache."""
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = scrapper.fetch(url, session, headers=headers, **kwargs)
+
+        if entry and response.status_code == 304:
+            text = None
+            with self._lock:
+                stored = self._entries.get(key)
+                if stored is not None and stored.get("parsed") is None:
+                    # The page will be parsed: read it now, an eviction cannot remove it under the lock
+                    try:
+                        text = self._body(key).read_text(encoding="utf-8")
+                    except FileNotFoundError:
+                        self._size -= stored["size"]
+                        del self._entries[key]
+                        self._changed()
+                        stored = None
+                if stored is not None:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+            if stored is not None:
+                logger.debug("Not modified, using cached page: {}".format(url))
+                return CachedResponse(url, self._body(key), stored, from_cache=True, text=text)
+            logger.debug("Page was evicted while it was revalidated, fetching it again: {}".format(url))
+            headers.pop("If-None-Match", None)
+            headers.pop("If-Modified-Since", None)
+            response = scrapper.fetch(url, session, headers=headers, **kwargs)
+
+        with self._lock:
+            self.misses += 1
+        response.raise_for_status()
+        entry = self._store(url, response)
+        return CachedResponse(url, self._body(key), entry, from_cache=False, text=response.text)
+
+    def store_parsed(self, url, parsed: dict):
+        u"""Store result of parsing a page, so unchanged pages do not need to be parsed again."""
+        with self._lock:
+            entry = self._entries.get(self._key(url))
+            if entry is not None:
+                entry["parsed"] = parsed
+                self._changed()
+
+    def clear(self):
+        with self._lock:
+            for key in self._entries:
+                try:
+                    self._body(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+            self._size = 0
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "size": self._size, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
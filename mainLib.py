@@ -6,19 +6,19 @@ import pathlib
 import os
 from typing import List, Any
 import re
+import sys
 from exceptions import UnknownVersionException
-import pickle
 import logging
-import scrapper
-import zipfile
 import cmd
+import fsindex
+import registry
+from registry import ModuleRegistry
 
-from session import Session
+from session import Session, register
 import Config
 
 
 logger = logging.getLogger(__name__)
-session = Session()
 
 
 class GlobalNameSpace:
@@ -48,21 +48,24 @@ class NWN:
     u"""Class recognizing type of the game."""
     _instances: List[Any] = []
 
-    @session.register
-    def __init__(self, cfg=None):
+    @register
+    def __init__(self, cfg=None, index=None):
         if cfg is None:
             cfg = Config.config.config
         self.directory_install = cfg.game_config.path
         self.directory_local = cfg.game_config.path_to_local_vault
 
-        self.directories = list(d for d in os.scandir(self.directory_install) if pathlib.Path(d).is_dir())
-        self.files = list(d for d in os.scandir(self.directory_install) if pathlib.Path(d).is_file())
+        index = index if index is not None else fsindex.shared()
+        entries = index.scan(self.directory_install)
+        self.directories = [e for e in entries if e.is_dir]
+        self.files = [e for e in entries if not e.is_dir]
 
-        self._saved_modules_bin = pathlib.Path(".")  # for serialization with pickle
-        self._modules = {"local": self.find_modules(self.directory_local),
-                         "install": [self.find_modules(self.directory_install)]}
+        self._saved_modules_bin = pathlib.Path(".")  # for serialization, see modulefile
+        self._modules = {"local": self.find_modules(self.directory_local, index),
+                         "install": self.find_modules(self.directory_install, index)}
+        index.save()
 
-        self.modules = list(self._modules["local"] + self._modules["install"])
+        self.modules = ModuleRegistry(self._modules["local"] + self._modules["install"])
         NWN._instances.append(self)
 
     @staticmethod
@@ -70,15 +73,18 @@ class NWN:
         return NWN._instances
 
     @classmethod
-    def find_modules(cls, directory):
+    def find_modules(cls, directory, index=None):
+        u"""Find modules in 'modules' subdirectory, listings are taken from index (fsindex.DirectoryIndex)
+            and read from disk only for directories which have changed."""
+        index = index if index is not None else fsindex.shared()
         results = []
         iterator = []
-        for d in os.scandir(directory):
-            if d.name == "modules":  # Standard for all NWN versions!
-                iterator = os.scandir(pathlib.Path.joinpath(directory, pathlib.Path("modules")))
+        for d in index.scan(directory):
+            if d.name == "modules" and d.is_dir:  # Standard for all NWN versions!
+                iterator = index.scan(d.path)
         for m in iterator:
             if str(m.name).endswith(".mod"):
-                module = ModuleInDir(m)
+                module = ModuleInDir(m.path)
                 module.name = "".join(n[0] for n in m.name.split())
                 module.title = m.name.replace(".mod", "")
                 module.path = m.path
@@ -87,54 +93,80 @@ class NWN:
 
         return results
 
+    def refresh(self, directories=(), index=None) -> tuple:
+        u"""Apply changes of directories (e.g. reported by watcher.Watcher) to modules of this instance.
+            Only directories which have changed are read again. Return (added, removed) modules."""
+        index = index if index is not None else fsindex.shared()
+        for directory in directories:
+            index.forget(directory)
+        added, removed = [], []
+        for key, directory in (("local", self.directory_local), ("install", self.directory_install)):
+            old = {str(m.path): m for m in self._modules[key]}
+            new = {str(m.path): m for m in self.find_modules(directory, index)}
+            for path in old.keys() - new.keys():
+                module = old[path]
+                if self.modules.get(module.title, module.version) is module:
+                    self.modules.remove(module)
+                removed.append(module)
+            for path in new.keys() - old.keys():
+                if self.modules.add(new[path]):
+                    added.append(new[path])
+            self._modules[key] = [old.get(path, module) for path, module in new.items()]
+        # A removed module may still have a copy in the other directory, register it instead
+        remaining = {}
+        for module in self._modules["local"] + self._modules["install"]:
+            remaining.setdefault(registry.key(module), module)
+        for module in removed:
+            copy = remaining.get(registry.key(module))
+            if copy is not None and self.modules.add(copy):
+                added.append(copy)
+        index.save()
+        return added, removed
+
     def save_module(self, module):
-        self.modules.append(module)
+        u"""Register a module, replacing an equal one (same title and version)."""
+        self.modules.put(module)
 
-    def save_module_unique(self, module):
-        if all([module.__ne__(x) for x in self.modules]):
-            self.modules.append(module)
+    def save_module_unique(self, module) -> bool:
+        u"""Register a module unless an equal one is registered. Return True if registered."""
+        return self.modules.add(module)
 
     def save_modules_list_to_file(self, filename):
-        pickle.dumps(self.modules, filename)
+        u"""Store modules in a file, see modulefile."""
+        import modulefile
+        modulefile.write(filename, self.modules)
 
     def load_modules_list(self, filename):
-        self.modules = pickle.load(filename)
+        import modulefile
+        with modulefile.ModuleFile(filename) as f:
+            self.modules = ModuleRegistry(f)
 
     def show_modules(self):
-        return self.modules
+        return list(self.modules)
 
     @staticmethod
-    def download_module_from_vault(www: str, name: str) -> scrapper.ScrappedModule:
-        module = scrapper.download_module_from_website(www)
-        cfg = Config.config
-        path = cfg.program_config.main_directory + "/" + name
-        output_path = cfg.program_config.modules
+    def download_module_from_vault(www: str, name: str, progress=None) -> "scrapper.ScrappedModule":
+        u"""Download a module and extract its game files to the local game directory.
+            The archive is kept in program's main directory under a given name.
+            :progress - callable(downloaded bytes, expected size), see downloader.download."""
+        import extractor
+        import scrapper
+        module = scrapper.download_module_from_website(www, progress=progress)
+        cfg = Config.config.config
+        path = pathlib.Path(cfg.program_config.main_directory).joinpath(name)
+        output_path = cfg.game_config.path_to_local_vault
         module.save_file(path)
 
-        # detect type of compression
-        import re
-        comp = module.compression
-        if re.search("7z", comp):
-            from pyunpack import Archive
-            Archive(path).extractall(output_path)
-        elif re.search("zip", comp):
-            with zipfile.ZipFile(path, "r") as file:
-                file.extractall(output_path)
-        elif re.search("rar", comp):
-            import rarfile
-            with rarfile.RarFile(path) as rf:
-                rf.extractall(output_path)
-        else:
-            logger.error("Could NOT decompress the file!")
-            from exceptions import UnknownCompressionException
-            raise UnknownCompressionException
-
+        module.extraction = extractor.extract(path, output_path, compression=module.compression)
         logger.info("Successfully decompressed file.")
         return module
 
     @staticmethod
-    def create_module_from_scrapper_data(module_data: scrapper.ScrappedModule):
-        path = pathlib.Path(Config.config.program_config.modules).joinpath(module_data.name)
+    def create_module_from_scrapper_data(module_data: "scrapper.ScrappedModule"):
+        path = pathlib.Path(Config.config.config.game_config.modules_directory).joinpath(module_data.name)
+        extraction = getattr(module_data, "extraction", None)
+        if extraction is not None:
+            path = next((f for f in extraction.files if f.suffix.lower() == ".mod"), path)
         m = ModuleInDir(path)
         m.name = module_data.kwargs["kwargs"]["title"]
         m.title = m.name
@@ -180,17 +212,46 @@ class File:
 
 
 class Person:
+    __slots__ = ("name", "surname")
 
     def __init__(self, name, surname=""):
-        self.name = name
-        self.surname = surname
+        self.name = sys.intern(name) if isinstance(name, str) else name
+        self.surname = sys.intern(surname) if isinstance(surname, str) else surname
 
     def __repr__(self):
-        print(self.name + " " + self.surname)
+        return self.name + " " + self.surname
+
+
+# Defaults shared by all modules. They are never handed out: a module gets its own copy when the attribute
+# is first read, so a change of one module cannot leak to others
+_DEFAULT_COMPATIBILITY = {"Diamond_edition": True, "Enhanced_edition": False}
+_DEFAULT_REQUIREMENTS = {"OC": True, "Xp1": True, "Xp2": True}
+_DEFAULT_DEPENDENCIES = {File.FileType.hakpack: [], File.FileType.movie: [], File.FileType.music: []}
+_DEFAULT_TAGS = []
+_DEFAULT_AUTHOR = Person("Unknown", "Author")
+_SHARED = {"_compatibility": _DEFAULT_COMPATIBILITY, "_requirements": _DEFAULT_REQUIREMENTS,
+           "_dependencies": _DEFAULT_DEPENDENCIES, "_tags": _DEFAULT_TAGS, "_author": _DEFAULT_AUTHOR}
+_COPIED = ("compatibility", "requirements", "dependencies", "tags")  # attributes copied from _SHARED when read
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {key: list(item) if isinstance(item, list) else item for key, item in value.items()}
+    return list(value)
 
 
 class Module:
-    u"""Represent a module of Neverwinter Nights game. NWN module's file ends with .mod extension."""
+    u"""Represent a module of Neverwinter Nights game. NWN module's file ends with .mod extension.
+        Modules have no __dict__: attributes live in __slots__, author, language and tags are interned.
+        Compatibility, requirements, dependencies and tags are shared defaults until they are first read,
+        then the module gets its own dict or list, which can be changed in place."""
+    __slots__ = ("name", "title", "is_part_of_series", "_compatibility", "series", "_requirements",
+                 "_dependencies", "cep", "cep_version", "_author", "_tags", "_language", "version", "_up_to_date")
+
     default = {"name": "Module name", "title": "Module title", "is_part_of_series": False,
                "compatibility": {"Diamond_edition": True, "Enhanced_edition": False},
                "series": None, "dependencies": {File.FileType.hakpack: [],
@@ -205,20 +266,94 @@ class Module:
         self.name: str = name
         self.title: str = "Title"
         self.is_part_of_series: bool = False
-        self.compatibility = {"Diamond_edition": True, "Enhanced_edition": False}
-        self.series: str = "Series" if self.is_part_of_series else None
-        self.requirements = {"OC": True, "Xp1": True, "Xp2": True}
-        self.dependencies = {File.FileType.hakpack: [],
-                             File.FileType.movie: [],
-                             File.FileType.music: []}
+        self._compatibility: dict = _DEFAULT_COMPATIBILITY
+        self.series: str = None
+        self._requirements: dict = _DEFAULT_REQUIREMENTS
+        self._dependencies: dict = _DEFAULT_DEPENDENCIES
         self.cep: bool = False  # Community expansion pack required
-        self.cep_version: float = 2.65 if self.cep else 0
-        self.author: Person = Person("Unknown", "Author")
-        self.tags = []
-        self.language = "English"
+        self.cep_version: float = 0
+        self._author: Person = _DEFAULT_AUTHOR
+        self._tags: list = _DEFAULT_TAGS
+        self._language = "English"
         self.version: float = 1.00
         self._up_to_date = False
 
+    def _own(self, slot):
+        u"""Value of a slot, replacing a shared default by a copy of it first."""
+        value = getattr(self, slot)
+        if value is _SHARED[slot]:
+            value = _copy(value)
+            object.__setattr__(self, slot, value)
+        return value
+
+    def is_default(self, attribute) -> bool:
+        u"""Whether an attribute still holds its shared default, without copying it."""
+        return getattr(self, "_" + attribute) is _SHARED["_" + attribute]
+
+    @property
+    def compatibility(self) -> dict:
+        return self._own("_compatibility")
+
+    @compatibility.setter
+    def compatibility(self, value):
+        self._compatibility = value
+
+    @property
+    def requirements(self) -> dict:
+        return self._own("_requirements")
+
+    @requirements.setter
+    def requirements(self, value):
+        self._requirements = value
+
+    @property
+    def dependencies(self) -> dict:
+        return self._own("_dependencies")
+
+    @dependencies.setter
+    def dependencies(self, value):
+        self._dependencies = value
+
+    @property
+    def author(self):
+        return self._author
+
+    @author.setter
+    def author(self, value):
+        self._author = _intern(value)
+
+    @property
+    def tags(self) -> list:
+        return self._own("_tags")
+
+    @tags.setter
+    def tags(self, value):
+        self._tags = [_intern(tag) for tag in value] if value else []
+
+    @property
+    def language(self):
+        return self._language
+
+    @language.setter
+    def language(self, value):
+        self._language = _intern(value)
+
+    def __getstate__(self):
+        u"""Slots without the shared defaults, which are restored by __setstate__."""
+        return {slot: getattr(self, slot) for cls in type(self).__mro__ for slot in getattr(cls, "__slots__", ())
+                if hasattr(self, slot) and getattr(self, slot) is not _SHARED.get(slot)}
+
+    def __setstate__(self, state):
+        u"""Also reads pickles of modules which stored these attributes under their public names."""
+        for slot, value in _SHARED.items():
+            object.__setattr__(self, slot, value)
+        for slot, value in state.items():
+            name = slot.lstrip("_")
+            if name in _COPIED or name in ("author", "language"):
+                setattr(self, name, value)
+            else:
+                object.__setattr__(self, slot, value)
+
     def __repr__(self):
         return "Module(Name: {0}, Title: {1})".format(self.name, self.title)
 
@@ -233,8 +368,9 @@ class Module:
 
     def is_up_to_date(self):
         if not self._up_to_date:
-            for (attribute, default_attribute) in zip(self.__dict__.keys(), Module.default.keys()):
-                if self.__dict__[attribute] == Module.default[default_attribute]:
+            for attribute, default in Module.default.items():
+                value = getattr(self, "_" + attribute) if attribute in _COPIED else getattr(self, attribute)
+                if value == default:
                     return False
         self._up_to_date = True
         return True
@@ -243,14 +379,36 @@ class Module:
 class ModuleInDir(Module):
     u"""Represent a module inside game directory."""
 
+    __slots__ = ("path",)
+
     def __init__(self, path=pathlib.Path()):
         self.path = path
         super(ModuleInDir, self).__init__()
 
+    def read_info(self) -> dict:
+        u"""Fill title, hakpack dependencies, required expansions and compatibility from module.ifo.
+            Only headers of the .mod file are read, see erf.module_info. A module which cannot be read
+            keeps its fields and an empty dict is returned."""
+        import erf
+        from exceptions import InvalidErfException
+        try:
+            info = erf.module_info(self.path)
+        except (InvalidErfException, OSError) as excep:
+            logger.warning("Could not read module info of {}: {}".format(self.path, excep))
+            return {}
+        if info["title"]:
+            self.title = info["title"]
+        self.dependencies[File.FileType.hakpack] = info["haks"]
+        self.requirements = info["requirements"]
+        self.compatibility = info["compatibility"]
+        return info
+
 
 class ModuleInVault(Module):
     u"""Represent a module on a website."""
 
+    __slots__ = ("www", "file_address")
+
     def __init__(self, address):
         self.www = address
         self.file_address = ""
@@ -263,19 +421,18 @@ class OwnedModules:
     def __init__(self, list_of_modules=None):
         if list_of_modules is None:
             list_of_modules = []
-        self._modules = []
+        self._modules = ModuleRegistry()
         for module in list_of_modules:
             m = ModuleInDir(".")
             m.name = str(module)
+            m.title = m.name
+            self.add_module(m)
 
     def add_module(self, module) -> None:
-        self._modules.append(module)
+        self._modules.put(module)
 
     def remove_module(self, module) -> bool:
-        if module in self._modules:
-            self._modules.remove(module)
-            return True
-        return False
+        return self._modules.remove(module)
 
     def print(self):
         for m in self._modules:
@@ -303,10 +460,110 @@ class Shell(cmd.Cmd):
             for n in nwn:
                 print(n.show_modules(), sep="\n")
 
+    watcher = None
+
+    def do_watch(self, *args, **kwargs):
+        u"""Keep modules found by 'find' up to date while the shell is running.
+        :: off - stop watching."""
+        import watcher
+        if Shell.watcher is not None:
+            Shell.watcher.stop()
+            Shell.watcher = None
+            print("Stopped watching.")
+        if "off" in " ".join(args).split():
+            return
+        instances = NWN.show_instances()
+        if not instances:
+            print("Nothing to watch. Run 'find' command first.")
+            return
+
+        def apply(directories):
+            for nwn in NWN.show_instances():
+                added, removed = nwn.refresh(directories)
+                for m in added:
+                    print("New module: {}".format(m.title))
+                for m in removed:
+                    print("Removed module: {}".format(m.title))
+
+        roots = [str(d) for nwn in instances for d in (nwn.directory_local, nwn.directory_install)]
+        Shell.watcher = watcher.Watcher(apply, watcher.watched_directories(roots)).start()
+        print("Watching {} directories.".format(len(Shell.watcher.backend.directories)))
+
     def do_find(self, *args, **kwargs):
-        """Find Neverwinter Nights directory."""
+        """Find Neverwinter Nights directory. Replaces directories found before, unchanged ones are not read again."""
+        NWN._instances.clear()
         main()
 
+    @staticmethod
+    def do_discover(*args, **kwargs):
+        u"""Scan all game directories from config.json at once, modules are printed as soon as they are found."""
+        from discovery import Discovery
+        count = 0
+        for module in Discovery().modules():
+            print("{} ({})".format(module.title, module.path))
+            count += 1
+        print("Found {} modules.".format(count))
+
+    @staticmethod
+    def do_duplicates(*args, **kwargs):
+        u"""Find duplicated modules, hakpacks, music and movies in all game directories.
+        :: link - replace duplicates by hardlinks to one copy."""
+        import duplicates
+        link = "link" in " ".join(args).split()
+        groups = duplicates.DuplicateFinder().find()
+        freed = 0
+        for group in groups:
+            print("{} x {} bytes ({}):".format(len(group.paths), group.size, group.file_type.name))
+            for path in group.paths:
+                print("    {}".format(path))
+            if link:
+                freed += duplicates.hardlink(group)
+        print("Wasted space: {} bytes.".format(sum(g.wasted for g in groups)))
+        if link:
+            print("Freed: {} bytes.".format(freed))
+
+    @staticmethod
+    def do_disk_usage(*args, **kwargs):
+        u"""Print amount of data stored in tracked directories.
+        :: DE or EE - only one edition, json - print as JSON."""
+        import diskusage
+        words = " ".join(args).split()
+        edition = next((w for w in words if w in diskusage.EDITIONS), None)
+        report = diskusage.DiskUsage().report(edition)
+        if "json" in words:
+            import json
+            print(json.dumps(report, indent=2))
+        else:
+            print(diskusage.table(report))
+
+    @staticmethod
+    def do_haks(*args, **kwargs):
+        u"""Show hakpacks needed by modules and not installed, and hakpacks not used by any module.
+        :: {module path} - show hakpacks needed by one module."""
+        import hakgraph
+        graph = hakgraph.refresh()
+        module = " ".join(args).strip()
+        if module:
+            for hak, path in graph.closure(module):
+                print("{:32s} {}".format(hak, path or "MISSING"))
+            return
+        for hak, modules in sorted(graph.missing().items()):
+            print("Missing {} needed by: {}".format(hak, ", ".join(sorted(modules))))
+        for hak, path in sorted(graph.orphaned().items()):
+            print("Orphaned {}: {}".format(hak, path))
+
+    @staticmethod
+    def do_search(*args, **kwargs):
+        u"""Search modules on disk and in the vault catalog by title, author, tags, language and category.
+        :: {words} - words to search for, misspelled words are matched too."""
+        import search
+        query = " ".join(args).strip()
+        if not query:
+            print("Type words to search for.")
+            return
+        for hit in search.refresh().search(query):
+            print("{:6.2f} {:5s} {:40s} {}".format(hit.score, hit.kind, hit.title[:40], hit.id))
+
     @staticmethod
     def do_exit(*args, **kwargs):
         """Exit."""
@@ -318,7 +575,25 @@ class Shell(cmd.Cmd):
 
     @staticmethod
     def do_register(*args, **kwargs):
-        """Shows tracked objects, functions and directories. Works in debug mode only."""
+        """Shows tracked objects, functions and directories, in debug mode only, and profiles of tracked functions.
+        :: on - start profiling tracked functions (calls, time, latency histogram, bytes read or downloaded),
+        :: off - stop profiling,
+        :: reset - clear profiles,
+        :: dump {file} - write profiles to a file, JSON if its name ends with .json, Prometheus text otherwise."""
+        import session as profiling
+        words = " ".join(args).split()
+        for i, arg in enumerate(words):
+            if arg == "on":
+                profiling.enable_profiling()
+            if arg == "off":
+                profiling.enable_profiling(False)
+            if arg == "reset":
+                profiling.reset_profiles()
+            if arg == "dump" and i + 1 < len(words):
+                profiling.dump_profiles(words[i + 1])
+                print("Profiles written to {}.".format(words[i + 1]))
+
+        session = Session()
         if session.debug:
             print("Tracked objects: ")
             print(session.tracked_objects, sep="\n")
@@ -326,6 +601,8 @@ class Shell(cmd.Cmd):
             print(session.tracked_functions, sep="\n")
             print("Tracked directories: ")
             print(session.tracked_directories, sep="\n")
+        print("Profiling is {}.".format("on" if profiling.is_profiling() else "off"))
+        print(profiling.profiles_table())
 
     def do_config(self, *args, **kwargs):
         u"""Shows configuration, debug only."""
@@ -370,6 +647,7 @@ class Shell(cmd.Cmd):
         print(data)
 
         if www:
+            import scrapper
             modules = scrapper.create_list_of_links()
         elif file:
             try:
@@ -408,6 +686,81 @@ class Shell(cmd.Cmd):
                     name = m.rsplit("/", 1)[-1]
                     print(name)
 
+    def do_cache(self, *args, **kwargs):
+        u"""Cache of pages downloaded from neverwintervault.org.
+        :: on - store pages on disk and revalidate them on next requests,
+        :: off - disable the cache,
+        :: clear - remove all cached pages,
+        without arguments prints hit/miss counters."""
+        import scrapper
+        for arg in " ".join(args).split():
+            if arg == "on" and scrapper.cache is None:
+                scrapper.enable_cache()
+            if arg == "off":
+                scrapper.disable_cache()
+            if arg == "clear" and scrapper.cache is not None:
+                scrapper.cache.clear()
+
+        if scrapper.cache is None:
+            print("Cache is disabled.")
+        else:
+            print(scrapper.cache.stats())
+
+    def do_batch_install(self, *args, **kwargs):
+        u"""Install many modules at once: batch_install {url ...} or batch_install file={file with urls}.
+        :: scrap=int, download=int, extract=int - number of workers of each stage, defaults 4, 2, 1,
+        :: queue=int - maximum number of items waiting between two stages, default 2."""
+        from pipeline import batch_install
+        links, options = [], {}
+        for arg in " ".join(args).split():
+            if "=" in arg:
+                key, value = arg.split("=", 1)
+                options[key] = value
+            else:
+                links.append(arg)
+        if "file" in options:
+            try:
+                with open(options["file"], "r", encoding="utf-8") as fi:
+                    links.extend(line.strip() for line in fi if line.strip())
+            except FileNotFoundError:
+                logger.error("File not found. Given name: {}".format(options["file"]))
+                return
+        if not links:
+            print("No modules to install.")
+            return
+
+        nwn = NWN.show_instances()[-1] if NWN.show_instances() else None
+        pipeline = batch_install(links, nwn,
+                                 scrap_workers=int(options.get("scrap", 4)),
+                                 download_workers=int(options.get("download", 2)),
+                                 extract_workers=int(options.get("extract", 1)),
+                                 queue_size=int(options.get("queue", 2)))
+        print("Installed {} of {} modules.".format(len(pipeline.results), len(links)))
+        print(pipeline.summary())
+
+    def do_sync(self, *args, **kwargs):
+        u"""Synchronize local catalog of neverwintervault.org modules, only new and changed pages are scrapped."""
+        from catalog import CatalogStore
+        with CatalogStore() as store:
+            report = store.sync()
+            print(report)
+            print("Modules in catalog: {}".format(len(store)))
+
+    def do_crawl(self, *args, **kwargs):
+        u"""Scrap all modules listed in neverwintervault.org concurrently.
+        :: workers=int - number of worker threads, default 8,
+        :: rate=float - maximum number of requests per second to the vault, default no limit."""
+        from crawler import Crawler
+        options = dict(arg.split("=", 1) for arg in " ".join(args).split() if "=" in arg)
+        workers = int(options.get("workers", 8))
+        rate = float(options["rate"]) if "rate" in options else None
+
+        with Crawler(workers=workers, per_host=workers, rate=rate) as crawler:
+            for data in crawler.crawl_vault():
+                print("{} ({})".format(data["title"], data["www"]))
+            if crawler.failed:
+                print("Failed to scrap {} pages.".format(len(crawler.failed)))
+
 def main():
     nwn = NWN()
 
@@ -416,7 +769,7 @@ def main():
 
 class Install:
     @staticmethod
-    @session.register
+    @register
     def install(path=".", name=None, force=False):
         u"""Install the program:
             :path - str, place where the main directory is created, default .,
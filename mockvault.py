@@ -0,0 +1,260 @@
+"""
+    Local mock of neverwintervault.org for offline crawl and download benchmarks.
+    Serves the campaigns list page (see scrapper.CAMPAIGNS_PATH), module pages and module archives:
+    pages are recorded ones (a directory of <slug>.html files) or generated from tests/fixtures/module_page.html,
+    archives are zip files with a module built by erf.write_erf. Latency, bandwidth caps, error rates,
+    ETag revalidation and Range requests (resumed downloads) are supported.
+    Point the scrapper at it with scrapper.set_base_url(vault.url) or NWNTOOL_VAULT_URL=url.
+    Run: python mockvault.py [--port 8080] [--modules 100] [--latency 0.05] [--bandwidth BYTES/S] [--errors 0.01]
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import hashlib
+import html
+import io
+import logging
+import os
+import pathlib
+import random
+import re
+import tempfile
+import threading
+import time
+import zipfile
+
+from scrapper import CAMPAIGNS_PATH
+
+logger = logging.getLogger(__name__)
+
+FIXTURE = pathlib.Path(__file__).resolve().parent.joinpath("tests", "fixtures", "module_page.html")
+MODULE_PREFIX = "/project/nwn1/module/"
+ARCHIVE_PREFIX = "/sites/neverwintervault.org/files/project/"
+ARCHIVE_SIZE = 256 * 1024
+CHUNK_SIZE = 16 * 1024
+
+_ARCHIVE = re.compile(r"^/sites/neverwintervault\.org/files/project/(\d+)/modules/([\w-]+)\.zip$")
+
+
+def slug(number) -> str:
+    return "module-{}".format(number)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as the vault
+
+    def do_GET(self):
+        vault = self.server.vault
+        vault.count("requests")
+        if vault.latency:
+            time.sleep(vault.latency)
+        if vault.inject_error():
+            vault.count("errors")
+            return self._send(503, b"Service Unavailable", "text/plain")
+        path = self.path.split("?", 1)[0]
+        try:
+            body, content_type = vault.resource(path)
+        except KeyError:
+            return self._send(404, b"Not Found", "text/plain")
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        if self.headers.get("If-None-Match") == etag:
+            vault.count("not_modified")
+            return self._send(304, b"", content_type, etag)
+        match = re.match(r"^bytes=(\d+)-$", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            if start >= len(body):
+                return self._send(416, b"", content_type, etag)
+            return self._send(206, body[start:], content_type, etag,
+                              {"Content-Range": "bytes {}-{}/{}".format(start, len(body) - 1, len(body))})
+        return self._send(200, body, content_type, etag)
+
+    def _send(self, status, body, content_type, etag=None, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        if etag:
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        vault = self.server.vault
+        view = memoryview(body)
+        for offset in range(0, len(body), CHUNK_SIZE):
+            chunk = view[offset:offset + CHUNK_SIZE]
+            try:
+                self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):  # the client has given up, e.g. a cancelled download
+                self.close_connection = True
+                return
+            vault.count("bytes", len(chunk))
+            if vault.bandwidth:
+                time.sleep(len(chunk) / vault.bandwidth)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class MockVault:
+    u"""Local vault server.
+        :modules - number of modules listed on the campaigns page, their pages are generated,
+        :pages - directory with recorded module pages, <slug>.html, served instead of generated ones
+            and listed on the campaigns page too,
+        :latency - seconds added before every response,
+        :bandwidth - cap of bytes per second of every response, None for no cap,
+        :error_rate - share of requests answered with 503,
+        :archive_size - approximate size of generated module archives in bytes,
+        :seed - seed of injected errors."""
+
+    def __init__(self, modules=100, pages=None, latency=0.0, bandwidth=None, error_rate=0.0,
+                 archive_size=ARCHIVE_SIZE, host="127.0.0.1", port=0, seed=0):
+        self.modules = modules
+        self.pages = pathlib.Path(pages) if pages else None
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.archive_size = archive_size
+        self.stats = {"requests": 0, "errors": 0, "not_modified": 0, "bytes": 0}
+        self._versions = {}  # slug: version, bumped by update()
+        self._sizes = {}  # slug: size of its archive
+        self._template = FIXTURE.read_text(encoding="utf-8")
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.vault = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def inject_error(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def slugs(self) -> list:
+        recorded = sorted(p.stem for p in self.pages.glob("*.html")) if self.pages else []
+        return recorded + [slug(n) for n in range(self.modules)]
+
+    def module_url(self, name) -> str:
+        return self.url + MODULE_PREFIX + name
+
+    def update(self, name):
+        u"""Change a generated module page (its version), as if the module was updated on the vault."""
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            self._sizes.pop(name, None)
+
+    # Resources
+
+    def resource(self, path) -> tuple:
+        u"""(body, content type) of a path. Raise KeyError if there is no such resource."""
+        if path == CAMPAIGNS_PATH:
+            return self.campaigns_page(), "text/html; charset=utf-8"
+        if path.startswith(MODULE_PREFIX):
+            return self.module_page(path[len(MODULE_PREFIX):]), "text/html; charset=utf-8"
+        match = _ARCHIVE.match(path)
+        if match:
+            return self.archive(match.group(2)), "application/zip"
+        raise KeyError(path)
+
+    def campaigns_page(self) -> bytes:
+        links = "\n".join('<li><a href="{}">{}</a></li>'.format(self.module_url(s), html.escape(s))
+                          for s in self.slugs())
+        return "<!DOCTYPE html>\n<html><body><ul>\n{}\n</ul></body></html>\n".format(links).encode("utf-8")
+
+    def module_page(self, name) -> bytes:
+        if self.pages is not None and self.pages.joinpath(name + ".html").is_file():
+            return self.pages.joinpath(name + ".html").read_bytes()
+        if not re.fullmatch(r"module-\d+", name) or int(name.split("-")[1]) >= self.modules:
+            raise KeyError(name)
+        number = int(name.split("-")[1])
+        page = self._template.replace("Enigma Island Complete", "Module {}".format(number))
+        page = page.replace("/sites/neverwintervault.org/files/project/1234/modules/enigma_island_complete.zip",
+                            "{}{}/modules/{}.zip".format(ARCHIVE_PREFIX, number, name))
+        page = page.replace("enigma_island_complete.zip", name + ".zip")
+        page = page.replace("length=48213442", "length={}".format(self.archive_size_of(name)))
+        page = page.replace(">1.03<", ">1.{:02d}<".format(self._versions.get(name, 0)))
+        return page.encode("utf-8")
+
+    def archive(self, name) -> bytes:
+        u"""Zip archive with a synthetic module. Archives are built on every request, only their sizes are kept."""
+        import erf
+        with self._lock:
+            version = self._versions.get(name, 0)
+        ifo = erf.build_module_ifo("{} {}".format(name, version))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name + ".mod")
+            erf.write_erf(path, [("module", erf.RES_TYPE_IFO, ifo)], padding=self.archive_size)
+            with open(path, "rb") as fi:
+                module = fi.read()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            archive.writestr(zipfile.ZipInfo(name + ".mod", date_time=(2004, 1, 10, 0, 0, 0)), module)
+        data = buffer.getvalue()
+        with self._lock:
+            self._sizes[name] = len(data)
+        return data
+
+    def archive_size_of(self, name) -> int:
+        with self._lock:
+            size = self._sizes.get(name)
+        return size if size is not None else len(self.archive(name))
+
+    # Service
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mockvault", daemon=True)
+        self._thread.start()
+        logger.info("Mock vault serves {} modules at {}.".format(len(self.slugs()), self.url))
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of neverwintervault.org.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--modules", type=int, default=100, help="Number of generated modules.")
+    parser.add_argument("--pages", help="Directory with recorded module pages, <slug>.html.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--bandwidth", type=int, help="Bytes per second of every response.")
+    parser.add_argument("--errors", type=float, default=0.0, help="Share of requests answered with 503.")
+    parser.add_argument("--archive-size", type=int, default=ARCHIVE_SIZE, help="Bytes of a module archive.")
+    args = parser.parse_args()
+    vault = MockVault(args.modules, args.pages, args.latency, args.bandwidth, args.errors, args.archive_size,
+                      args.host, args.port).start()
+    print("Serving at {0}, run the tool with NWNTOOL_VAULT_URL={0}".format(vault.url))
+    try:
+        vault._thread.join()
+    except KeyboardInterrupt:
+        vault.stop()
+
+
+if __name__ == '__main__':
+    main()
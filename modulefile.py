@@ -0,0 +1,213 @@
+"""
+    Binary file of module records, a safe and versioned replacement of pickled module lists.
+    Layout (little endian):
+        header   "NWNM", format version (H), flags (H), count (I), index offset (Q), keys offset (Q)
+        records  UTF-8 JSON object per module, only attributes which differ from defaults
+        index    count x (offset (Q), length (I)) of records
+        keys     count x (key offset (Q), key length (I), position (I)) sorted by key, followed by the keys,
+                 a key is UTF-8 JSON [title, version] of a record
+    The file is memory mapped: opening it reads the header only, a record is decoded when it is accessed
+    and a module is found by (title, version) with a binary search of the keys.
+"""
+import json
+import logging
+import mmap
+import os
+import pathlib
+import struct
+
+from exceptions import InvalidModuleFileException
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NWNM"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIQQ")
+_ENTRY = struct.Struct("<QI")
+_KEY = struct.Struct("<QII")
+
+# Attributes of mainLib.Module stored in a record, besides the class specific ones
+_ATTRIBUTES = ("name", "title", "is_part_of_series", "compatibility", "series", "requirements", "cep",
+               "cep_version", "language", "version")
+_CLASS_ATTRIBUTES = {"Module": (), "ModuleInDir": ("path",), "ModuleInVault": ("www", "file_address")}
+
+
+_fresh = {}  # class: module with default attributes
+
+
+def _classes() -> dict:
+    import mainLib
+    return {name: getattr(mainLib, name) for name in _CLASS_ATTRIBUTES}
+
+
+def _defaults(cls):
+    fresh = _fresh.get(cls)
+    if fresh is None:
+        fresh = _fresh[cls] = cls(".") if cls.__name__ != "Module" else cls()
+    return fresh
+
+
+def key(title, version) -> bytes:
+    if isinstance(version, (int, float)) and not isinstance(version, bool):
+        version = float(version)
+    return json.dumps([title, version], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def encode(module) -> dict:
+    u"""Record of a mainLib.Module: attributes which differ from a freshly created module of the same class."""
+    from mainLib import File
+    cls = type(module).__name__
+    if cls not in _CLASS_ATTRIBUTES:
+        raise TypeError("Cannot store {}".format(type(module)))
+    fresh = _defaults(type(module))
+    record = {"class": cls}
+    for attribute in _ATTRIBUTES + _CLASS_ATTRIBUTES[cls]:
+        if attribute in ("compatibility", "requirements") and module.is_default(attribute):
+            continue  # reading it would give the module a copy of the default
+        value = getattr(module, attribute)
+        if value != getattr(fresh, attribute):
+            record[attribute] = str(value) if isinstance(value, pathlib.PurePath) else \
+                dict(value) if attribute in ("compatibility", "requirements") else value
+    if not module.is_default("dependencies") and module.dependencies != fresh.dependencies:
+        record["dependencies"] = {kind.name: list(files) for kind, files in module.dependencies.items()
+                                  if isinstance(kind, File.FileType)}
+    if module.author is not fresh.author:
+        author = module.author
+        record["author"] = author if isinstance(author, str) or author is None else [author.name, author.surname]
+    if not module.is_default("tags") and module.tags:
+        record["tags"] = list(module.tags)
+    return record
+
+
+def decode(record: dict, classes=None):
+    u"""mainLib.Module of a record made by encode()."""
+    from mainLib import File, Person
+    classes = classes or _classes()
+    cls = classes[record["class"]]
+    module = cls(".") if record["class"] != "Module" else cls()
+    for attribute, value in record.items():
+        if attribute == "class":
+            continue
+        if attribute == "dependencies":
+            value = {File.FileType[kind]: files for kind, files in value.items()}
+        elif attribute == "author" and isinstance(value, list):
+            value = Person(*value)
+        setattr(module, attribute, value)
+    return module
+
+
+def write(path, modules) -> int:
+    u"""Write modules to a file, atomically. Return number of modules written."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    index = []
+    keys = []
+    with open(tmp, "wb") as fo:
+        fo.write(b"\0" * _HEADER.size)
+        offset = _HEADER.size
+        for module in modules:
+            data = json.dumps(encode(module), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            fo.write(data)
+            index.append(_ENTRY.pack(offset, len(data)))
+            keys.append((key(module.title, module.version), len(index) - 1))
+            offset += len(data)
+        index_offset = offset
+        fo.write(b"".join(index))
+        keys_offset = index_offset + _ENTRY.size * len(index)
+        keys.sort()
+        key_offset = keys_offset + _KEY.size * len(keys)
+        for k, position in keys:
+            fo.write(_KEY.pack(key_offset, len(k), position))
+            key_offset += len(k)
+        fo.write(b"".join(k for k, _ in keys))
+        fo.seek(0)
+        fo.write(_HEADER.pack(MAGIC, VERSION, 0, len(index), index_offset, keys_offset))
+    os.replace(tmp, path)
+    logger.debug("Wrote {} modules to {}.".format(len(index), path))
+    return len(index)
+
+
+class ModuleFile:
+    u"""Read only, lazily decoded sequence of modules stored by write()."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < _HEADER.size:
+                raise InvalidModuleFileException(self.path, "file too short")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (InvalidModuleFileException, ValueError, OSError):
+            self._file.close()
+            raise
+        magic, version, _, self._count, self._index_offset, self._keys_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise InvalidModuleFileException(self.path, "not a module file")
+        if version > VERSION:
+            self.close()
+            raise InvalidModuleFileException(self.path, "unsupported version {}".format(version))
+        if self._index_offset + _ENTRY.size * self._count != self._keys_offset or \
+                self._keys_offset + _KEY.size * self._count > size:
+            self.close()
+            raise InvalidModuleFileException(self.path, "corrupted index")
+        self._classes = _classes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def record(self, position) -> dict:
+        u"""Raw record of a module at a position."""
+        if not -self._count <= position < self._count:
+            raise IndexError(position)
+        offset, length = _ENTRY.unpack_from(self._map, self._index_offset + _ENTRY.size * (position % self._count))
+        try:
+            return json.loads(self._map[offset:offset + length].decode("utf-8"))
+        except ValueError:
+            raise InvalidModuleFileException(self.path, "corrupted record {}".format(position))
+
+    def __getitem__(self, position):
+        return decode(self.record(position), self._classes)
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self[position]
+
+    def _key(self, i) -> tuple:
+        offset, length, position = _KEY.unpack_from(self._map, self._keys_offset + _KEY.size * i)
+        return self._map[offset:offset + length], position
+
+    def find(self, title, version):
+        u"""Module with a title and version, or None. Keys are searched in place, no other record is decoded."""
+        wanted = key(title, version)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle)[0] < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            k, position = self._key(low)
+            if k == wanted:
+                return self[position]
+        return None
+
+
+def read(path) -> list:
+    u"""All modules stored in a file."""
+    with ModuleFile(path) as f:
+        return list(f)
@@ -0,0 +1,298 @@
+"""
+    Table model of the vault catalog for the GUI.
+    The light columns of all listed modules are read from catalog.CatalogStore once, records (JSON) are decoded
+    only when asked for. Sorting and filtering work on row numbers of that in-memory index: orders of a column
+    are computed once and reused, a filter keeps the current order, and a query extending the previous one
+    only narrows the current view, views of recent queries are cached. The model exposes the view in chunks
+    through canFetchMore/fetchMore, so a view of 100k modules lays out only rows which were scrolled to.
+    Search as you type is debounced: a filter is applied when the text has not changed for DEBOUNCE ms, and
+    it is computed STEP rows per event loop iteration, so the window keeps drawing frames meanwhile.
+"""
+from collections import OrderedDict
+import logging
+
+from PySide2.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, Signal
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (("title", "Title"), ("author", "Author"), ("size", "Size"), ("last_changed", "Changed"),
+           ("game", "Game"), ("category", "Category"), ("language", "Language"))
+SEARCHED = ("title", "author", "game", "category", "language")  # columns matched by a filter
+FETCH_SIZE = 1000  # rows added to the model by a single fetchMore
+STEP = 10000  # candidate rows filtered by the event thread between two frames
+CACHED_VIEWS = 8
+DEBOUNCE = 200  # ms
+
+
+def _size(value) -> str:
+    if value is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return "{:.0f} {}".format(value, unit) if unit == "B" else "{:.1f} {}".format(value, unit)
+        value /= 1024
+    return "{:.1f} GB".format(value)
+
+
+class CatalogRows:
+    u"""In-memory index of listed catalog modules.
+        :rows - tuples ("www", *names of COLUMNS),
+        :path - catalog file, records are read from it by record(); None for rows which do not come from a file.
+        view is the list of row numbers shown, in the current order and matching the current filter."""
+
+    def __init__(self, rows, path=None):
+        self.rows = rows
+        self.path = path
+        self.column = None  # position in COLUMNS of the sort column, None keeps order of rows
+        self.descending = False
+        self.text = ""
+        self.view = list(range(len(rows)))
+        self._orders = {}
+        self._views = OrderedDict()  # (words of a filter, column, descending): view
+        self._haystacks = None
+        self._store = None
+
+    @classmethod
+    def load(cls, path=None) -> "CatalogRows":
+        u"""Read rows of a catalog, by default catalog.default_path()."""
+        from catalog import CatalogStore
+        with CatalogStore(path) as store:
+            return cls(store.table(("www",) + tuple(name for name, _ in COLUMNS)), store.path)
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, position) -> tuple:
+        u"""Row at a position of the view."""
+        return self.rows[self.view[position]]
+
+    def record(self, position) -> dict:
+        u"""Whole catalog record of a module at a position of the view, None if rows are not backed by a file."""
+        if self.path is None:
+            return None
+        if self._store is None:
+            from catalog import CatalogStore
+            self._store = CatalogStore(self.path)  # sqlite connection of the thread asking, the event thread
+        return self._store.get(self[position][0])
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def order(self, column, descending=False) -> list:
+        u"""Row numbers sorted by a column, empty values last in both directions. Orders are cached."""
+        if column not in self._orders:
+            values = [row[column + 1] for row in self.rows]
+            ascending = sorted((i for i, value in enumerate(values) if value is not None),
+                               key=lambda i: values[i].casefold() if isinstance(values[i], str) else values[i])
+            self._orders[column] = (ascending, [i for i, value in enumerate(values) if value is None])
+        ascending, empty = self._orders[column]
+        return (ascending[::-1] if descending else ascending) + empty
+
+    def haystacks(self) -> list:
+        u"""Text of every row matched by filters: SEARCHED columns, folded to lower case."""
+        if self._haystacks is None:
+            positions = [1 + [name for name, _ in COLUMNS].index(name) for name in SEARCHED]
+            self._haystacks = ["\t".join(row[p] for p in positions if row[p]).casefold() for row in self.rows]
+        return self._haystacks
+
+    def prepare(self):
+        u"""Build text of rows matched by filters and orders of all columns, so the first keystroke or click on
+            a header does not pay for them. Called by the thread which loads rows."""
+        self.haystacks()
+        for column in range(len(COLUMNS)):
+            self.order(column)
+
+    def steps(self, text, column, descending=False, chunk=None):
+        u"""Compute the view of a filter and an order, chunk candidate rows at a time (all at once if None).
+            A generator yielding between chunks, its return value is the view, see show(). Views of recent
+            queries are cached, so deleting characters of a query costs nothing."""
+        tokens = tuple(text.casefold().split())
+        key = (tokens, column, descending)
+        if key in self._views:
+            self._views.move_to_end(key)
+            return self._views[key]
+        previous = tuple(self.text.casefold().split())
+        if previous and (column, descending) == (self.column, self.descending) and len(tokens) >= len(previous) \
+                and all(old in new for old, new in zip(previous, tokens)):
+            candidates = self.view  # a narrower query: every match is in the current view
+        else:
+            candidates = self.order(column, descending) if column is not None else range(len(self.rows))
+        if tokens:
+            haystacks = self.haystacks()
+            chunk = chunk or max(len(candidates), 1)
+            view = []
+            for start in range(0, len(candidates), chunk):
+                part = candidates[start:start + chunk]
+                for token in tokens:
+                    part = [i for i in part if token in haystacks[i]]
+                view.extend(part)
+                yield
+        else:
+            view = list(candidates)
+        self._views[key] = view
+        while len(self._views) > CACHED_VIEWS:
+            self._views.popitem(last=False)
+        return view
+
+    def show(self, text, column, descending, view):
+        u"""Replace the view by one computed by steps()."""
+        self.text, self.column, self.descending, self.view = text, column, descending, view
+
+    def view_of(self, text, column, descending=False) -> list:
+        u"""Compute a view at once, see steps()."""
+        steps = self.steps(text, column, descending)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def apply(self, text, column, descending=False):
+        self.show(text, column, descending, self.view_of(text, column, descending))
+
+    def sort(self, column, descending=False):
+        u"""Order the view by a column (position in COLUMNS, None for order of rows), keeping the filter."""
+        self.apply(self.text, column, descending)
+
+    def filter(self, text):
+        u"""Show rows which contain every word of the text in one of SEARCHED columns, keeping the order."""
+        self.apply(text, self.column, self.descending)
+
+
+class ModuleTableModel(QAbstractTableModel):
+    u"""Model of CatalogRows for QTableView, rows of the view are exposed FETCH_SIZE at a time.
+        Sorting of the view (QTableView.setSortingEnabled) and filter() go to the backing CatalogRows,
+        no QSortFilterProxyModel is needed.
+        :filtered - number of rows matching the filter, emitted after every change of the view."""
+    filtered = Signal(int)
+    fetch_size = FETCH_SIZE
+    step = STEP
+
+    def __init__(self, rows=None, parent=None):
+        super(ModuleTableModel, self).__init__(parent)
+        self.rows = rows if rows is not None else CatalogRows([])
+        self.loaded = 0
+        self._pending = ""
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE)
+        self._timer.timeout.connect(lambda: self.filter(self._pending, sliced=True))
+        self._steps = None  # (generator of CatalogRows.steps, its text, column and descending)
+        self._stepper = QTimer(self)
+        self._stepper.setInterval(0)
+        self._stepper.timeout.connect(self._step)
+
+    def set_rows(self, rows: CatalogRows):
+        u"""Show another catalog, keeping the current sort and filter."""
+        settings = self.settings
+        self._cancel()
+        self.beginResetModel()
+        self.rows.close()
+        rows.apply(*settings)
+        self.rows = rows
+        self.loaded = 0
+        self.endResetModel()
+        self.filtered.emit(len(self.rows))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            value = self.rows[index.row()][index.column() + 1]
+            if COLUMNS[index.column()][0] == "size":
+                return _size(value)
+            return value
+        if role == Qt.ToolTipRole and index.column() == 0:
+            return self.rows[index.row()][0]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][1]
+        return super(ModuleTableModel, self).headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self.loaded < len(self.rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.fetch_size, len(self.rows) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def _run(self, text, column, descending):
+        u"""Compute a view STEP rows per event loop iteration, so frames are drawn while a big catalog is
+            filtered. A view being computed is dropped by the next change."""
+        self._steps = (self.rows.steps(text, column, descending, self.step), (text, column, descending))
+        self._step()
+        if self._steps is not None:
+            self._stepper.start()
+
+    def _step(self):
+        steps, settings = self._steps
+        try:
+            next(steps)
+        except StopIteration as stop:
+            self._stepper.stop()
+            self._steps = None
+            self._show(*settings, stop.value)
+
+    def _cancel(self):
+        self._stepper.stop()
+        self._steps = None
+
+    def _show(self, text, column, descending, view):
+        self.beginResetModel()
+        self.rows.show(text, column, descending, view)
+        self.loaded = 0
+        self.endResetModel()
+        self.filtered.emit(len(self.rows))
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        u"""Called by the view when a header is clicked, see QTableView.setSortingEnabled."""
+        self._run(self.settings[0], column if column >= 0 else None, order == Qt.DescendingOrder)
+
+    @property
+    def busy(self) -> bool:
+        u"""Whether a view is being computed."""
+        return self._steps is not None
+
+    @property
+    def settings(self) -> tuple:
+        u"""(filter, sort column, descending) of the view, or of the view being computed."""
+        if self._steps is not None:
+            return self._steps[1]
+        return self.rows.text, self.rows.column, self.rows.descending
+
+    def filter(self, text, sliced=False):
+        u"""Apply a filter now, all at once or in steps (see _run), cancelling a scheduled one."""
+        self._timer.stop()
+        current, column, descending = self.settings
+        if text == current:
+            return
+        if sliced:
+            self._run(text, column, descending)
+        else:
+            self._cancel()
+            self._show(text, column, descending, self.rows.view_of(text, column, descending))
+
+    def schedule_filter(self, text):
+        u"""Apply a filter in steps when the text has not changed for DEBOUNCE ms, connected to textChanged
+            of a line edit."""
+        self._pending = text
+        self._timer.start()
+
+    def record(self, row) -> dict:
+        return self.rows.record(row)
@@ -0,0 +1,175 @@
+"""
+    Pipelined batch installation of modules from neverwintervault.org.
+    Scrapping, downloading, extracting and registering run as concurrent stages joined by bounded queues,
+    so the network is busy while archives are extracted and the other way round.
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # sentinel closing a stage
+
+
+class Stage:
+    u"""Single step of a pipeline, function is called for every item by a given number of worker threads.
+        Function returns an item for the next stage, or None to drop the item."""
+
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.processed = 0
+        self.errors = []  # (item, exception)
+        self.latencies = []
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._running = workers
+
+    @property
+    def throughput(self) -> float:
+        u"""Items per second, measured from the start of the pipeline till the stage is closed."""
+        if self.started is None or self.finished is None or self.finished == self.started:
+            return 0.0
+        return self.processed / (self.finished - self.started)
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {"stage": self.name,
+                "workers": self.workers,
+                "processed": self.processed,
+                "errors": len(self.errors),
+                "throughput": self.throughput,
+                "mean latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "max latency": latencies[-1] if latencies else 0.0}
+
+
+class Pipeline:
+    u"""Chain of stages. Queue between two stages holds at most queue_size items, so a slow stage
+        makes the previous ones wait instead of piling up data (e.g. downloaded archives)."""
+
+    def __init__(self, stages, queue_size=2):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.results = []
+
+    def _worker(self, stage, source, target, consumers):
+        while True:
+            item = source.get()
+            if item is _DONE:
+                break
+            start = time.monotonic()
+            try:
+                result = stage.function(item)
+            except Exception as excep:
+                logger.error("Stage {} failed for {}: {}".format(stage.name, item, excep))
+                with stage._lock:
+                    stage.errors.append((item, excep))
+                continue
+            with stage._lock:
+                stage.processed += 1
+                stage.latencies.append(time.monotonic() - start)
+            if result is not None:
+                target.put(result)
+
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            stage.finished = time.monotonic()
+            for _ in range(consumers):
+                target.put(_DONE)
+
+    def run(self, items) -> list:
+        u"""Push items through all stages, return results of the last stage.
+            An exception raised by items is raised after the items read before it went through the stages,
+            their results stay in self.results."""
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        self.results = []
+        start = time.monotonic()
+        threads = []
+        for i, stage in enumerate(self.stages):
+            stage.started = start
+            stage._running = stage.workers
+            consumers = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(stage, queues[i], queues[i + 1], consumers),
+                                          name="{}-{}".format(stage.name, n), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        failed = []
+
+        def feed():
+            try:
+                for item in items:
+                    queues[0].put(item)
+            except Exception as excep:  # re-raised by run() once the stages have drained
+                failed.append(excep)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_DONE)
+        threading.Thread(target=feed, name="feed", daemon=True).start()
+
+        output = queues[-1]
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            self.results.append(item)
+        for thread in threads:
+            thread.join()
+        if failed:
+            raise failed[0]
+        return self.results
+
+    def summary(self) -> str:
+        u"""Table of throughput and latency of every stage."""
+        lines = ["{:10s} {:>7s} {:>9s} {:>6s} {:>10s} {:>12s} {:>11s}".format(
+            "stage", "workers", "processed", "errors", "items/s", "mean lat. s", "max lat. s")]
+        for stage in self.stages:
+            s = stage.summary()
+            lines.append("{:10s} {:7d} {:9d} {:6d} {:10.2f} {:12.3f} {:11.3f}".format(
+                s["stage"], s["workers"], s["processed"], s["errors"], s["throughput"], s["mean latency"],
+                s["max latency"]))
+        return "\n".join(lines)
+
+
+def batch_install(links, nwn=None, scrap_workers=4, download_workers=2, extract_workers=1, queue_size=2,
+                  directory=None) -> Pipeline:
+    u"""Install modules from a list of vault pages: scrap, download, extract and register them
+        in nwn (mainLib.NWN) if given. Return the finished pipeline, results holds created modules."""
+    import scrapper
+    import extractor
+    import Config
+    from crawler import Crawler
+    from mainLib import NWN
+
+    game_directory = Config.config.config.game_config.path_to_local_vault
+    register_lock = threading.Lock()
+
+    with Crawler(workers=scrap_workers, per_host=max(scrap_workers, download_workers)) as crawler:
+        def download(data):
+            return scrapper.download_scrapped_module(data, directory, crawler.session(data["href"]))
+
+        def extract(module):
+            module.extraction = extractor.extract(module.path, game_directory, compression=module.compression)
+            return module
+
+        def register(module):
+            m = NWN.create_module_from_scrapper_data(module)
+            if nwn is not None:
+                with register_lock:
+                    nwn.save_module_unique(m)
+            return m
+
+        pipeline = Pipeline([Stage("scrap", crawler.scrap, scrap_workers),
+                             Stage("download", download, download_workers),
+                             Stage("extract", extract, extract_workers),
+                             Stage("register", register, 1)], queue_size)
+        pipeline.run(links)
+    logger.info("Batch installation finished:\n{}".format(pipeline.summary()))
+    return pipeline
@@ -0,0 +1,112 @@
+"""
+    Registry of modules keyed the way Module.__eq__ compares them: (title, version).
+    Secondary indexes by path and by author make lookups, adding and removing modules O(1),
+    so registering a whole catalog is linear instead of quadratic.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def key(module) -> tuple:
+    u"""Key of a module, modules with equal keys are equal (see mainLib.Module.__eq__)."""
+    return module.title, module.version
+
+
+def author_key(author) -> str:
+    u"""Author as a lowercase string, author may be a mainLib.Person or a str."""
+    if author is None:
+        return ""
+    if not isinstance(author, str):
+        author = " ".join(filter(None, (getattr(author, "name", ""), getattr(author, "surname", ""))))
+    return " ".join(author.lower().split())
+
+
+class ModuleRegistry:
+    u"""Unique modules in order of registration.
+        Note: a module is indexed by its title, version, path and author at the time it was added,
+        remove it before changing any of them and add it again afterwards."""
+
+    def __init__(self, modules=()):
+        self._by_key = {}  # (title, version): module
+        self._by_path = {}  # str(path): module
+        self._by_author = {}  # author_key: {(title, version): module}
+        self.add_many(modules)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def __iter__(self):
+        return iter(list(self._by_key.values()))
+
+    def __contains__(self, module):
+        return (module if isinstance(module, tuple) else key(module)) in self._by_key
+
+    def __repr__(self):
+        return "ModuleRegistry({})".format(list(self._by_key.values()))
+
+    def _index(self, k, module):
+        self._by_key[k] = module
+        path = getattr(module, "path", None)
+        if path is not None:
+            self._by_path[str(path)] = module
+        self._by_author.setdefault(author_key(getattr(module, "author", None)), {})[k] = module
+
+    def _unindex(self, k, module):
+        del self._by_key[k]
+        path = getattr(module, "path", None)
+        if path is not None and self._by_path.get(str(path)) is module:
+            del self._by_path[str(path)]
+        a = author_key(getattr(module, "author", None))
+        modules = self._by_author.get(a)
+        if modules is not None:
+            modules.pop(k, None)
+            if not modules:
+                del self._by_author[a]
+
+    def add(self, module) -> bool:
+        u"""Add a module unless an equal one is registered. Return True if added."""
+        k = key(module)
+        if k in self._by_key:
+            return False
+        self._index(k, module)
+        return True
+
+    def put(self, module):
+        u"""Add a module, replacing an equal one."""
+        k = key(module)
+        old = self._by_key.get(k)
+        if old is not None:
+            self._unindex(k, old)
+        self._index(k, module)
+
+    def add_many(self, modules) -> int:
+        u"""Add modules which are not registered yet. Return number of modules added."""
+        return sum(self.add(m) for m in modules)
+
+    def remove(self, module) -> bool:
+        u"""Remove a module equal to the given one. Return True if it was registered."""
+        k = key(module)
+        old = self._by_key.get(k)
+        if old is None:
+            return False
+        self._unindex(k, old)
+        return True
+
+    def remove_many(self, modules) -> int:
+        return sum(self.remove(m) for m in modules)
+
+    def get(self, title, version):
+        u"""Module with a title and version, or None."""
+        return self._by_key.get((title, version))
+
+    def by_path(self, path):
+        return self._by_path.get(str(path))
+
+    def by_author(self, author) -> list:
+        return list(self._by_author.get(author_key(author), {}).values())
+
+    def clear(self):
+        self._by_key.clear()
+        self._by_path.clear()
+        self._by_author.clear()
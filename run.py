@@ -2,10 +2,10 @@
     Run the program.
     Author: Radosław Piwowarski
 """
-import mainLib
 import logging
 from datetime import datetime
 import argparse
+import json
 
 logger_name = "log"
 debug = True
@@ -29,11 +29,24 @@ def parser_func() -> argparse.ArgumentParser:
     # Search for module
     parser_main.add_argument("-s", "--search", help="Search for module {name}.")
     # Disk usage
-    parser_main.add_argument("-d", "--disk-usage", choices=["DE", "EE", ""], default="",
+    parser_main.add_argument("-d", "--disk-usage", choices=["DE", "EE", ""], default=None, nargs="?", const="",
                              help="""Prints total amount of data stored in tracked directories.
                                      DE - Diamond Edition only,
                                      EE - Enhanced Edition only,
                                      An empty string represents both versions (default).""")
+    parser_main.add_argument("--json", action="store_true", help="Print reports as JSON.")
+    # Daemon
+    parser_main.add_argument("--daemon", action="store_true",
+                             help="Serve -ls, --search and --disk-usage queries from memory over a local socket.")
+    parser_main.add_argument("--no-daemon", action="store_true", help="Answer queries without a running daemon.")
+    # Vault
+    parser_main.add_argument("--vault-url", metavar="URL",
+                             help="Base url of the vault, e.g. of a local mockvault.py server "
+                                  "(also NWNTOOL_VAULT_URL environment variable).")
+    # Profiling
+    parser_main.add_argument("--profile", metavar="FILE",
+                             help="Profile tracked functions and write results to FILE on exit, "
+                                  "JSON if its name ends with .json, Prometheus text otherwise.")
     return parser_main
 
 
@@ -42,6 +55,63 @@ def install() -> bool:
     return False
 
 
+def query(command, local=False, **arguments):
+    u"""Answer a query by a running daemon (see daemon.py), or in this process if there is none."""
+    if not local:
+        import daemon
+        try:
+            return daemon.query(command, **arguments)
+        except OSError:
+            logging.debug("No daemon is running, answering {} locally.".format(command))
+    if command == "ls":
+        from discovery import Discovery
+        return [{"title": m.title, "path": m.path} for m in Discovery().modules()]
+    if command == "disk_usage":
+        import diskusage
+        return diskusage.DiskUsage().report(arguments["edition"])
+    if command == "search":
+        import search
+        return [hit._asdict() for hit in search.refresh().search(arguments["query"])]
+    raise ValueError(command)
+
+
+def commands(args, ch):
+    u"""Check for arguments from CLI, heavy modules are imported only by commands which need them."""
+    logger = logging.getLogger()
+    if args.daemon:
+        import daemon
+        daemon.Daemon(watch=True).serve_forever()
+        return
+    if args.ls:
+        modules = query("ls", args.no_daemon)
+        if args.json:
+            print(json.dumps(modules, indent=2))
+        else:
+            for m in modules:
+                print("{} ({})".format(m["title"], m["path"]))
+        return
+    if args.disk_usage is not None:
+        import diskusage
+        report = query("disk_usage", args.no_daemon, edition=args.disk_usage)
+        print(json.dumps(report, indent=2) if args.json else diskusage.table(report))
+        return
+    if args.search:
+        hits = query("search", args.no_daemon, query=args.search)
+        if args.json:
+            print(json.dumps(hits, indent=2))
+        else:
+            for hit in hits:
+                print("{:6.2f} {:5s} {:40s} {}".format(hit["score"], hit["kind"], hit["title"][:40], hit["id"]))
+        return
+    if args.run:
+        # Add additional logging
+        ch.setLevel(logging.DEBUG)
+
+        from mainLib import Shell
+        logger.debug("Running CLI")
+        Shell().cmdloop(intro="Welcome in NWNTool.")
+
+
 def main(*args, **kwargs):
     # Arguments from parser
     parser = parser_func()
@@ -73,14 +143,19 @@ def main(*args, **kwargs):
     session = Session()
     session.debug = True if debug else False
 
-    # Check for arguments from CLI
-    if args.run:
-        # Add additional logging
-        ch.setLevel(logging.DEBUG)
-
-        from mainLib import Shell
-        logger.debug("Running CLI")
-        Shell().cmdloop(intro="Welcome in NWNTool.")
+    if args.vault_url:
+        import scrapper
+        scrapper.set_base_url(args.vault_url)
+
+    if args.profile:
+        import session as profiling
+        profiling.enable_profiling()
+        try:
+            commands(args, ch)
+        finally:
+            profiling.dump_profiles(args.profile)
+    else:
+        commands(args, ch)
 
     # Test purpose only
     # nwn_diamond, nwn_ee = mainLib.main()
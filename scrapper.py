@@ -1,9 +1,14 @@
 from bs4 import BeautifulSoup
 import requests
 import re
+import copy
+import pathlib
+from urllib.parse import urlsplit
 import validators
 from exceptions import InvalidUrl
+from session import register, count_bytes
 import sys
+import os
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +17,7 @@ logger = logging.getLogger(__name__)
 class Website:
 
     def __init__(self, address):
-        if validators.url(address):
+        if validators.url(address, simple_host=True):
             self.website = address
         else:
             raise InvalidUrl
@@ -21,10 +26,27 @@ class Website:
         return self.website
 
 
-website_root = Website("https://neverwintervault.org")
-website_2 = Website("https://neverwintervault.org/article/reference/campaigns-and-module-series-list-nwn1")
-website_with_module = Website("https://neverwintervault.org/project/nwn1/module/enigma-island-complete")
-website_with_patch = Website("https://neverwintervault.org/project/nwnee/other/patch/community-music-pack-fix-nwnee")
+DEFAULT_BASE_URL = "https://neverwintervault.org"
+CAMPAIGNS_PATH = "/article/reference/campaigns-and-module-series-list-nwn1"
+MODULE_PATH = "/project/nwn1/module/enigma-island-complete"
+PATCH_PATH = "/project/nwnee/other/patch/community-music-pack-fix-nwnee"
+
+
+def set_base_url(url: str):
+    u"""Point the scrapper at another vault, e.g. a local mockvault.MockVault. Rebuilds website_* addresses."""
+    global base_url, website_root, website_2, website_with_module, website_with_patch
+    url = url.rstrip("/")
+    website_root = Website(url)
+    base_url = url
+    website_2 = Website(url + CAMPAIGNS_PATH)
+    website_with_module = Website(url + MODULE_PATH)
+    website_with_patch = Website(url + PATCH_PATH)
+    logger.debug("Vault base url: {}".format(url))
+
+
+base_url = DEFAULT_BASE_URL
+website_root = website_2 = website_with_module = website_with_patch = None
+set_base_url(os.environ.get("NWNTOOL_VAULT_URL", DEFAULT_BASE_URL))
 
 
 class REPatterns:
@@ -48,53 +70,134 @@ class REPatterns:
         }
 
 
-def request_http(website_str: str):
+@register
+def fetch(url: str, session=None, **kwargs) -> requests.Response:
+    u"""Send a GET request, through a given requests.Session if any, so connections can be kept alive."""
+    getter = session.get if session is not None else requests.get
+    response = getter(url, **kwargs)
+    if not kwargs.get("stream"):
+        count_bytes(len(response.content))
+    return response
+
+
+cache = None  # httpcache.ResponseCache of vault pages, see enable_cache
+fast_parser = True  # parse module pages with vaultparser instead of the reference BeautifulSoup parser
+
+
+def enable_cache(directory=None, **kwargs):
+    u"""Cache pages fetched by request_http and scrap_nvn_vault on disk, by default in program's main directory.
+        The index of the cache is written at exit of the program too."""
+    global cache
+    import atexit
+    import httpcache
+    cache = httpcache.ResponseCache(directory, **kwargs)
+    atexit.unregister(_flush_cache)
+    atexit.register(_flush_cache)
+    return cache
+
+
+def _flush_cache():
+    try:
+        disable_cache()
+    except OSError as excep:
+        logger.error("Could not write index of http cache: {}".format(excep))
+
+
+def disable_cache():
+    global cache
+    if cache is not None:
+        cache.flush()
+    cache = None
+
+
+def get_page(url: str, session=None, **kwargs):
+    u"""Get a page through the cache if it is enabled. Raise requests.HTTPError on error status."""
+    if cache is not None:
+        return cache.get(url, session, **kwargs)
+    response = fetch(url, session, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+def _parsed(response, parser):
+    u"""Parse a page, unless a result of parsing the same, unmodified page is cached."""
+    if getattr(response, "from_cache", False) and response.parsed is not None:
+        return copy.deepcopy(response.parsed)
+    result = parser(response.text)
+    if cache is not None:
+        cache.store_parsed(response.url, copy.deepcopy(result))
+    return result
+
+
+def parse_links(html: str) -> list:
+    soup = BeautifulSoup(html, "html.parser")
+    return [link.get('href') for link in soup.find_all('a', attrs={'href': REPatterns.http})]
+
+
+def request_http(website_str: str, session=None):
     logger.debug("Attempting to send request to host: {}".format(website_str))
-    response = requests.get(website_str)
-    soup = BeautifulSoup(response.text, "html.parser")
-    for link in soup.find_all('a', attrs={'href': REPatterns.http}):
-        yield link.get('href')
+    response = get_page(website_str, session)
+    for link in _parsed(response, parse_links):
+        yield link
 
 
-def create_list_of_links() -> list:
+@register
+def create_list_of_links(session=None) -> list:
     result = []
-    for e in request_http(website_2.www()):
+    for e in request_http(website_2.www(), session):
         if REPatterns.nwn1.search(e):
             result.append(e)
     return result
 
 
-def scrap_nvn_vault(website: Website) -> dict:
+@register
+def scrap_nvn_vault(website: Website, session=None) -> dict:
     u"""Scrapper for page with module data on neverwintervault.org.
         Return a dictionary."""
-    result = {"href": "",
-              "title": "",
-              "size": 0,
-              "compression": "",
-              "author": None,
-              "last_changed": None,
-              "version": "Release",
-              "game": "",
-              "category": "",
-              "tags": [],
-              "required projects": [],
-              "related projects": [],
-              "requirements": []
-              }
     try:
-        response = requests.get(website.www())
+        return scrap_page(website.www(), session)
     except (requests.RequestException, requests.ConnectionError, requests.HTTPError, requests.Timeout):
         logger.error(sys.exc_info())
         sys.exit()
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    link = soup.find("a", attrs={"href": REPatterns.module_src})
-
-    website_root = Website("https://neverwintervault.org")
 
+@register
+def scrap_page(url: str, session=None, **kwargs) -> dict:
+    u"""Fetch and parse a module page, without any error handling."""
+    return parse_page(get_page(url, session, **kwargs))
+
+
+def parse_page(response) -> dict:
+    u"""Parse a response with a module page, reusing cached result if the page has not changed."""
+    if fast_parser:
+        import vaultparser
+        return _parsed(response, vaultparser.parse_nvn_vault)
+    return _parsed(response, parse_nvn_vault)
+
+
+def new_result() -> dict:
+    u"""Empty result of parsing a module page."""
+    return {"href": "",
+            "title": "",
+            "size": 0,
+            "compression": "",
+            "author": None,
+            "last_changed": None,
+            "version": "Release",
+            "game": "",
+            "category": "",
+            "tags": [],
+            "required projects": [],
+            "related projects": [],
+            "requirements": []
+            }
+
+
+def fill_link(result: dict, link):
+    u"""Fill result with data of a link to the module archive. Link is any mapping of attributes of <a> tag."""
     from urllib.parse import urljoin
     # Get a link as a str
-    result["href"] = urljoin(website_root.www(), link["href"])
+    result["href"] = urljoin(base_url, link["href"])
     logger.debug("Link found: {}".format(result["href"]))
 
     # Get a title
@@ -109,21 +212,17 @@ def scrap_nvn_vault(website: Website) -> dict:
     # Get a compression
     result["compression"] = link["type"][re.search("/", link["type"]).start() + 1: re.search(";", link["type"]).start()]
 
-    # Get an author's name
-    _string = soup.find("span", attrs={"class", re.compile("username")})
-    if _string:
-        result["author"] = re.split("/", _string["about"])[-1]
 
+def fill_fields(result: dict, texts: dict):
+    u"""Fill result with text of fields, texts maps keys of REPatterns.Module.strings_dict to text or None."""
     # Get last change date
-    _string = soup.find("div", attrs={"class", re.compile(REPatterns.Module.strings_dict[1])})
-    if _string:
-        _date = "-".join(filter(lambda x: x != '', re.split("\D", _string.text)))
+    if texts.get(1) is not None:
+        _date = "-".join(filter(lambda x: x != '', re.split(r"\D", texts[1])))
         result["last_changed"] = _date
 
     def get_result_value(i: int, splitter=":"):
-        __string = soup.find("div", attrs={"class", re.compile(REPatterns.Module.strings_dict[i])})
-        if __string:
-            __key, *__value = re.split(splitter, __string.text)
+        if texts.get(i) is not None:
+            __key, *__value = re.split(splitter, texts[i])
             __key = __key.lower()
             for item in __value:
                 __value.remove(item)
@@ -144,36 +243,81 @@ def scrap_nvn_vault(website: Website) -> dict:
         if key and value:
             result[key] = value
 
+
+def parse_nvn_vault(html: str) -> dict:
+    u"""Parse html of a module page on neverwintervault.org with BeautifulSoup. Return a dictionary.
+        This is the reference parser, vaultparser.parse_nvn_vault is a faster equivalent."""
+    result = new_result()
+    soup = BeautifulSoup(html, "html.parser")
+    link = soup.find("a", attrs={"href": REPatterns.module_src})
+    fill_link(result, link)
+
+    # Get an author's name
+    _string = soup.find("span", attrs={"class", re.compile("username")})
+    if _string:
+        result["author"] = re.split("/", _string["about"])[-1]
+
+    texts = {}
+    for i in (1, 2, 3, 4, 5, 6, 7, 9, 11):
+        _string = soup.find("div", attrs={"class", re.compile(REPatterns.Module.strings_dict[i])})
+        texts[i] = _string.text if _string else None
+    fill_fields(result, texts)
+
     return result
 
 
 class ScrappedModule:
+    u"""Module scrapped from the vault. Downloaded archive stays on disk (see download),
+        file holds content of the archive only if it was given explicitly."""
 
-    def __init__(self, name=None, file=None, compression=None, *args, **kwargs):
+    def __init__(self, name=None, file=None, compression=None, *args, download=None, **kwargs):
         self.name = name
         self.file = file
         self.compression = compression
+        self.download = download  # downloader.Download
         logger.debug("Compression of a file: {}".format(self.compression))
         self.args = args
         self.kwargs = kwargs
 
+    @property
+    def path(self):
+        return self.download.path if self.download is not None else None
+
     def save_file(self, path):
+        if self.download is not None:
+            import shutil
+            shutil.move(str(self.download.path), str(path))
+            self.download.path = pathlib.Path(path)
+            return
         with open(path, "wb") as file:
             file.write(self.file)
 
 
-def download_module_from_website(www: str):
+@register
+def download_module_from_website(www: str, directory=None, session=None, progress=None):
+    u"""Scrap a module page and stream the archive to a file in directory, by default
+        'downloads' in program's main directory. Interrupted downloads are resumed on the next call.
+        :progress - callable(downloaded bytes, expected size), see downloader.download."""
     www = Website(www)
-    data = scrap_nvn_vault(www)
+    data = scrap_nvn_vault(www, session)
+    return download_scrapped_module(data, directory, session, progress)
+
+
+@register
+def download_scrapped_module(data: dict, directory=None, session=None, progress=None):
+    u"""Download archive of a module from data returned by scrap_nvn_vault."""
+    import downloader
     url = data["href"]
-    if not validators.url(url):
+    if not validators.url(url, simple_host=True):
         raise InvalidUrl
 
+    directory = pathlib.Path(directory) if directory else downloader.default_directory()
+    path = directory.joinpath(pathlib.PurePosixPath(urlsplit(url).path).name)
     logger.debug("Attempting to send a request at address {}".format(url))
-    r = requests.get(url, allow_redirects=True)
-    logger.debug("Received a response: {}".format(r))
+    download = downloader.download(url, path, expected_size=data["size"], session=session, progress=progress)
+    logger.debug("Received a file: {}".format(download))
 
-    module = ScrappedModule(data["title"], r.content, compression=data["compression"], kwargs=data)
+    module = ScrappedModule(data["title"], compression=data["compression"], download=download, kwargs=data)
     logger.debug("Returning module with data.")
 
     return module
@@ -0,0 +1,317 @@
+"""
+    Search of modules on disk and in the vault catalog.
+    Titles, authors, tags, language and category are tokenized into an inverted index (token: document: weight),
+    a trigram index over the vocabulary finds tokens similar to a misspelled one, so a query costs a few dict
+    lookups instead of a scan of all modules. The index is stored on disk and documents are added, replaced
+    and removed one by one.
+"""
+from bisect import bisect_left
+from collections import namedtuple
+import json
+import logging
+import os
+import pathlib
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_NAME = "search_index.json"
+_VERSION = 1
+
+WEIGHTS = {"title": 3.0, "author": 2.0, "tags": 1.5, "category": 1.0, "language": 1.0}
+PREFIX_FACTOR = 0.7
+SIMILARITY = 0.2  # minimal trigram similarity of a candidate for a misspelled token
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+Hit = namedtuple("Hit", ("id", "kind", "title", "score"))
+
+
+def default_path() -> pathlib.Path:
+    import Config
+    return pathlib.Path(Config.config.config.program_config.main_directory).joinpath(DEFAULT_FILE_NAME)
+
+
+def tokenize(text) -> list:
+    return _TOKEN.findall(str(text).lower()) if text else []
+
+
+def trigrams(token: str) -> set:
+    padded = "  " + token + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def distance(a: str, b: str, limit: int) -> int:
+    u"""Damerau-Levenshtein (optimal string alignment) distance of two strings, limit + 1 if it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def module_stamp(size, mtime_ns) -> str:
+    u"""Stamp of a local module, see SearchIndex.stamp."""
+    return "{}:{}".format(size, mtime_ns)
+
+
+def _fields_of_module(module) -> dict:
+    author = getattr(module, "author", None)
+    if author is not None and not isinstance(author, str):
+        author = " ".join(filter(None, (getattr(author, "name", ""), getattr(author, "surname", ""))))
+    is_default = getattr(module, "is_default", None)
+    tags = None if is_default is not None and is_default("tags") else getattr(module, "tags", None)  # no copy
+    return {"title": module.title, "author": author, "tags": " ".join(tags or []),
+            "language": getattr(module, "language", None), "category": None}
+
+
+def _fields_of_record(record: dict) -> dict:
+    return {"title": record.get("title"), "author": record.get("author"),
+            "tags": " ".join(record.get("tags") or []), "language": record.get("language"),
+            "category": record.get("category")}
+
+
+class SearchIndex:
+    u"""Inverted and trigram index of modules.
+        Documents are local modules (kind 'local', id is a path) and vault records (kind 'vault', id is 'www')."""
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path) if path else default_path()
+        self._documents = {}  # id: [kind, title, stamp, {token: weight}]
+        self._postings = {}  # token: {id: weight}
+        self._trigrams = {}  # trigram: set of tokens
+        self._vocabulary = None  # sorted tokens for prefix queries, built on demand
+        self._similar = {}  # token of a query: [(token, factor), ...]
+        self._changed = False
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fi:
+                data = json.load(fi)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.error("Corrupted search index, starting with an empty one: {}".format(self.path))
+            return
+        if data.get("version") != _VERSION:
+            return
+        for doc_id, document in data["documents"].items():
+            self._insert(doc_id, *document)
+        self._changed = False
+        logger.debug("Loaded search index of {} documents from {}.".format(len(self._documents), self.path))
+
+    def save(self):
+        u"""Write the index to disk, if anything has changed."""
+        with self._lock:
+            if not self._changed:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fo:
+                json.dump({"version": _VERSION, "documents": self._documents}, fo)
+            os.replace(tmp, self.path)
+            self._changed = False
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, doc_id):
+        return str(doc_id) in self._documents
+
+    def stamp(self, doc_id):
+        u"""Stamp given when a document was added, documents with an unchanged stamp need not be added again."""
+        document = self._documents.get(str(doc_id))
+        return document[2] if document else None
+
+    # Updates
+
+    def _insert(self, doc_id, kind, title, stamp, tokens):
+        self._documents[doc_id] = [kind, title, stamp, tokens]
+        for token, weight in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                for trigram in trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+                self._vocabulary = None
+                self._similar.clear()
+            postings[doc_id] = weight
+        self._changed = True
+
+    def _delete(self, doc_id):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        for token in document[3]:
+            postings = self._postings[token]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[token]
+                for trigram in trigrams(token):
+                    tokens = self._trigrams[trigram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[trigram]
+                self._vocabulary = None
+                self._similar.clear()
+        self._changed = True
+
+    def add(self, doc_id, kind, fields: dict, stamp=None):
+        u"""Add or replace a document.
+            :fields - dict, name of a field from WEIGHTS: text."""
+        doc_id = str(doc_id)
+        tokens = {}
+        for field, text in fields.items():
+            weight = WEIGHTS.get(field, 1.0)
+            for token in tokenize(text):
+                tokens[token] = max(tokens.get(token, 0.0), weight)
+        with self._lock:
+            self._delete(doc_id)
+            self._insert(doc_id, kind, str(fields.get("title") or ""), stamp, tokens)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._delete(str(doc_id))
+
+    def add_module(self, module, stamp=None):
+        u"""Add a mainLib.ModuleInDir (or any Module with a path)."""
+        self.add(module.path, "local", _fields_of_module(module), stamp)
+
+    def add_record(self, record: dict):
+        u"""Add a record of a module scrapped from the vault (see catalog.CatalogStore)."""
+        self.add(record["www"], "vault", _fields_of_record(record), record.get("last_changed"))
+
+    def update(self, kind, documents) -> int:
+        u"""Synchronize all documents of a kind, documents of this kind not listed are removed.
+            :documents - iterable of (id, fields, stamp), a document with an unchanged stamp is skipped.
+            Return number of documents added or replaced."""
+        added = 0
+        seen = set()
+        with self._lock:
+            for doc_id, fields, stamp in documents:
+                doc_id = str(doc_id)
+                seen.add(doc_id)
+                if stamp is not None and self.stamp(doc_id) == stamp and doc_id in self._documents:
+                    continue
+                self.add(doc_id, kind, fields, stamp)
+                added += 1
+            for doc_id in [d for d, document in self._documents.items() if document[0] == kind and d not in seen]:
+                self._delete(doc_id)
+        return added
+
+    def update_modules(self, modules) -> int:
+        u"""Synchronize local modules, stamped with size and mtime of their files."""
+        def documents():
+            for module in modules:
+                try:
+                    st = os.stat(module.path)
+                    stamp = module_stamp(st.st_size, st.st_mtime_ns)
+                except OSError:
+                    stamp = None
+                yield module.path, _fields_of_module(module), stamp
+        return self.update("local", documents())
+
+    def update_catalog(self, records) -> int:
+        u"""Synchronize vault records, stamped with their last changed date."""
+        return self.update("vault", ((r["www"], _fields_of_record(r), r.get("last_changed")) for r in records))
+
+    # Queries
+
+    def _sorted_vocabulary(self) -> list:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        return self._vocabulary
+
+    def _expand(self, token) -> list:
+        u"""Tokens of the index matching a token of a query: [(token, factor), ...]."""
+        expansion = self._similar.get(token)
+        if expansion is not None:
+            return expansion
+        expansion = []
+        if token in self._postings:
+            expansion.append((token, 1.0))
+        vocabulary = self._sorted_vocabulary()
+        i = bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            if vocabulary[i] != token:
+                expansion.append((vocabulary[i], PREFIX_FACTOR))
+            i += 1
+        if not expansion and len(token) > 2:
+            # Typo: candidates share trigrams with the token, verified by edit distance
+            grams = trigrams(token)
+            common = {}
+            for trigram in grams:
+                for candidate in self._trigrams.get(trigram, ()):
+                    common[candidate] = common.get(candidate, 0) + 1
+            limit = 1 if len(token) <= 5 else 2
+            for candidate, count in common.items():
+                if count / (len(grams) + len(candidate) + 1 - count) < SIMILARITY:
+                    continue
+                d = distance(token, candidate, limit)
+                if d <= limit:
+                    expansion.append((candidate, 1.0 / (1 + d)))
+        self._similar[token] = expansion
+        return expansion
+
+    def search(self, query: str, limit=20, kind=None) -> list:
+        u"""Ranked list of Hit. Documents matching more words of a query come first, then by score.
+            :kind - 'local' or 'vault' to search only one kind of documents."""
+        with self._lock:
+            scores = {}
+            matched = {}
+            for token in dict.fromkeys(tokenize(query)):
+                best = {}
+                for candidate, factor in self._expand(token):
+                    for doc_id, weight in self._postings[candidate].items():
+                        score = weight * factor
+                        if score > best.get(doc_id, 0.0):
+                            best[doc_id] = score
+                for doc_id, score in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+                    matched[doc_id] = matched.get(doc_id, 0) + 1
+            documents = self._documents
+            if kind is not None:
+                scores = {d: s for d, s in scores.items() if documents[d][0] == kind}
+            ranked = sorted(scores, key=lambda d: (-matched[d], -scores[d], documents[d][1]))[:limit]
+            return [Hit(d, documents[d][0], documents[d][1], scores[d]) for d in ranked]
+
+
+_shared = None
+
+
+def shared() -> SearchIndex:
+    u"""Index stored in program's main directory."""
+    global _shared
+    if _shared is None:
+        _shared = SearchIndex()
+    return _shared
+
+
+def refresh(index=None, modules=None, catalog=None) -> SearchIndex:
+    u"""Update an index with modules found on disk (discovery.Discovery by default) and records
+        of the vault catalog (catalog.CatalogStore, if it exists)."""
+    index = index if index is not None else shared()
+    if modules is None:
+        from discovery import Discovery
+        modules = Discovery().modules()
+    index.update_modules(modules)
+    if catalog is None:
+        import catalog as catalog_module
+        if catalog_module.default_path().exists():
+            with catalog_module.CatalogStore() as store:
+                index.update_catalog(store)
+    else:
+        index.update_catalog(catalog)
+    index.save()
+    return index
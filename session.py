@@ -1,9 +1,154 @@
 import singleton
 import os
 import logging
+from bisect import bisect_left
+import functools
+import json
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds of latency histogram buckets, seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+_profiling = False
+_local = threading.local()  # stack of profiles of functions running in a thread
+profiles = {}  # qualified name of a registered function: FunctionProfile
+
+
+class FunctionProfile:
+    u"""Calls, errors, wall time, latency histogram and bytes read or downloaded by a registered function.
+        Time and bytes are inclusive: they count nested registered functions too."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.min = None
+        self.max = 0.0
+        self.bytes = 0
+        self.histogram = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.seconds += seconds
+            self.min = seconds if self.min is None else min(self.min, seconds)
+            self.max = max(self.max, seconds)
+            self.histogram[bisect_left(BUCKETS, seconds)] += 1
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes += count
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "errors": self.errors, "seconds": self.seconds, "min": self.min or 0.0,
+                "max": self.max, "bytes": self.bytes,
+                "histogram": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], self.histogram))}
+
+    def __repr__(self):
+        return "{0}: {1} calls, {2} errors, {3:.3f} s, {4} bytes".format(self.name, self.calls, self.errors,
+                                                                         self.seconds, self.bytes)
+
+
+def _instrument(function):
+    u"""Wrap a function to record its profile. A disabled profiler costs one flag check per call."""
+    profile = profiles.setdefault(function.__qualname__, FunctionProfile(function.__qualname__))
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _profiling:
+            return function(*args, **kwargs)
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(profile)
+        error = False
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            profile.record(time.perf_counter() - start, error)
+            stack.pop()
+    return wrapper
+
+
+def enable_profiling(enabled=True):
+    global _profiling
+    _profiling = enabled
+
+
+def is_profiling() -> bool:
+    return _profiling
+
+
+def count_bytes(count):
+    u"""Add bytes read or downloaded to all registered functions running in this thread."""
+    if _profiling:
+        for profile in getattr(_local, "stack", ()):
+            profile.add_bytes(count)
+
+
+def reset_profiles():
+    for profile in profiles.values():
+        profile.clear()
+
+
+def profiles_table() -> str:
+    lines = ["{:40s} {:>7s} {:>6s} {:>10s} {:>10s} {:>10s} {:>12s}".format(
+        "function", "calls", "errors", "total ms", "mean ms", "max ms", "bytes")]
+    for name, p in sorted(profiles.items()):
+        lines.append("{:40s} {:7d} {:6d} {:10.1f} {:10.2f} {:10.2f} {:12d}".format(
+            name[-40:], p.calls, p.errors, p.seconds * 1000, p.seconds * 1000 / p.calls if p.calls else 0.0,
+            p.max * 1000, p.bytes))
+    return "\n".join(lines)
+
+
+def profiles_prometheus() -> str:
+    u"""Profiles in Prometheus text exposition format."""
+    lines = ["# HELP nwntool_function_calls_total Calls of a registered function.",
+             "# TYPE nwntool_function_calls_total counter"]
+    lines += ['nwntool_function_calls_total{{function="{}"}} {}'.format(n, p.calls) for n, p in sorted(profiles.items())]
+    lines += ["# HELP nwntool_function_errors_total Calls of a registered function which raised an exception.",
+              "# TYPE nwntool_function_errors_total counter"]
+    lines += ['nwntool_function_errors_total{{function="{}"}} {}'.format(n, p.errors)
+              for n, p in sorted(profiles.items())]
+    lines += ["# HELP nwntool_function_bytes_total Bytes read or downloaded by a registered function.",
+              "# TYPE nwntool_function_bytes_total counter"]
+    lines += ['nwntool_function_bytes_total{{function="{}"}} {}'.format(n, p.bytes) for n, p in sorted(profiles.items())]
+    lines += ["# HELP nwntool_function_duration_seconds Wall time of calls of a registered function.",
+              "# TYPE nwntool_function_duration_seconds histogram"]
+    for name, p in sorted(profiles.items()):
+        cumulative = 0
+        for bound, count in zip([str(b) for b in BUCKETS] + ["+Inf"], p.histogram):
+            cumulative += count
+            lines.append('nwntool_function_duration_seconds_bucket{{function="{}",le="{}"}} {}'.format(
+                name, bound, cumulative))
+        lines.append('nwntool_function_duration_seconds_sum{{function="{}"}} {}'.format(name, p.seconds))
+        lines.append('nwntool_function_duration_seconds_count{{function="{}"}} {}'.format(name, p.calls))
+    return "\n".join(lines) + "\n"
+
+
+def dump_profiles(path, fmt=None):
+    u"""Write profiles to a file, fmt 'json' or 'prometheus', by default chosen by extension (.json or other)."""
+    fmt = fmt or ("json" if str(path).endswith(".json") else "prometheus")
+    with open(path, "w", encoding="utf-8") as fo:
+        if fmt == "json":
+            json.dump({name: p.to_dict() for name, p in sorted(profiles.items())}, fo, indent=2)
+        else:
+            fo.write(profiles_prometheus())
+    logger.debug("Dumped profiles to {}.".format(path))
+
 
 class Session(metaclass=singleton.Singleton):
     u"""Class representing running session. Should collect all info needed for interactive usage."""
@@ -14,10 +159,32 @@ class Session(metaclass=singleton.Singleton):
         self.tracked_directories = []
         self.tracked_objects = {}
         self.tracked_functions = {}
+        for function in _pending:
+            self.track(function)
+        _pending.clear()
 
         logger.debug("Starting a new session!")
 
+    @property
+    def profiles(self) -> dict:
+        return profiles
+
+    def track(self, function):
+        self.tracked_functions[function.__qualname__] = function
+        logger.debug("Tracking a function: {}".format(function.__qualname__))
+
     def register(self, function):
-        self.tracked_functions[function.__name__] = function
-        logger.debug("Calling a function: {}".format(function.__name__))
-        return function
+        u"""Decorator tracking a function and recording its profile, see enable_profiling."""
+        self.track(function)
+        return _instrument(function)
+
+
+_pending = []  # functions registered before the session was created
+
+
+def register(function):
+    u"""Decorator registering a function in the session, the session is not created just to register it."""
+    if Session in singleton.Singleton._instances:
+        return Session().register(function)
+    _pending.append(function)
+    return _instrument(function)
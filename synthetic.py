@@ -0,0 +1,144 @@
+"""
+    Generator of synthetic NWN installations (Diamond and Enhanced Edition directory trees) for tests
+    and benchmarks. Modules and hakpacks are valid ERF files (see erf.py) with a module.ifo listing hakpacks
+    of a module, music and movies start with headers of their formats. Files are sparse, so big trees
+    take little space, and generation is deterministic for a given seed.
+"""
+from collections import namedtuple
+import json
+import os
+import pathlib
+import random
+
+import erf
+
+# Layout of editions: edition: (install directory, local directory), None when local is the install one
+LAYOUT = {"DE": ("NWN Diamond", None),
+          "EE": ("Neverwinter Nights", "Neverwinter Nights local")}
+SUBDIRECTORIES = {".mod": "modules", ".hak": "hak", ".bmu": "music", ".bik": "movies"}
+# Share of files of each type
+MIX = {".mod": 0.2, ".hak": 0.4, ".bmu": 0.3, ".bik": 0.1}
+# (smallest, biggest) size of files of each type, bytes
+SIZES = {".mod": (4 * 1024, 512 * 1024), ".hak": (16 * 1024, 4 * 1024 * 1024),
+         ".bmu": (64 * 1024, 2 * 1024 * 1024), ".bik": (1024 * 1024, 32 * 1024 * 1024)}
+# Words of titles and authors of synthetic catalog records
+WORDS = ("dark", "tower", "shadow", "keep", "crypt", "dragon", "lost", "city", "river", "oath", "blade", "winter",
+         "moon", "temple", "forest", "king", "ruins", "storm", "night", "fire", "island", "witch", "throne", "gate")
+GAMES = ("NWN1", "NWN EE", "NWN2")
+CATEGORIES = ("Modules", "Hakpacks", "Prefabs", "Tools")
+LANGUAGES = ("English", "German", "French", "Polish", "Spanish")
+MTIME_NS = 10 ** 18  # mtime of generated directories, far from the racy window of fsindex
+
+Tree = namedtuple("Tree", ("root", "roots", "files", "bytes", "modules", "duplicates"))
+
+
+def _header(extension, number) -> bytes:
+    if extension == ".bmu":
+        return b"BMU V1.0" + b"\xff\xfb" + number.to_bytes(4, "little")
+    return b"BIKi" + number.to_bytes(4, "little")
+
+
+def _write(path, extension, number, size, haks):
+    u"""Write a file of a given type and size, its content depends on number only (equal numbers, equal files)."""
+    if extension == ".mod":
+        ifo = erf.build_module_ifo("Module {}".format(number), haks=haks)
+        erf.write_erf(path, [("module", erf.RES_TYPE_IFO, ifo)], b"MOD ")
+    elif extension == ".hak":
+        erf.write_erf(path, [("hak{}".format(number), 10, "hakpack {}".format(number).encode())], b"HAK ")
+    else:
+        with open(path, "wb") as fo:
+            fo.write(_header(extension, number))
+    if size > os.path.getsize(path):
+        os.truncate(path, size)  # sparse
+
+
+def _pair(paths) -> list:
+    u"""(install, local) directories of an edition, local is the install one if there is no other."""
+    return [paths[0], paths[-1]] if paths else [None, None]
+
+
+def edition_roots(root, editions=tuple(LAYOUT)) -> dict:
+    u"""Game directories of editions in a synthetic tree, edition: list of directories (install, local)."""
+    root = pathlib.Path(root)
+    return {edition: [str(root / d) for d in LAYOUT[edition] if d] for edition in editions}
+
+
+def generate(root, files=1000, editions=tuple(LAYOUT), mix=None, sizes=None, duplicates=0.0, haks=2,
+             seed=0) -> Tree:
+    u"""Build a synthetic installation in root.
+        :files - number of files, spread over all game directories of editions,
+        :mix - dict, extension: share of files, see MIX,
+        :sizes - dict, extension: (smallest, biggest) size in bytes, see SIZES,
+        :duplicates - share of files which are copies of other files of the same type,
+        :haks - number of hakpacks listed in module.ifo of each module, chosen among generated hakpacks.
+        Return Tree(root, roots by edition, files, bytes, number of modules, number of duplicates)."""
+    root = pathlib.Path(root)
+    mix = mix or MIX
+    sizes = sizes or SIZES
+    rng = random.Random(seed)
+    roots = edition_roots(root, editions)
+    directories = [r for paths in roots.values() for r in paths]
+    for directory in directories:
+        for sub in SUBDIRECTORIES.values():
+            os.makedirs(os.path.join(directory, sub), exist_ok=True)
+
+    extensions = rng.choices(list(mix), weights=list(mix.values()), k=files)
+    hak_names = ["hak{}".format(n) for n, ext in enumerate(extensions) if ext == ".hak"]
+    written = {ext: [] for ext in mix}  # extension: [(number, size)], sources of duplicates
+    total, modules, copies = 0, 0, 0
+    for n, extension in enumerate(extensions):
+        if written[extension] and rng.random() < duplicates:
+            number, size = rng.choice(written[extension])
+            copies += 1
+        else:
+            number, size = n, rng.randint(*sizes[extension])
+            written[extension].append((number, size))
+        listed = ()
+        if extension == ".mod":  # copies of a module list the same hakpacks
+            listed = random.Random(number).sample(hak_names, min(haks, len(hak_names)))
+        path = os.path.join(directories[n % len(directories)], SUBDIRECTORIES[extension],
+                            "{}{}{}".format(SUBDIRECTORIES[extension], n, extension))
+        _write(path, extension, number, size, listed)
+        total += os.path.getsize(path)
+        modules += extension == ".mod"
+
+    for directory in directories:
+        os.utime(directory, ns=(MTIME_NS, MTIME_NS))
+        for sub in SUBDIRECTORIES.values():
+            os.utime(os.path.join(directory, sub), ns=(MTIME_NS, MTIME_NS))
+    return Tree(str(root), roots, files, total, modules, copies)
+
+
+def catalog_records(count=1000, seed=0):
+    u"""Generate records of vault module pages like catalog.CatalogStore stores them, some fields are empty."""
+    rng = random.Random(seed)
+    for number in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        yield {"www": "https://neverwintervault.org/project/nwn1/module/m{}".format(number),
+               "title": "{} {}".format(title, number),
+               "author": rng.choice(WORDS).title() + str(rng.randint(1, 500)) if rng.random() < 0.95 else None,
+               "size": rng.randint(1024, 200 * 1024 * 1024) if rng.random() < 0.9 else None,
+               "compression": rng.choice(("zip", "rar", "7z")),
+               "last_changed": "{:04d}-{:02d}-{:02d}".format(rng.randint(2002, 2025), rng.randint(1, 12),
+                                                              rng.randint(1, 28)),
+               "version": "1.{}".format(rng.randint(0, 20)),
+               "game": rng.choice(GAMES), "category": rng.choice(CATEGORIES), "language": rng.choice(LANGUAGES)}
+
+
+def game_config(tree: Tree, edition="EE"):
+    u"""Config.Config of an edition of a tree, for mainLib.NWN."""
+    import Config
+    install, local = _pair(tree.roots[edition])
+    program = Config.ProgramConfig()
+    program.main_directory = tree.root
+    return Config.Config(Config.GameConfig(pathlib.Path(install), pathlib.Path(local)), program)
+
+
+def write_config(tree: Tree, file=None) -> pathlib.Path:
+    u"""Write config.json of a tree, read by discovery.roots_from_config and diskusage.roots_by_edition."""
+    import discovery
+    file = pathlib.Path(file) if file else pathlib.Path(tree.root).joinpath("config.json")
+    values = _pair(tree.roots.get("DE", [])) + _pair(tree.roots.get("EE", []))
+    with open(file, "w", encoding="utf-8") as fo:
+        json.dump(dict(zip(discovery.ROOT_KEYS, values)), fo, indent=2)
+    return file
@@ -0,0 +1,97 @@
+import unittest
+import tempfile
+import threading
+import pathlib
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import scrapper
+from catalog import CatalogStore
+
+page = pathlib.Path(__file__).parent.joinpath("fixtures", "module_page.html").read_text(encoding="utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+    changed = set()
+
+    def do_GET(self):
+        Handler.requests.append(self.path)
+        body = page.replace("18:22", "19:00") if self.path in Handler.changed else page
+        etag = '"{}"'.format(hash(body))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCatalogStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.root = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = pathlib.Path(directory.name)
+        scrapper.enable_cache(self.path.joinpath("cache"))
+        self.addCleanup(scrapper.disable_cache)
+        Handler.requests = []
+        Handler.changed = set()
+
+    def test_incremental_sync(self):
+        links = ["{}/project/nwn1/module/m{}".format(self.root, i) for i in range(5)]
+        with CatalogStore(self.path.joinpath("catalog.sqlite")) as store:
+            report = store.sync(links[:4])
+            self.assertEqual((report.new, report.updated, report.unchanged), (4, 0, 0))
+            self.assertEqual(len(store), 4)
+
+            Handler.changed = {"/project/nwn1/module/m1"}
+            report = store.sync(links[1:])
+            self.assertEqual((report.new, report.updated, report.unchanged, report.removed), (1, 1, 2, 1))
+            self.assertEqual(store.get(links[1])["last_changed"], "14-2020-19-00")
+            self.assertEqual(len(store), 4)
+            self.assertNotIn(links[0], [record["www"] for record in store])
+
+            # Changed dates known from a listing skip requests entirely
+            Handler.requests = []
+            report = store.sync(links[1:], changed=store.changed_dates())
+            self.assertEqual(report.unchanged, 4)
+            self.assertEqual(Handler.requests, [])
+
+    def test_sync_restores_cache(self):
+        links = ["{}/project/nwn1/module/m{}".format(self.root, i) for i in range(2)]
+        cache = scrapper.cache
+        with CatalogStore(self.path.joinpath("catalog.sqlite")) as store:
+            store.sync(links)
+            self.assertIs(scrapper.cache, cache)  # an enabled cache is kept
+
+            scrapper.disable_cache()
+            directory = self.path.joinpath("sync cache")
+            with mock.patch("httpcache.default_directory", return_value=directory):
+                report = store.sync(links)
+            self.assertEqual(report.unchanged, 2)
+            self.assertIsNone(scrapper.cache)  # enabled for the sync only
+            self.assertTrue(directory.joinpath("index.json").is_file())
+
+
+if __name__ == '__main__':
+    unittest.main()
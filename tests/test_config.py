@@ -0,0 +1,41 @@
+import unittest
+import json
+import tempfile
+import pathlib
+
+import Config
+
+
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.original = Config.config.config
+        self.addCleanup(setattr, Config.config, "_config", self.original)
+
+    def test_round_trip(self):
+        game = Config.GameConfig(self.root.joinpath("nwn"), self.root.joinpath("local"))
+        program = Config.ProgramConfig()
+        program.main_directory = str(self.root)
+        Config.config._config = Config.Config(game, program)
+        file = self.root.joinpath("config.json")
+        Config.save(file)
+        self.assertEqual(json.loads(file.read_text())["version"], 1)
+
+        Config.config._config = self.original
+        loaded = Config.load(file).config
+        self.assertEqual(loaded.game_config.path, self.root.joinpath("nwn"))
+        self.assertEqual(loaded.game_config.hak, self.root.joinpath("local", "hak"))
+        self.assertEqual(loaded.program_config.main_directory, str(self.root))
+
+    def test_unknown_version(self):
+        file = self.root.joinpath("config.json")
+        file.write_text(json.dumps({"version": 99}))
+        with self.assertRaises(ValueError):
+            Config.load(file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import threading
+import time
+import pathlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from crawler import Crawler, HostLimiter
+
+page = pathlib.Path(__file__).parent.joinpath("fixtures", "module_page.html").read_bytes()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.endswith("missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCrawler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.root = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_crawl(self):
+        links = ["{}/project/nwn1/module/m{}".format(self.root, i) for i in range(20)]
+        links.append(self.root + "/project/nwn1/module/missing")
+        with Crawler(workers=4, per_host=2) as crawler:
+            results = list(crawler.crawl(links))
+            self.assertEqual(len(crawler._sessions), 1)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(sorted(r["www"] for r in results), sorted(links[:-1]))
+        self.assertEqual(results[0]["compression"], "zip")
+        self.assertEqual(list(crawler.failed), [links[-1]])
+
+    def test_host_limiter_rate(self):
+        limiter = HostLimiter(connections=2, rate=50)
+        start = time.monotonic()
+        for _ in range(6):
+            with limiter:
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 - 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import tempfile
+import pathlib
+import time
+from unittest import mock
+
+import daemon
+from fsindex import DirectoryIndex
+from hakgraph import HakGraph
+from search import SearchIndex
+
+
+def age(path, seconds=1):
+    for directory, _, _ in os.walk(path):
+        os.utime(directory, ns=(0, seconds * 10 ** 9))  # outside of the racy window of the index
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        for name, size in {"diamond/modules/Enigma Island.mod": 10, "ee/modules/Aielund Saga.mod": 30,
+                           "ee/hak/aielund.hak": 20}.items():
+            path = self.root.joinpath(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        age(self.root)
+        self.socket = str(self.root.joinpath("test.sock"))
+        self.daemon = daemon.Daemon(self.socket,
+                                    editions={"DE": [str(self.root.joinpath("diamond"))],
+                                              "EE": [str(self.root.joinpath("ee"))]},
+                                    index=DirectoryIndex(self.root.joinpath("index.json")),
+                                    search_index=SearchIndex(self.root.joinpath("search.json")),
+                                    hak_graph=HakGraph(self.root.joinpath("hak_graph.json")), interval=None)
+        self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+
+    def query(self, command, **args):
+        return daemon.query(command, socket_path=self.socket, **args)
+
+    def test_queries(self):
+        self.assertEqual(sorted(m["title"] for m in self.query("ls")), ["Aielund Saga", "Enigma Island"])
+        self.assertEqual(self.query("search", query="aielnud")[0]["title"], "Aielund Saga")
+        report = self.query("disk_usage", edition="EE")
+        self.assertEqual(report["total"], 50)
+        self.assertIs(self.daemon.command_disk_usage("EE"), self.daemon.command_disk_usage("EE"))  # cached
+        with self.assertRaises(RuntimeError):
+            self.query("unknown")
+
+    def test_incremental_refresh(self):
+        self.assertFalse(self.daemon.refresh())  # nothing has changed, nothing is rebuilt
+        self.root.joinpath("ee", "modules", "Darkness.mod").write_bytes(b"x" * 5)
+        age(self.root, 2)
+        self.assertTrue(self.daemon.refresh())
+        self.assertEqual(len(self.query("ls")), 3)
+        self.assertEqual(self.query("disk_usage", edition="")["total"], 65)
+        self.assertEqual(self.query("search", query="darkness")[0]["kind"], "local")
+
+    def test_refresh_directories(self):
+        self.assertIn(str(self.root.joinpath("ee", "hak", "aielund.hak")), self.daemon.hak_graph.orphaned().values())
+        modules, hak = self.root.joinpath("ee", "modules"), self.root.joinpath("ee", "hak")
+        modules.joinpath("Darkness.mod").write_bytes(b"x" * 5)
+        os.remove(hak.joinpath("aielund.hak"))
+        hak.joinpath("darkness.hak").write_bytes(b"x" * 7)
+        self.daemon.index.forget(str(modules))  # done by the watcher
+        self.daemon.index.forget(str(hak))
+        misses = self.daemon.index.misses
+        with mock.patch("search.refresh") as full, mock.patch("catalog.CatalogStore") as store:
+            self.assertTrue(self.daemon.refresh(directories={str(modules), str(hak)}))
+            self.assertEqual(self.daemon.index.misses - misses, 2)  # other directories are not read
+            self.assertFalse(self.daemon.refresh(directories={str(modules)}))
+        self.assertFalse(full.called or store.called)  # the catalog is not read again
+        self.assertEqual(sorted(m["title"] for m in self.query("ls")), ["Aielund Saga", "Darkness", "Enigma Island"])
+        self.assertEqual(self.query("search", query="darkness")[0]["id"], str(modules.joinpath("Darkness.mod")))
+        self.assertEqual(self.query("disk_usage", edition="EE")["total"], 42)
+        graph = self.daemon.hak_graph
+        self.assertIn(str(modules.joinpath("Darkness.mod")), graph)
+        self.assertEqual(graph.hak_path("aielund"), None)
+        self.assertEqual(graph.hak_path("darkness"), str(hak.joinpath("darkness.hak")))
+        self.assertTrue(self.root.joinpath("hak_graph.json").is_file())
+
+        os.remove(modules.joinpath("Darkness.mod"))
+        self.daemon.index.forget(str(modules))
+        self.assertTrue(self.daemon.refresh(directories={str(modules)}))
+        self.assertNotIn(str(modules.joinpath("Darkness.mod")), graph)
+        self.assertEqual(self.query("search", query="darkness", kind="local"), [])
+
+    def test_repeated_queries_are_fast(self):
+        self.query("disk_usage", edition="")
+        start = time.perf_counter()
+        for _ in range(20):
+            self.query("ls")
+            self.query("disk_usage", edition="")
+        self.assertLess((time.perf_counter() - start) / 40, 0.05)
+
+    def test_shutdown(self):
+        self.assertTrue(self.query("shutdown"))
+        self.daemon.wait()
+        self.assertFalse(os.path.exists(self.socket))
+        with self.assertRaises(OSError):
+            self.query("ping")
+
+
+if __name__ == '__main__':
+    unittest.main()
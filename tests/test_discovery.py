@@ -0,0 +1,54 @@
+import unittest
+import os
+import tempfile
+import pathlib
+
+from discovery import Discovery
+from fsindex import DirectoryIndex
+from mainLib import File
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        files = {"diamond/modules/Enigma Island.mod": 10,
+                 "diamond/hak/enigma.hak": 20,
+                 "diamond/hak/readme.txt": 1,
+                 "ee/modules/Aielund Saga.mod": 30,
+                 "ee/music/mus_theme.bmu": 40,
+                 "ee_local/movies/intro.BIK": 50,
+                 "ee_local/modules/Enigma Island.mod": 10}
+        for name, size in files.items():
+            path = self.root.joinpath(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        os.symlink(self.root.joinpath("diamond", "hak"), self.root.joinpath("ee", "hak"))
+        self.roots = [str(self.root.joinpath(d)) for d in ("diamond", "diamond", "ee", "ee_local", "missing")]
+        self.index = DirectoryIndex(self.root.joinpath("index.json"))
+
+    def test_scan_merges_roots(self):
+        for workers in (None, 1):  # a single worker scans in the calling thread
+            with self.subTest(workers=workers):
+                discovery = Discovery(self.roots, workers=workers, index=self.index)
+                batches = list(discovery.scan())
+                self.assertEqual(len(batches), 6)  # diamond/hak scanned once, through the symlink or directly
+                files = discovery.files
+                self.assertEqual(len(files), 6)
+                self.assertEqual(sorted(f.file_type.name for f in files.values()),
+                                 ["hakpack", "module", "module", "module", "movie", "music"])
+                self.assertEqual(sum(f.size for f in files.values()), 160)
+
+    def test_modules(self):
+        for workers in (None, 1):
+            with self.subTest(workers=workers):
+                modules = list(Discovery(self.roots, workers=workers, index=self.index).modules())
+                self.assertEqual([m.title for m in modules], ["Enigma Island", "Aielund Saga"])  # order of roots
+                self.assertEqual(modules[0].path, str(self.root.joinpath("diamond", "modules", "Enigma Island.mod")))
+                self.assertEqual(modules[0].extension, File.FileType.module)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import json
+import os
+import tempfile
+import pathlib
+from unittest import mock
+
+import Config
+import diskusage
+import discovery
+from fsindex import DirectoryIndex
+
+
+class TestDiskUsage(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        files = {"diamond/modules/Enigma Island.mod": 10,
+                 "diamond/hak/enigma.hak": 20,
+                 "diamond/hak/readme.txt": 1,
+                 "ee/modules/Aielund Saga.mod": 30,
+                 "ee/music/mus_theme.bmu": 40,
+                 "ee_local/movies/intro.BIK": 50,
+                 "ee_local/modules/Enigma Island.mod": 10}
+        for name, size in files.items():
+            path = self.root.joinpath(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        self.roots = {"DE": [str(self.root.joinpath("diamond"))],
+                      "EE": [str(self.root.joinpath(d)) for d in ("ee", "ee_local", "ee")]}
+        self.index = DirectoryIndex(self.root.joinpath("index.json"))
+
+    def test_report(self):
+        report = diskusage.DiskUsage(self.roots, index=self.index).report()
+        self.assertEqual(report["total"], 161)
+        self.assertEqual(report["files"], 7)
+        de, ee = report["editions"]["DE"], report["editions"]["EE"]
+        self.assertEqual((de["total"], ee["total"]), (31, 130))
+        hak = de["directories"][str(self.root.joinpath("diamond", "hak"))]
+        self.assertEqual(hak["types"], {"hakpack": {"files": 1, "bytes": 20}, "other": {"files": 1, "bytes": 1}})
+        json.dumps(report)
+        self.assertIn("total", diskusage.table(report))
+
+    def test_edition(self):
+        report = diskusage.DiskUsage(self.roots, index=self.index).report("DE")
+        self.assertEqual(list(report["editions"]), ["DE"])
+        self.assertEqual(report["total"], 31)
+
+    def test_warm_index(self):
+        for directory, _, _ in os.walk(self.root):
+            os.utime(directory, ns=(0, 10 ** 9))  # outside of the racy window of the index
+        usage = diskusage.DiskUsage(self.roots, index=self.index)
+        usage.report()
+        misses = self.index.misses
+        self.root.joinpath("ee", "modules", "New.mod").write_bytes(b"x" * 5)
+        os.utime(self.root.joinpath("ee", "modules"), ns=(0, 2 * 10 ** 9))
+        report = usage.report()
+        self.assertEqual(report["editions"]["EE"]["total"], 135)
+        self.assertEqual(self.index.misses - misses, 1)
+
+    def test_roots_by_edition(self):
+        config = self.root.joinpath("config.json")
+        config.write_text(json.dumps({"diamond_version": "/games/nwn", "enhanced_version": "/games/nwnee",
+                                      "enhanced_version_local_dir": "/home/nwn"}))
+        self.assertEqual(diskusage.roots_by_edition(str(config)),
+                         {"DE": ["/games/nwn"], "EE": ["/games/nwnee", "/home/nwn"]})
+
+    def test_config_in_main_directory(self):
+        self.root.joinpath("config.json").write_text(json.dumps({"diamond_version": "/games/nwn",
+                                                                 "enhanced_version": "/games/nwnee"}))
+        program = Config.config.config.program_config
+        with mock.patch.object(program, "main_directory", str(self.root)):
+            self.assertNotEqual(os.getcwd(), str(self.root))
+            self.assertEqual(diskusage.roots_by_edition(), {"DE": ["/games/nwn"], "EE": ["/games/nwnee"]})
+            self.assertEqual(discovery.roots_from_config(), ["/games/nwn", "/games/nwnee"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import hashlib
+import os
+import tempfile
+import threading
+import pathlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import downloader
+from exceptions import IncompleteDownloadException
+
+payload = os.urandom(300 * 1024)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    ranges = []
+    interrupt = True
+
+    def do_GET(self):
+        start = 0
+        if "Range" in self.headers:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            Handler.ranges.append(start)
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes {}-{}/{}".format(start, len(payload) - 1, len(payload)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(payload) - start))
+        self.end_headers()
+        if Handler.interrupt:
+            Handler.interrupt = False
+            self.wfile.write(payload[start:start + 100 * 1024])
+            self.close_connection = True
+            return
+        self.wfile.write(payload[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownload(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = "http://127.0.0.1:{}/modules/module.zip".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = pathlib.Path(directory.name).joinpath("module.zip")
+        Handler.ranges = []
+        Handler.interrupt = True
+
+    def test_resume_after_interruption(self):
+        result = downloader.download(self.url, self.path, expected_size=str(len(payload)), chunk_size=8192)
+        self.assertEqual(len(Handler.ranges), 1)
+        self.assertTrue(0 < Handler.ranges[0] <= 100 * 1024)
+        self.assertEqual(result.size, len(payload))
+        self.assertEqual(result.sha256, hashlib.sha256(payload).hexdigest())
+        self.assertEqual(self.path.read_bytes(), payload)
+        self.assertFalse(self.path.with_name("module.zip.part").exists())
+
+    def test_resume_partial_file(self):
+        Handler.interrupt = False
+        self.path.with_name("module.zip.part").write_bytes(payload[:1000])
+        result = downloader.download(self.url, self.path, expected_size=len(payload))
+        self.assertEqual(Handler.ranges, [1000])
+        self.assertEqual(result.sha256, hashlib.sha256(payload).hexdigest())
+
+    def test_size_mismatch(self):
+        with self.assertRaises(IncompleteDownloadException):
+            downloader.download(self.url, self.path, expected_size=len(payload) + 1, retries=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
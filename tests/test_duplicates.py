@@ -0,0 +1,81 @@
+import unittest
+import os
+import tempfile
+import pathlib
+
+import duplicates
+from duplicates import DuplicateFinder, HashCache
+from mainLib import File
+
+big = os.urandom(300 * 1024)
+
+
+class TestDuplicateFinder(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        contents = {"diamond/hak/cep.hak": big,
+                    "ee/hak/cep.hak": big,
+                    "ee/hak/cep_changed_middle.hak": big[:150 * 1024] + b"!" + big[150 * 1024 + 1:],
+                    "diamond/modules/a.mod": b"MOD V1.0 a",
+                    "ee/modules/a.mod": b"MOD V1.0 a",
+                    "ee/modules/b.mod": b"MOD V1.0 b",
+                    "ee/music/a.bmu": b"MOD V1.0 a"}
+        self.files = []
+        for name, data in contents.items():
+            path = self.root.joinpath(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            kind = {".hak": File.FileType.hakpack, ".mod": File.FileType.module, ".bmu": File.FileType.music}
+            self.files.append((path, kind[path.suffix]))
+        self.cache_path = self.root.joinpath("hashes.json")
+
+    def test_find_and_hardlink(self):
+        finder = DuplicateFinder(self.files, HashCache(self.cache_path))
+        groups = finder.find()
+        self.assertEqual([g.paths for g in groups],
+                         [sorted([str(self.root.joinpath("diamond/hak/cep.hak")),
+                                  str(self.root.joinpath("ee/hak/cep.hak"))]),
+                          sorted([str(self.root.joinpath("diamond/modules/a.mod")),
+                                  str(self.root.joinpath("ee/modules/a.mod"))])])
+        self.assertEqual(groups[0].wasted, len(big))
+
+        # Rescan uses cached hashes only
+        finder = DuplicateFinder(self.files, HashCache(self.cache_path))
+        self.assertEqual(len(finder.find()), 2)
+        self.assertEqual(finder.hashed_bytes, 0)
+
+        self.assertEqual(duplicates.hardlink(groups[0]), len(big))
+        first, second = (os.stat(p) for p in groups[0].paths)
+        self.assertEqual(first.st_ino, second.st_ino)
+        # Hardlinked files are not reported again
+        self.assertEqual(len(DuplicateFinder(self.files, HashCache(self.cache_path)).find()), 1)
+
+    def test_hardlink_checks_files(self):
+        copies = [str(self.root.joinpath("ee/hak/copy{}.hak".format(i))) for i in range(4)]
+        for path in copies:
+            pathlib.Path(path).write_bytes(big)
+        group = DuplicateFinder([(p, File.FileType.hakpack) for p in copies], HashCache(self.cache_path)).find()[0]
+        self.assertEqual(group.paths, copies)
+
+        os.link(copies[0], copies[0] + ".other")  # copies[1] will be the same inode as the kept file
+        os.unlink(copies[1])
+        os.link(copies[0], copies[1])
+        changed = big[:-1] + b"!"
+        pathlib.Path(copies[2]).write_bytes(changed)  # modified after the scan
+        pathlib.Path(copies[3] + ".nwntool-link").write_bytes(b"stale")  # left by an interrupted run
+
+        self.assertEqual(duplicates.hardlink(group), len(big))
+        self.assertEqual(pathlib.Path(copies[2]).read_bytes(), changed)
+        self.assertNotEqual(os.stat(copies[2]).st_ino, os.stat(copies[0]).st_ino)
+        self.assertEqual(os.stat(copies[3]).st_ino, os.stat(copies[0]).st_ino)
+        self.assertFalse(os.path.exists(copies[3] + ".nwntool-link"))
+
+        pathlib.Path(copies[0]).write_bytes(changed)  # the kept file changed, nothing is replaced
+        self.assertEqual(duplicates.hardlink(group), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
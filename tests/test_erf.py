@@ -0,0 +1,66 @@
+import unittest
+import tempfile
+import pathlib
+
+import erf
+from exceptions import InvalidErfException
+from mainLib import ModuleInDir, File
+
+
+class TestErf(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.module = self.root.joinpath("enigma.mod")
+        ifo = erf.build_module_ifo("Enigma Island", haks=["cep2_top_v26", "enigma"], expansions=3,
+                                   min_game_version="1.69", custom_tlk="enigma")
+        erf.write_erf(self.module, [("area001", 2012, b"ARE V3.2" + b"\0" * 100),
+                                    ("Module", erf.RES_TYPE_IFO, ifo)], padding=64 * 1024 * 1024)
+
+    def test_module_info(self):
+        info = erf.module_info(self.module)
+        self.assertEqual(info["title"], "Enigma Island")
+        self.assertEqual(info["haks"], ["cep2_top_v26", "enigma"])
+        self.assertEqual(info["custom_tlk"], "enigma")
+        self.assertEqual(info["requirements"], {"OC": True, "Xp1": True, "Xp2": True})
+        self.assertEqual(info["compatibility"], {"Diamond_edition": True, "Enhanced_edition": True})
+
+    def test_enhanced_edition_only(self):
+        path = self.root.joinpath("ee.mod")
+        erf.write_erf(path, [("module", erf.RES_TYPE_IFO, erf.build_module_ifo("EE", min_game_version="1.80"))])
+        self.assertFalse(erf.module_info(path)["compatibility"]["Diamond_edition"])
+        self.assertEqual(erf.module_info(path)["haks"], [])
+
+    def test_resources(self):
+        with erf.ErfFile(self.module) as f:
+            self.assertEqual(f.file_type, b"MOD ")
+            self.assertEqual(set(f.resources), {("area001", 2012), ("module", erf.RES_TYPE_IFO)})
+            self.assertEqual(f.read("AREA001", 2012)[:8], b"ARE V3.2")
+
+    def test_invalid(self):
+        for content in (b"", b"MOD V1.0", b"PK\x03\x04" + b"\0" * 200):
+            path = self.root.joinpath("broken.mod")
+            path.write_bytes(content)
+            with self.assertRaises(InvalidErfException):
+                erf.module_info(path)
+
+    def test_corrupt_module_ifo(self):
+        ifo = erf.build_module_ifo("Broken", haks=["cep"])
+        for data in (b"GFF V3.2" + b"\xff" * 8, ifo[:len(ifo) // 2], ifo[:60] + b"\xff" * (len(ifo) - 60),
+                     ifo.replace(b"Broken", b"\xff" * 6)[:-1]):
+            path = self.root.joinpath("broken.mod")
+            erf.write_erf(path, [("module", erf.RES_TYPE_IFO, data)])
+            with self.assertRaises(InvalidErfException):
+                erf.module_info(path)
+
+    def test_module_in_dir(self):
+        module = ModuleInDir(self.module)
+        module.read_info()
+        self.assertEqual(module.title, "Enigma Island")
+        self.assertEqual(module.dependencies[File.FileType.hakpack], ["cep2_top_v26", "enigma"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import json
+import os
+import tempfile
+import pathlib
+import shutil
+import subprocess
+import sys
+import zipfile
+from unittest import mock
+
+import extractor
+from exceptions import UnknownCompressionException
+
+# Stand-in for 7z executable: an "archive" is a zip file, calls are logged next to it
+SEVEN_ZIP = """#!{python}
+import json, os, sys, zipfile
+arguments = sys.argv[1:]
+switches = [a for a in arguments[1:] if a.startswith("-")]
+archive, *members = [a for a in arguments[1:] if not a.startswith("-")]
+with open(archive + ".log", "a") as log:
+    log.write(json.dumps(arguments) + "\\n")
+with zipfile.ZipFile(archive) as z:
+    if arguments[0] == "l":
+        for info in z.infolist():
+            print("Path = " + info.filename.rstrip("/"))
+            print("Attributes = " + ("D" if info.is_dir() else "A"))
+            print()
+    else:
+        assert "-spd" in switches, switches
+        output = next(a[2:] for a in switches if a.startswith("-o"))
+        with open(members[0][1:], encoding="utf-8") as fi:
+            names = fi.read().splitlines()
+        for name in names:
+            target = os.path.join(output, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as fo:
+                fo.write(z.read(name))
+"""
+
+
+class TestExtract(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.archive = self.root.joinpath("module.zip")
+        with zipfile.ZipFile(self.archive, "w") as archive:
+            archive.writestr("Enigma/readme.txt", "Read me!")
+            archive.writestr("Enigma/screenshot.PNG", b"\x89PNG")
+            archive.writestr("Enigma/modules/Enigma Island.mod", b"MOD V1.0" * 1000)
+            archive.writestr("Enigma/hak/enigma.HAK", b"HAK V1.0")
+            archive.writestr("enigma.tlk", b"TLK V3.0")
+            archive.writestr("Enigma/empty/", b"")
+
+    def test_extract_game_files_only(self):
+        report = extractor.extract(self.archive, self.root.joinpath("game"), compression="zip")
+        game = self.root.joinpath("game")
+        self.assertEqual(sorted(report.files), sorted([game.joinpath("modules", "Enigma Island.mod"),
+                                                       game.joinpath("hak", "enigma.HAK"),
+                                                       game.joinpath("tlk", "enigma.tlk")]))
+        self.assertEqual(sorted(report.skipped), ["Enigma/readme.txt", "Enigma/screenshot.PNG"])
+        self.assertEqual(game.joinpath("modules", "Enigma Island.mod").read_bytes(), b"MOD V1.0" * 1000)
+        self.assertEqual(report.bytes, 8000 + 16)
+        self.assertEqual(list(game.rglob("*.part")), [])
+
+    @unittest.skipIf(shutil.which("7z") is None, "7z executable is not installed")
+    def test_extract_7z(self):
+        source = self.root.joinpath("source")
+        for name, data in (("Enigma/readme.txt", b"Read me!"), ("Enigma/Enigma Island.mod", b"MOD V1.0" * 1000),
+                           ("Enigma/enigma*.hak", b"HAK V1.0"), ("Enigma/enigma1.hak", b"HAK V1.1")):
+            source.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+            source.joinpath(name).write_bytes(data)
+        archive = self.root.joinpath("module.7z")
+        subprocess.run(["7z", "a", "-ms=on", str(archive), "Enigma"], cwd=str(source), check=True,
+                       stdout=subprocess.DEVNULL)
+        report = extractor.extract(archive, self.root.joinpath("game"))
+        hak = self.root.joinpath("game", "hak")
+        self.assertEqual(len(report.files), 3)
+        self.assertEqual(report.skipped, ["Enigma/readme.txt"])
+        self.assertEqual(hak.joinpath("enigma*.hak").read_bytes(), b"HAK V1.0")  # not taken for a wildcard
+        self.assertEqual(hak.joinpath("enigma1.hak").read_bytes(), b"HAK V1.1")
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["game", "module.7z", "module.zip", "source"])
+
+    def test_extract_7z_stub(self):
+        bin_directory = self.root.joinpath("bin")
+        bin_directory.mkdir()
+        stub = bin_directory.joinpath("7z")
+        stub.write_text(SEVEN_ZIP.format(python=sys.executable))
+        stub.chmod(0o755)
+        archive = self.root.joinpath("module.7z")
+        self.archive.rename(archive)
+        game = self.root.joinpath("game")
+        with mock.patch.dict(os.environ, {"PATH": str(bin_directory)}):
+            report = extractor.extract(archive, game, compression="x-7z-compressed")
+        self.assertEqual(sorted(report.skipped), ["Enigma/readme.txt", "Enigma/screenshot.PNG"])
+        self.assertEqual(game.joinpath("modules", "Enigma Island.mod").read_bytes(), b"MOD V1.0" * 1000)
+        self.assertEqual(game.joinpath("tlk", "enigma.tlk").read_bytes(), b"TLK V3.0")
+        self.assertEqual(report.bytes, 8000 + 16)
+        calls = [json.loads(line) for line in archive.with_name("module.7z.log").read_text().splitlines()]
+        self.assertEqual([call[0] for call in calls], ["l", "x"])  # a single extraction run
+        self.assertTrue(any(a.startswith("-o" + str(game)) for a in calls[1]))  # staged inside the game directory
+        self.assertEqual(sorted(p.name for p in game.iterdir()), ["hak", "modules", "tlk"])  # and cleaned up
+
+    def test_detect_compression(self):
+        self.assertEqual(extractor.detect_compression(self.archive), "zip")
+        self.assertEqual(extractor.detect_compression(self.archive, "x-7z-compressed"), "7z")
+        self.archive.write_bytes(b"not an archive")
+        with self.assertRaises(UnknownCompressionException):
+            extractor.detect_compression(self.archive)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import os
+import tempfile
+import pathlib
+import time
+
+from fsindex import DirectoryIndex
+from mainLib import NWN
+
+
+def age(path, seconds=60):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+class TestDirectoryIndex(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.game = self.root.joinpath("game")
+        self.modules = self.game.joinpath("modules")
+        self.modules.mkdir(parents=True)
+        for name in ("Enigma Island.mod", "Aielund Saga.mod", "readme.txt"):
+            self.modules.joinpath(name).write_bytes(b"MOD V1.0")
+        age(self.modules)
+        age(self.game)
+        self.index_file = self.root.joinpath("index.json")
+
+    def test_scan_is_cached_until_mtime_changes(self):
+        index = DirectoryIndex(self.index_file)
+        self.assertEqual(sorted(e.name for e in index.scan(self.modules)),
+                         ["Aielund Saga.mod", "Enigma Island.mod", "readme.txt"])
+        self.assertEqual(index.scan(self.modules)[0].size, 8)
+        self.assertEqual((index.hits, index.misses), (1, 1))
+        index.save()
+
+        index = DirectoryIndex(self.index_file)
+        index.scan(self.modules)
+        self.assertEqual((index.hits, index.misses), (1, 0))
+
+        self.modules.joinpath("Darkness over Daggerford.mod").write_bytes(b"MOD V1.0")
+        self.assertEqual(len(index.scan(self.modules)), 4)
+        self.assertEqual(index.misses, 1)
+
+    def test_find_modules(self):
+        index = DirectoryIndex(self.index_file)
+        modules = NWN.find_modules(self.game, index)
+        self.assertEqual(sorted(m.title for m in modules), ["Aielund Saga", "Enigma Island"])
+        self.assertEqual(sorted(m.name for m in modules), ["AS", "EI"])
+        NWN.find_modules(self.game, index)
+        self.assertEqual(index.misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import os
+import pathlib
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PySide2.QtCore import QTimer
+    from PySide2.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+
+import synthetic
+from fsindex import DirectoryIndex
+
+
+def run_events(worker, timeout=60.0) -> float:
+    u"""Run the event loop until the worker is done, return the longest gap between 1 ms timer ticks, seconds."""
+    ticks = [time.perf_counter()]
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(1)
+    deadline = time.monotonic() + timeout
+    while not worker.done.is_set() and time.monotonic() < deadline:
+        QApplication.processEvents()
+        time.sleep(0.0005)
+    timer.stop()
+    QApplication.processEvents()  # signals queued before the worker finished
+    return max((b - a for a, b in zip(ticks, ticks[1:])), default=0.0)
+
+
+@unittest.skipIf(QApplication is None, "PySide2 is not installed")
+class TestWorkers(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from guiworkers import Workers
+        cls.app = QApplication.instance() or QApplication([])
+        cls.workers = Workers()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+
+    def collect(self, worker) -> dict:
+        events = {"result": [], "progress": [], "error": [], "cancelled": 0, "finished": 0, "threads": set()}
+
+        def result(items):
+            events["threads"].add(threading.current_thread())
+            events["result"].append(items)
+
+        worker.signals.result.connect(result)
+        worker.signals.progress.connect(lambda done, total: events["progress"].append((done, total)))
+        worker.signals.error.connect(events["error"].append)
+        worker.signals.cancelled.connect(lambda: events.update(cancelled=events["cancelled"] + 1))
+        worker.signals.finished.connect(lambda: events.update(finished=events["finished"] + 1))
+        return events
+
+    def test_discovery(self):
+        from guiworkers import DiscoveryWorker
+        tree = synthetic.generate(self.root / "nwn", files=3000, mix={".mod": 0.9, ".hak": 0.1},
+                                  sizes={".mod": (0, 0), ".hak": (0, 0)})
+        worker = DiscoveryWorker([r for paths in tree.roots.values() for r in paths],
+                                 DirectoryIndex(self.root / "index.json"))
+        events = self.collect(worker)
+        self.workers.start(worker)
+        gap = run_events(worker)
+        self.assertEqual(sum(len(batch) for batch in events["result"]), tree.modules)
+        self.assertTrue(all(len(batch) <= worker.batch_size for batch in events["result"]))
+        self.assertEqual(events["threads"], {threading.main_thread()})  # slots run on the event thread
+        self.assertEqual(events["progress"][-1], (tree.modules, tree.modules))
+        self.assertEqual((events["finished"], events["cancelled"], events["error"]), (1, 0, []))
+        self.assertLess(gap, 0.1)  # the frame budget (16 ms) is measured by benchmarks/bench_gui.py
+        self.assertEqual(self.workers.running, [])
+
+    def test_cancel(self):
+        from guiworkers import DiscoveryWorker
+        tree = synthetic.generate(self.root / "nwn", files=500, mix={".mod": 1.0}, sizes={".mod": (0, 0)})
+        worker = DiscoveryWorker(tree.roots["EE"], DirectoryIndex(self.root / "index.json"))
+        events = self.collect(worker)
+        worker.cancel()
+        self.workers.start(worker)
+        run_events(worker)
+        self.assertEqual((events["finished"], events["cancelled"]), (1, 1))
+        self.assertEqual(events["result"], [])
+
+    def test_error(self):
+        from guiworkers import Worker
+
+        class Failing(Worker):
+            def work(self):
+                raise OSError("disk is gone")
+
+        worker = Failing()
+        events = self.collect(worker)
+        self.workers.start(worker)
+        run_events(worker)
+        self.assertEqual(events["error"], ["OSError: disk is gone"])
+        self.assertEqual(events["finished"], 1)
+
+    def test_scrap_and_download(self):
+        import Config
+        import scrapper
+        from guiworkers import ScrapWorker, DownloadWorker
+        from mockvault import MockVault
+        current = Config._current()
+        self.addCleanup(setattr, current, "_config", current.config)
+        current._config = synthetic.game_config(synthetic.generate(self.root / "nwn", files=0, editions=("EE",)))
+
+        with MockVault(modules=20, archive_size=4 * 1024 * 1024, bandwidth=16 * 1024 * 1024) as vault:
+            scrapper.set_base_url(vault.url)
+            self.addCleanup(scrapper.set_base_url, scrapper.DEFAULT_BASE_URL)
+            worker = ScrapWorker(workers=4)
+            events = self.collect(worker)
+            self.workers.start(worker)
+            run_events(worker)
+            pages = [page for batch in events["result"] for page in batch]
+            self.assertEqual(len(pages), 20)
+            self.assertEqual(events["progress"][-1], (20, 20))
+
+            worker = DownloadWorker(vault.module_url("module-3"), "module-3.zip")
+            events = self.collect(worker)
+            worker.signals.progress.connect(lambda done, total: worker.cancel())
+            self.workers.start(worker)
+            run_events(worker)
+            self.assertEqual((events["cancelled"], events["result"]), (1, []))
+            parts = list(self.root.joinpath("nwn").glob("downloads/*.part"))
+            self.assertEqual(len(parts), 1)  # kept for resuming
+
+            worker = DownloadWorker(vault.module_url("module-3"), "module-3.zip")
+            events = self.collect(worker)
+            self.workers.start(worker)
+            gap = run_events(worker)
+        self.assertEqual(events["error"], [])
+        module = events["result"][0]
+        self.assertEqual([f.name for f in module.extraction.files], ["module-3.mod"])
+        self.assertEqual(events["progress"][-1][0], events["progress"][-1][1])
+        self.assertLess(gap, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import tempfile
+import pathlib
+
+import erf
+from discovery import Found
+from hakgraph import HakGraph
+from mainLib import File, ModuleInDir
+
+
+class TestHakGraph(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.root.joinpath("modules").mkdir()
+        self.root.joinpath("hak").mkdir()
+        self.enigma = self.write_module("enigma.mod", ["cep2_top_v26", "Enigma"])
+        self.aielund = self.write_module("aielund.mod", ["cep2_top_v26", "aielund_music"])
+        self.plain = self.write_module("plain.mod", [])
+        for name in ("cep2_top_v26.hak", "enigma.hak", "unused.hak"):
+            self.root.joinpath("hak", name).write_bytes(b"HAK V1.0")
+        self.graph_path = self.root.joinpath("graph.json")
+
+    def write_module(self, name, haks):
+        path = self.root.joinpath("modules", name)
+        erf.write_erf(path, [("module", erf.RES_TYPE_IFO, erf.build_module_ifo(name, haks=haks))])
+        return str(path)
+
+    def files(self):
+        found = []
+        for directory, kind in (("modules", File.FileType.module), ("hak", File.FileType.hakpack)):
+            for entry in os.scandir(self.root.joinpath(directory)):
+                st = entry.stat()
+                found.append(Found(str(self.root), entry.path, kind, st.st_size, st.st_mtime_ns))
+        return found
+
+    def test_queries(self):
+        graph = HakGraph(self.graph_path)
+        self.assertEqual(graph.update(self.files()), 3)
+        self.assertEqual(graph.haks_of(self.enigma), ["cep2_top_v26", "enigma"])
+        self.assertEqual(graph.modules_using("CEP2_top_v26.hak"), {self.enigma, self.aielund})
+        self.assertEqual(graph.missing(), {"aielund_music": {self.aielund}})
+        self.assertEqual(list(graph.orphaned()), ["unused"])
+        self.assertEqual(graph.closure(self.aielund),
+                         [("cep2_top_v26", str(self.root.joinpath("hak", "cep2_top_v26.hak"))),
+                          ("aielund_music", None)])
+        self.assertTrue(graph.is_playable(self.plain))
+        self.assertFalse(graph.is_playable(self.aielund))
+
+    def test_incremental_update(self):
+        graph = HakGraph(self.graph_path)
+        graph.update(self.files())
+        graph.save()
+
+        graph = HakGraph(self.graph_path)
+        self.assertEqual(graph.missing(), {"aielund_music": {self.aielund}})
+        self.assertEqual(graph.update(self.files()), 0)  # nothing has changed, nothing is read
+
+        self.write_module("aielund.mod", ["cep2_top_v26", "unused", "aielund_music_v2"])
+        os.utime(self.aielund, ns=(0, 10 ** 9))
+        os.remove(self.enigma)
+        self.assertEqual(graph.update(self.files()), 1)
+        self.assertNotIn(self.enigma, graph)
+        self.assertEqual(graph.missing(), {"aielund_music_v2": {self.aielund}})
+        self.assertEqual(sorted(graph.orphaned()), ["enigma"])
+
+        graph.add_hak(self.root.joinpath("hak", "aielund_music_v2.hak"))
+        graph.remove_hak("cep2_top_v26")
+        self.assertEqual(graph.missing(), {"cep2_top_v26": {self.aielund}})
+
+    def test_invalid_module(self):
+        self.root.joinpath("modules", "broken.mod").write_bytes(b"not an erf")
+        graph = HakGraph(self.graph_path)
+        graph.update(self.files())
+        self.assertEqual(graph.haks_of(self.root.joinpath("modules", "broken.mod")), [])
+
+    def test_corrupt_module_ifo(self):
+        ifo = erf.build_module_ifo("corrupt", haks=["enigma"])
+        erf.write_erf(self.root.joinpath("modules", "corrupt.mod"), [("module", erf.RES_TYPE_IFO, ifo[:len(ifo) // 2])])
+        graph = HakGraph(self.graph_path)
+        graph.update(self.files())
+        self.assertEqual(graph.haks_of(self.root.joinpath("modules", "corrupt.mod")), [])
+        self.assertEqual(graph.haks_of(self.enigma), ["cep2_top_v26", "enigma"])
+        self.assertEqual(graph.haks_of(self.aielund), ["cep2_top_v26", "aielund_music"])
+
+        module = ModuleInDir(self.root.joinpath("modules", "corrupt.mod"))
+        self.assertEqual(module.read_info(), {})
+        self.assertEqual(module.title, ModuleInDir().title)
+
+
+if __name__ == '__main__':
+    unittest.main()
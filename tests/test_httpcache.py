@@ -0,0 +1,136 @@
+import unittest
+import tempfile
+import threading
+import pathlib
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import scrapper
+from httpcache import ResponseCache
+
+page = pathlib.Path(__file__).parent.joinpath("fixtures", "module_page.html").read_bytes()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResponseCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.root = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(scrapper.disable_cache)
+
+    def test_revalidation(self):
+        cache = scrapper.enable_cache(self.directory.name)
+        url = self.root + "/project/nwn1/module/a"
+        first = scrapper.scrap_page(url)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        second = scrapper.scrap_page(url)
+        self.assertEqual(first, second)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+        # Survives a restart of the program
+        scrapper.disable_cache()
+        cache = scrapper.enable_cache(self.directory.name)
+        self.assertIn(url, cache)
+        response = cache.get(url)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.parsed, first)
+        self.assertEqual(response.text, page.decode("utf-8"))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.directory.name, max_size=2 * len(page) + 1)
+        urls = ["{}/project/nwn1/module/{}".format(self.root, i) for i in range(3)]
+        cache.get(urls[0])
+        cache.get(urls[1])
+        cache.get(urls[0])  # 1 is the least recently used now
+        cache.get(urls[2])
+        self.assertIn(urls[0], cache)
+        self.assertNotIn(urls[1], cache)
+        self.assertIn(urls[2], cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["size"], cache.max_size)
+
+    def test_pages_missing_from_index(self):
+        cache = ResponseCache(self.directory.name)
+        url = self.root + "/project/nwn1/module/a"
+        cache.get(url)  # stored, the index is not written yet
+        directory = pathlib.Path(self.directory.name)
+        directory.joinpath("leftover.tmp").write_bytes(b"partial")
+        cache = ResponseCache(self.directory.name)
+        self.assertNotIn(url, cache)
+        self.assertEqual([p.name for p in directory.iterdir()], [])
+
+        cache.get(url)
+        cache.flush()
+        self.assertIn(url, ResponseCache(self.directory.name))
+
+    def test_evicted_while_revalidated(self):
+        cache = ResponseCache(self.directory.name)
+        url = self.root + "/project/nwn1/module/a"
+        cache.get(url)
+        fetch = scrapper.fetch
+        requests = []
+
+        def evicting_fetch(url, session=None, **kwargs):
+            requests.append(dict(kwargs.get("headers") or {}))
+            if len(requests) == 1:
+                cache.clear()
+            return fetch(url, session, **kwargs)
+
+        with mock.patch.object(scrapper, "fetch", evicting_fetch):
+            response = cache.get(url)
+        self.assertEqual(response.text, page.decode("utf-8"))
+        self.assertFalse(response.from_cache)
+        self.assertIn("If-None-Match", requests[0])
+        self.assertNotIn("If-None-Match", requests[1])
+        self.assertIn(url, cache)
+
+    def test_evicted_after_revalidation(self):
+        cache = ResponseCache(self.directory.name)
+        url = self.root + "/project/nwn1/module/a"
+        cache.get(url)
+        response = cache.get(url)  # not modified, the page was never parsed
+        self.assertTrue(response.from_cache)
+        cache.clear()  # e.g. evicted by another thread before the page is parsed
+        self.assertEqual(response.text, page.decode("utf-8"))
+
+        cache.get(url)
+        cache._body(cache._key(url)).unlink()  # body lost, the entry is dropped and the page fetched again
+        response = cache.get(url)
+        self.assertFalse(response.from_cache)
+        self.assertEqual(response.text, page.decode("utf-8"))
+
+
+if __name__ == '__main__':
+    unittest.main()
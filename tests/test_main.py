@@ -1,13 +1,90 @@
 import unittest
-from mainLib import NWN
+from mainLib import NWN, Module, ModuleInDir, ModuleInVault, File
+from fsindex import DirectoryIndex
 import pathlib
+import pickle
+import tempfile
+
+import synthetic
 
 
 class TestNWN(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(NWN._instances.clear)
+        self.root = pathlib.Path(directory.name)
+        self.tree = synthetic.generate(self.root, files=200, editions=("EE",),
+                                       sizes={e: (0, 0) for e in synthetic.MIX})
+
     def test_init(self):
-        n = NWN(".", "enhanced_edition")
-        self.assertEqual(n.version, "enhanced_edition")
-        self.assertEqual(n.path, pathlib.Path(""))
+        n = NWN(synthetic.game_config(self.tree, "EE"), DirectoryIndex(self.root / "index.json"))
+        install, local = self.tree.roots["EE"]
+        self.assertEqual((str(n.directory_install), str(n.directory_local)), (install, local))
+        self.assertEqual(sorted(d.name for d in n.directories), sorted(synthetic.SUBDIRECTORIES.values()))
+        self.assertEqual(len(n.modules), self.tree.modules)
+        self.assertEqual({pathlib.Path(m.path).parent.parent for m in n.modules},
+                         {pathlib.Path(install), pathlib.Path(local)})
+        self.assertIn(n, NWN.show_instances())
+
+
+class TestModule(unittest.TestCase):
+    def test_slots(self):
+        for module in (Module(), ModuleInDir("enigma.mod"), ModuleInVault("https://neverwintervault.org")):
+            self.assertFalse(hasattr(module, "__dict__"))
+            with self.assertRaises(AttributeError):
+                module.unknown_attribute = 1
+
+    def test_shared_defaults(self):
+        a, b = Module(), Module()
+        self.assertIs(a.author, b.author)
+        self.assertTrue(a.is_default("compatibility"))
+        self.assertEqual(a.compatibility, b.compatibility)
+        self.assertIsNot(a.compatibility, b.compatibility)  # copied when read
+        self.assertFalse(a.is_default("compatibility"))
+        self.assertTrue(b.is_default("dependencies"))
+        a.tags = ["Adventure", "Story"]
+        b.tags = ["".join(["Adven", "ture"])]
+        self.assertIs(a.tags[0], b.tags[0])
+        self.assertEqual(Module().tags, [])
+
+    def test_change_in_place(self):
+        a, b = ModuleInDir("a.mod"), ModuleInDir("b.mod")
+        a.tags.append("Puzzle")
+        a.dependencies[File.FileType.hakpack].append("cep2_top_v26")
+        a.compatibility["Enhanced_edition"] = True
+        a.requirements["Xp2"] = False
+        self.assertEqual((a.tags, a.dependencies[File.FileType.hakpack]), (["Puzzle"], ["cep2_top_v26"]))
+        self.assertEqual((a.compatibility["Enhanced_edition"], a.requirements["Xp2"]), (True, False))
+        fresh = Module()
+        for module in (b, fresh):
+            self.assertEqual(module.tags, [])
+            self.assertEqual(module.dependencies[File.FileType.hakpack], [])
+            self.assertEqual(module.compatibility, {"Diamond_edition": True, "Enhanced_edition": False})
+            self.assertEqual(module.requirements, {"OC": True, "Xp1": True, "Xp2": True})
+        self.assertEqual(fresh.dependencies, Module.default["dependencies"])
+        self.assertEqual(fresh.compatibility, Module.default["compatibility"])
+
+    def test_pickle(self):
+        module = ModuleInDir("enigma.mod")
+        module.title = "Enigma Island"
+        module.author = "Adam Miller"
+        module.tags = ["Puzzle"]
+        copy = pickle.loads(pickle.dumps(module))
+        self.assertEqual(copy, module)
+        self.assertEqual((copy.path, copy.author, copy.tags), ("enigma.mod", "Adam Miller", ["Puzzle"]))
+        self.assertTrue(copy.is_default("dependencies"))
+        copy.dependencies[File.FileType.hakpack].append("cep2_top_v26")
+        self.assertEqual(Module().dependencies[File.FileType.hakpack], [])
+
+    def test_is_up_to_date(self):
+        module = Module("Enigma Island")
+        self.assertFalse(module.is_up_to_date())  # is_part_of_series, series and cep are defaults
+        module.is_part_of_series, module.series, module.cep, module.cep_version = True, "Enigma", True, 2.65
+        module.compatibility = {"Diamond_edition": True, "Enhanced_edition": True}
+        module.dependencies = {File.FileType.hakpack: ["cep2_top_v26"]}
+        module.tags = ["Puzzle"]
+        self.assertTrue(module.is_up_to_date())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+import unittest
+import pathlib
+import tempfile
+import time
+import zipfile
+
+import requests
+
+import erf
+import scrapper
+from crawler import Crawler
+from httpcache import ResponseCache
+from mockvault import MockVault
+
+
+class TestMockVault(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.vault = MockVault(modules=5, archive_size=64 * 1024).start()
+        self.addCleanup(self.vault.stop)
+        scrapper.set_base_url(self.vault.url)
+        self.addCleanup(scrapper.set_base_url, scrapper.DEFAULT_BASE_URL)
+
+    def test_base_url(self):
+        self.assertEqual(scrapper.website_2.www(), self.vault.url + scrapper.CAMPAIGNS_PATH)
+        scrapper.set_base_url(scrapper.DEFAULT_BASE_URL + "/")
+        self.assertEqual(scrapper.website_with_module.www(), scrapper.DEFAULT_BASE_URL + scrapper.MODULE_PATH)
+
+    def test_crawl_and_download(self):
+        links = scrapper.create_list_of_links()
+        self.assertEqual(links, [self.vault.module_url("module-{}".format(n)) for n in range(5)])
+        with Crawler(workers=4) as crawler:
+            pages = sorted(crawler.crawl(links), key=lambda p: p["www"])
+        self.assertEqual([p["title"] for p in pages], ["module-{}.zip".format(n) for n in range(5)])
+        self.assertTrue(pages[0]["href"].startswith(self.vault.url))
+
+        module = scrapper.download_module_from_website(links[2], self.root)
+        self.assertEqual(module.download.size, int(pages[2]["size"]))
+        with zipfile.ZipFile(module.download.path) as archive:
+            archive.extract("module-2.mod", self.root)
+        self.assertEqual(erf.module_info(self.root / "module-2.mod")["title"], "module-2 0")
+
+    def test_etag_and_update(self):
+        cache = ResponseCache(self.root / "cache")
+        url = self.vault.module_url("module-1")
+        first = cache.get(url).text
+        self.assertEqual(cache.get(url).text, first)
+        self.assertEqual(self.vault.stats["not_modified"], 1)
+        self.vault.update("module-1")
+        self.assertNotEqual(cache.get(url).text, first)
+        self.assertEqual(self.vault.stats["not_modified"], 1)
+
+    def test_range(self):
+        url = self.vault.url + "/sites/neverwintervault.org/files/project/3/modules/module-3.zip"
+        whole = requests.get(url).content
+        part = requests.get(url, headers={"Range": "bytes=1000-"})
+        self.assertEqual(part.status_code, 206)
+        self.assertEqual(part.content, whole[1000:])
+        self.assertEqual(requests.get(url, headers={"Range": "bytes={}-".format(len(whole))}).status_code, 416)
+
+    def test_missing(self):
+        self.assertEqual(requests.get(self.vault.module_url("module-5")).status_code, 404)
+        self.assertEqual(requests.get(self.vault.url + "/unknown").status_code, 404)
+
+
+class TestFaults(unittest.TestCase):
+
+    def test_errors(self):
+        with MockVault(modules=1, error_rate=0.5, seed=3) as vault:
+            codes = [requests.get(vault.module_url("module-0")).status_code for _ in range(40)]
+        self.assertEqual(set(codes), {200, 503})
+        self.assertEqual(codes.count(503), vault.stats["errors"])
+
+    def test_latency_and_bandwidth(self):
+        with MockVault(modules=1, latency=0.05, bandwidth=512 * 1024, archive_size=128 * 1024) as vault:
+            start = time.perf_counter()
+            requests.get(vault.module_url("module-0"))
+            self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+            start = time.perf_counter()
+            data = requests.get(vault.url + "/sites/neverwintervault.org/files/project/0/modules/module-0.zip").content
+            self.assertGreaterEqual(time.perf_counter() - start, 0.05 + len(data) / (512 * 1024) * 0.9)
+
+    def test_recorded_pages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fixture = pathlib.Path(__file__).parent.joinpath("fixtures", "module_page.html")
+            pathlib.Path(directory, "enigma-island-complete.html").write_bytes(fixture.read_bytes())
+            with MockVault(modules=0, pages=directory) as vault:
+                scrapper.set_base_url(vault.url)
+                try:
+                    self.assertEqual(scrapper.create_list_of_links(), [vault.module_url("enigma-island-complete")])
+                    data = scrapper.scrap_nvn_vault(scrapper.website_with_module)
+                finally:
+                    scrapper.set_base_url(scrapper.DEFAULT_BASE_URL)
+        self.assertEqual(data["title"], "enigma_island_complete.zip")
+        self.assertTrue(data["href"].startswith(vault.url + "/sites/"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+import pathlib
+import struct
+
+import modulefile
+from exceptions import InvalidModuleFileException
+from mainLib import Module, ModuleInDir, ModuleInVault, File, Person, NWN
+from registry import ModuleRegistry
+
+
+def modules() -> list:
+    enigma = ModuleInDir(pathlib.Path("/nwn/modules/Enigma Island.mod"))
+    enigma.title = "Enigma Island"
+    enigma.author = Person("Adam", "Miller")
+    enigma.tags = ["Puzzle", "Adventure"]
+    enigma.compatibility = {"Diamond_edition": True, "Enhanced_edition": True}
+    enigma.dependencies = {File.FileType.hakpack: ["cep2_top_v26"], File.FileType.movie: [],
+                           File.FileType.music: []}
+    aielund = ModuleInVault("https://neverwintervault.org/project/nwn1/module/aielund-saga")
+    aielund.title = "Aielund Saga – Act I"
+    aielund.author = "Savant"
+    aielund.version = 2.5
+    aielund.file_address = "https://neverwintervault.org/files/aielund.zip"
+    plain = Module("Plain")
+    return [enigma, aielund, plain]
+
+
+class TestModuleFile(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = pathlib.Path(directory.name).joinpath("modules.bin")
+
+    def test_round_trip(self):
+        original = modules()
+        self.assertEqual(modulefile.write(self.path, original), 3)
+        loaded = modulefile.read(self.path)
+        self.assertEqual([type(m) for m in loaded], [ModuleInDir, ModuleInVault, Module])
+        for before, after in zip(original, loaded):
+            self.assertEqual(modulefile.encode(before), modulefile.encode(after))
+        enigma, aielund, plain = loaded
+        self.assertEqual(enigma.path, "/nwn/modules/Enigma Island.mod")
+        self.assertEqual((enigma.author.name, enigma.author.surname), ("Adam", "Miller"))
+        self.assertEqual(enigma.dependencies[File.FileType.hakpack], ["cep2_top_v26"])
+        self.assertEqual(aielund.title, "Aielund Saga – Act I")
+        self.assertEqual(aielund.www, "https://neverwintervault.org/project/nwn1/module/aielund-saga")
+        self.assertTrue(plain.is_default("compatibility"))  # defaults are not stored
+
+    def test_lazy_access(self):
+        items = []
+        for n in range(1000):
+            m = ModuleInVault("https://vault/{}".format(n))
+            m.title = "Module {}".format(n)
+            items.append(m)
+        modulefile.write(self.path, items)
+        with modulefile.ModuleFile(self.path) as f:
+            self.assertEqual(len(f), 1000)
+            self.assertEqual(f[-1].www, "https://vault/999")
+            self.assertEqual(f.find("Module 500", 1.0).www, "https://vault/500")
+            self.assertIsNone(f.find("Module 500", 2.0))
+            with self.assertRaises(IndexError):
+                f[1000]
+
+    def test_invalid(self):
+        self.path.write_bytes(b"\x80\x04pickle")
+        with self.assertRaises(InvalidModuleFileException):
+            modulefile.ModuleFile(self.path)
+        modulefile.write(self.path, modules())
+        data = bytearray(self.path.read_bytes())
+        struct.pack_into("<H", data, 4, modulefile.VERSION + 1)
+        self.path.write_bytes(bytes(data))
+        with self.assertRaises(InvalidModuleFileException):
+            modulefile.ModuleFile(self.path)
+
+    def test_nwn(self):
+        nwn = NWN.__new__(NWN)
+        nwn.modules = ModuleRegistry(modules())
+        nwn.save_modules_list_to_file(self.path)
+        nwn.modules = None
+        nwn.load_modules_list(self.path)
+        self.assertEqual([m.title for m in nwn.show_modules()], ["Enigma Island", "Aielund Saga – Act I", "Title"])
+
+
+if __name__ == '__main__':
+    unittest.main()
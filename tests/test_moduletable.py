@@ -0,0 +1,164 @@
+import unittest
+import os
+import pathlib
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+try:
+    from PySide2.QtCore import QModelIndex, Qt
+    from PySide2.QtWidgets import QApplication, QTableView
+except ImportError:
+    QApplication = None
+
+import synthetic
+from catalog import CatalogStore
+
+
+def rows(*titles) -> list:
+    u"""Rows of CatalogRows: www, title, author, size, changed, game, category, language."""
+    return [("m{}".format(i), title, author, size, None, "NWN1", "Modules", "English")
+            for i, (title, author, size) in enumerate(titles)]
+
+
+@unittest.skipIf(QApplication is None, "PySide2 is not installed")
+class TestCatalogRows(unittest.TestCase):
+
+    def setUp(self):
+        from moduletable import CatalogRows
+        self.rows = CatalogRows(rows(("beta Keep", "Ann", 30), ("Alpha Tower", "Bob", None),
+                                     ("gamma tower", None, 10), ("Delta", "Tower Smith", 20)))
+
+    def titles(self) -> list:
+        return [self.rows[i][1] for i in range(len(self.rows))]
+
+    def test_sort(self):
+        self.rows.sort(0)
+        self.assertEqual(self.titles(), ["Alpha Tower", "beta Keep", "Delta", "gamma tower"])  # case insensitive
+        self.rows.sort(2, descending=True)
+        self.assertEqual(self.titles(), ["beta Keep", "Delta", "gamma tower", "Alpha Tower"])  # empty size last
+        self.rows.sort(1)
+        self.assertEqual(self.titles(), ["beta Keep", "Alpha Tower", "Delta", "gamma tower"])
+
+    def test_filter(self):
+        self.rows.sort(0, descending=True)
+        self.rows.filter("tow")
+        self.assertEqual(self.titles(), ["gamma tower", "Delta", "Alpha Tower"])  # authors match too, order kept
+        self.rows.filter("tower al")  # narrowed from the current view
+        self.assertEqual(self.titles(), ["Alpha Tower"])
+        self.rows.filter("to")
+        self.assertEqual(self.titles(), ["gamma tower", "Delta", "Alpha Tower"])
+        self.rows.sort(0)
+        self.assertEqual(self.titles(), ["Alpha Tower", "Delta", "gamma tower"])
+        self.rows.filter("  ")
+        self.assertEqual(len(self.rows), 4)
+
+    def test_load(self):
+        from moduletable import CatalogRows
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory).joinpath("catalog.sqlite")
+            records = list(synthetic.catalog_records(50))
+            with CatalogStore(path) as store:
+                store.upsert(records)
+                store.unlist([records[0]["www"]])
+                with self.assertRaises(ValueError):
+                    store.table(("www", "password"))
+            loaded = CatalogRows.load(path)
+            self.assertEqual(len(loaded), 49)
+            loaded.filter(records[7]["title"])
+            self.assertEqual(loaded.record(0), records[7])
+            loaded.close()
+
+
+@unittest.skipIf(QApplication is None, "PySide2 is not installed")
+class TestModuleTableModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        from moduletable import CatalogRows, ModuleTableModel
+        records = list(synthetic.catalog_records(5000))
+        self.records = records
+        self.model = ModuleTableModel(CatalogRows([tuple(r[name] for name in ("www", "title", "author", "size",
+                                                                              "last_changed", "game", "category",
+                                                                              "language")) for r in records]))
+
+    def test_fetch(self):
+        model = self.model
+        self.assertEqual(model.rowCount(), 0)
+        self.assertTrue(model.canFetchMore(QModelIndex()))
+        model.fetchMore(QModelIndex())
+        self.assertEqual(model.rowCount(), model.fetch_size)
+        while model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
+        self.assertEqual(model.rowCount(), 5000)
+        self.assertEqual(model.data(model.index(3, 0)), self.records[3]["title"])
+        self.assertEqual(model.headerData(0, Qt.Horizontal), "Title")
+
+    def matching(self, word) -> int:
+        return sum(1 for r in self.records if word in r["title"].lower() or word in (r["author"] or "").lower())
+
+    def wait(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.model.busy and time.monotonic() < deadline:
+            QApplication.processEvents()
+
+    def test_view(self):
+        view = QTableView()
+        view.setModel(self.model)
+        view.setSortingEnabled(True)
+        view.sortByColumn(0, Qt.DescendingOrder)
+        self.wait()
+        view.resize(600, 400)
+        view.show()
+        QApplication.processEvents()
+        self.assertLessEqual(self.model.rowCount(), 2 * self.model.fetch_size)  # only what the view needs
+        titles = sorted((r["title"] for r in self.records), key=str.casefold, reverse=True)
+        self.assertEqual(self.model.data(self.model.index(0, 0)), titles[0])
+        view.scrollToBottom()
+        QApplication.processEvents()
+        self.assertGreater(self.model.rowCount(), self.model.fetch_size)
+        view.close()
+
+    def test_steps(self):
+        model = self.model
+        model.step = 100
+        counts = []
+        model.filtered.connect(counts.append)
+        model.filter("dragon", sliced=True)
+        self.assertTrue(model.busy)
+        self.assertEqual(model.settings[0], "dragon")
+        self.assertEqual(len(model.rows), 5000)  # the view is replaced when it is computed
+        model.sort(1, Qt.DescendingOrder)  # drops the view being computed, keeps its filter
+        self.wait()
+        self.assertFalse(model.busy)
+        self.assertEqual(counts, [self.matching("dragon")])
+        self.assertEqual(model.rows.view, model.rows.view_of("dragon", 1, True))
+        self.assertEqual(model.settings, ("dragon", 1, True))
+
+        model.filter("dragon t", sliced=True)
+        self.wait()
+        model.filter("dragon", sliced=True)
+        self.assertFalse(model.busy)  # deleting characters is answered from cached views at once
+        self.assertEqual(counts[-1], self.matching("dragon"))
+
+    def test_debounce(self):
+        counts = []
+        self.model.filtered.connect(counts.append)
+        for text in ("d", "dr", "dra", "drag"):
+            self.model.schedule_filter(text)
+            QApplication.processEvents()
+        self.assertEqual(counts, [])
+        deadline = time.monotonic() + 5
+        while not counts and time.monotonic() < deadline:
+            QApplication.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(counts, [self.matching("drag")])
+        self.assertEqual(self.model.rows.text, "drag")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import threading
+import time
+
+from pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stages_overlap(self):
+        active = {"a": 0, "b": 0}
+        overlap = []
+        lock = threading.Lock()
+
+        def step(name, next_value):
+            def function(item):
+                with lock:
+                    active[name] += 1
+                    overlap.append(active["a"] and active["b"])
+                time.sleep(0.01)
+                with lock:
+                    active[name] -= 1
+                return next_value(item)
+            return function
+
+        def fail_on_three(item):
+            if item == 3:
+                raise ValueError(item)
+            return item
+
+        pipeline = Pipeline([Stage("a", step("a", lambda x: x * 10), workers=2),
+                             Stage("check", lambda x: fail_on_three(x // 10), workers=1),
+                             Stage("b", step("b", lambda x: x if x % 2 else None), workers=3)], queue_size=1)
+        results = pipeline.run(range(10))
+        self.assertEqual(sorted(results), [1, 5, 7, 9])
+        self.assertTrue(any(overlap))
+        self.assertEqual([s.processed for s in pipeline.stages], [10, 9, 9])
+        self.assertEqual(len(pipeline.stages[1].errors), 1)
+        self.assertIn("check", pipeline.summary())
+
+    def test_empty(self):
+        self.assertEqual(Pipeline([Stage("a", lambda x: x, workers=3)]).run([]), [])
+
+    def test_raising_items(self):
+        def items():
+            yield 1
+            yield 2
+            raise OSError("listing failed")
+
+        pipeline = Pipeline([Stage("a", lambda x: x * 10, workers=2), Stage("b", lambda x: x + 1)])
+        with self.assertRaises(OSError):
+            pipeline.run(items())
+        self.assertEqual(sorted(pipeline.results), [11, 21])
+
+
+if __name__ == '__main__':
+    unittest.main()
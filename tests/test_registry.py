@@ -0,0 +1,56 @@
+import unittest
+
+from mainLib import ModuleInDir, OwnedModules, Person
+from registry import ModuleRegistry
+
+
+def module(title, version=1.0, path=None, author=None):
+    m = ModuleInDir(path or "/nwn/modules/{}.mod".format(title))
+    m.title = title
+    m.version = version
+    if author is not None:
+        m.author = author
+    return m
+
+
+class TestModuleRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.enigma = module("Enigma Island", author=Person("Adam", "Miller"))
+        self.enigma2 = module("Enigma Island", 2.0, "/nwn/modules/enigma2.mod", "adam  MILLER")
+        self.aielund = module("Aielund Saga", author="Savant")
+        self.registry = ModuleRegistry([self.enigma, self.enigma2, self.aielund])
+
+    def test_unique(self):
+        self.assertEqual(len(self.registry), 3)
+        self.assertFalse(self.registry.add(module("Enigma Island", path="/other/enigma.mod")))
+        self.assertEqual(self.registry.by_path("/nwn/modules/Enigma Island.mod"), self.enigma)
+        self.assertIsNone(self.registry.by_path("/other/enigma.mod"))
+        self.assertIn(("Aielund Saga", 1.0), self.registry)
+        self.assertIs(self.registry.get("Enigma Island", 2.0), self.enigma2)
+
+    def test_secondary_indexes(self):
+        self.assertEqual(self.registry.by_author("Adam Miller"), [self.enigma, self.enigma2])
+        self.registry.remove(self.enigma)
+        self.assertEqual(self.registry.by_author(Person("Adam", "Miller")), [self.enigma2])
+        replacement = module("Aielund Saga", path="/local/aielund.mod", author="Savant")
+        self.registry.put(replacement)
+        self.assertIsNone(self.registry.by_path(self.aielund.path))
+        self.assertIs(self.registry.by_path("/local/aielund.mod"), replacement)
+        self.assertEqual(list(self.registry), [self.enigma2, replacement])
+
+    def test_bulk(self):
+        modules = [module("Module {}".format(n)) for n in range(1000)]
+        self.assertEqual(self.registry.add_many(modules + modules), 1000)
+        self.assertEqual(self.registry.remove_many(modules[:500]), 500)
+        self.assertEqual(len(self.registry), 503)
+
+    def test_owned_modules(self):
+        owned = OwnedModules(["Enigma Island"])
+        owned.add_module(self.aielund)
+        self.assertTrue(owned.remove_module(module("Aielund Saga")))
+        self.assertFalse(owned.remove_module(self.aielund))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import tempfile
+import pathlib
+
+import search
+from mainLib import ModuleInDir, Person
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.index = search.SearchIndex(self.root.joinpath("index.json"))
+        self.records = [{"www": "https://vault/enigma", "title": "Enigma Island Complete", "author": "Adam Miller",
+                         "tags": ["Adventure", "Puzzle"], "language": "English", "category": "Module",
+                         "last_changed": "2020-01-01"},
+                        {"www": "https://vault/aielund", "title": "Aielund Saga", "author": "Savant",
+                         "tags": ["Story"], "language": "English", "category": "Module",
+                         "last_changed": "2019-05-05"},
+                        {"www": "https://vault/island", "title": "Treasure Island", "author": "Someone",
+                         "tags": [], "language": "German", "category": "Module", "last_changed": "2018-01-01"}]
+        self.index.update_catalog(self.records)
+        module = ModuleInDir(str(self.root.joinpath("Enigma Island.mod")))
+        module.title = "Enigma Island"
+        module.author = Person("Adam", "Miller")
+        self.index.update_modules([module])
+        self.module = module
+
+    def test_ranking(self):
+        hits = self.index.search("enigma island")
+        self.assertEqual([h.title for h in hits][:2], ["Enigma Island", "Enigma Island Complete"])
+        self.assertEqual(hits[-1].title, "Treasure Island")
+        self.assertEqual(self.index.search("miller", kind="vault")[0].id, "https://vault/enigma")
+
+    def test_typo_and_prefix(self):
+        self.assertEqual(self.index.search("aeilund")[0].title, "Aielund Saga")
+        self.assertEqual(self.index.search("savnat")[0].title, "Aielund Saga")
+        self.assertEqual(self.index.search("puzz")[0].title, "Enigma Island Complete")
+        self.assertEqual(self.index.search("xyzzy"), [])
+
+    def test_incremental_and_persistent(self):
+        records = self.records[1:]
+        records[0] = dict(records[0], title="Aielund Saga Remastered", last_changed="2021-01-01")
+        self.assertEqual(self.index.update_catalog(records), 1)
+        self.assertEqual([h.kind for h in self.index.search("enigma")], ["local"])
+        self.index.save()
+
+        index = search.SearchIndex(self.root.joinpath("index.json"))
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.search("remastred")[0].id, "https://vault/aielund")
+        index.remove("https://vault/aielund")
+        self.assertEqual(index.search("aielund"), [])
+
+    def test_module_tags(self):
+        self.assertTrue(self.module.is_default("tags"))  # indexing does not give the module its own list
+        tagged = ModuleInDir(str(self.root.joinpath("Darkness.mod")))
+        tagged.title = "Darkness"
+        tagged.tags.append("Horror")
+        self.index.add_module(tagged)
+        self.assertEqual(self.index.search("horror")[0].title, "Darkness")
+
+    def test_distance(self):
+        self.assertEqual(search.distance("enigma", "enigam", 2), 1)
+        self.assertEqual(search.distance("island", "islands", 2), 1)
+        self.assertEqual(search.distance("abc", "xyzabc", 2), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
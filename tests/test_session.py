@@ -0,0 +1,103 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+
+import session
+
+
+def _work(seconds=0.0, data=0, fail=False):
+    session.count_bytes(data)
+    if seconds:
+        time.sleep(seconds)
+    if fail:
+        raise ValueError("failed")
+    return "done"
+
+
+def _outer(data):
+    session.count_bytes(data)
+    return work(data=data)
+
+
+work = session.register(_work)
+outer = session.register(_outer)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        session.reset_profiles()
+        session.enable_profiling()
+
+    def tearDown(self):
+        session.enable_profiling(False)
+        session.reset_profiles()
+
+    def test_calls_errors_and_histogram(self):
+        self.assertEqual(work(), "done")
+        work(seconds=0.02)
+        with self.assertRaises(ValueError):
+            work(fail=True)
+        profile = session.profiles["_work"]
+        self.assertEqual((profile.calls, profile.errors), (3, 1))
+        self.assertGreaterEqual(profile.max, 0.02)
+        self.assertGreaterEqual(profile.seconds, 0.02)
+        self.assertEqual(sum(profile.histogram), 3)
+        self.assertEqual(profile.histogram[session.BUCKETS.index(0.05)], 1)
+
+    def test_bytes_are_inclusive(self):
+        outer(100)
+        self.assertEqual(session.profiles["_outer"].bytes, 200)
+        self.assertEqual(session.profiles["_work"].bytes, 100)
+        session.count_bytes(10)  # outside of any registered function
+        self.assertEqual(session.profiles["_outer"].bytes, 200)
+
+    def test_disabled(self):
+        session.enable_profiling(False)
+        self.assertEqual(work(data=5), "done")
+        self.assertEqual(session.profiles["_work"].calls, 0)
+        self.assertEqual(session.profiles["_work"].bytes, 0)
+
+    def test_disabled_overhead(self):
+        session.enable_profiling(False)
+        calls = 100000
+        start = time.perf_counter()
+        for _ in range(calls):
+            _work()
+        plain = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(calls):
+            work()
+        wrapped = time.perf_counter() - start
+        self.assertLess(wrapped, plain * 3 + 0.05)
+
+    def test_dump(self):
+        work(data=7)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            session.dump_profiles(path)
+            with open(path) as fi:
+                data = json.load(fi)
+            self.assertEqual(data["_work"]["calls"], 1)
+            self.assertEqual(data["_work"]["bytes"], 7)
+            self.assertEqual(sum(data["_work"]["histogram"].values()), 1)
+
+            path = os.path.join(directory, "profile.prom")
+            session.dump_profiles(path)
+            with open(path) as fi:
+                text = fi.read()
+        self.assertIn('nwntool_function_calls_total{function="_work"} 1', text)
+        self.assertIn('nwntool_function_bytes_total{function="_work"} 7', text)
+        self.assertIn('nwntool_function_duration_seconds_bucket{function="_work",le="+Inf"} 1', text)
+        self.assertIn('nwntool_function_duration_seconds_count{function="_work"} 1', text)
+
+    def test_register_tracks_function(self):
+        tracked = session.Session().tracked_functions
+        self.assertIn("_work", tracked)
+        self.assertIn("_outer", tracked)
+
+
+if __name__ == '__main__':
+    unittest.main()
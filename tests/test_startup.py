@@ -0,0 +1,34 @@
+import unittest
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+class TestStartup(unittest.TestCase):
+    u"""Quick commands must not pay for networking, parsing and configuration they do not use."""
+
+    def run_python(self, code) -> str:
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home, PYTHONPATH=str(ROOT))
+            return subprocess.run([sys.executable, "-c", code], cwd=home, env=env, check=True,
+                                  capture_output=True, text=True).stdout.strip()
+
+    def test_lazy_imports(self):
+        loaded = self.run_python("import sys, mainLib, run; "
+                                 "print(sorted(m for m in ('scrapper', 'bs4', 'requests', 'validators') "
+                                 "if m in sys.modules))")
+        self.assertEqual(loaded, "[]")
+
+    def test_lazy_config(self):
+        output = self.run_python("import Config, mainLib, session; print('config' in vars(Config), "
+                                 "session.Session in session.singleton.Singleton._instances); "
+                                 "Config.config; print('config' in vars(Config))")
+        self.assertEqual(output.split(), ["False", "False", "True"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import pathlib
+import tempfile
+
+import diskusage
+import duplicates
+import erf
+import synthetic
+from fsindex import DirectoryIndex
+from mainLib import File
+
+
+class TestGenerate(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.sizes = {".mod": (1024, 4096), ".hak": (1024, 4096), ".bmu": (100, 200), ".bik": (100, 200)}
+        self.tree = synthetic.generate(self.root / "nwn", files=300, sizes=self.sizes, duplicates=0.1, seed=1)
+
+    def files(self) -> list:
+        return sorted(p for p in (self.root / "nwn").rglob("*") if p.is_file())
+
+    def test_tree(self):
+        files = self.files()
+        self.assertEqual(len(files), self.tree.files)
+        self.assertEqual(sum(p.stat().st_size for p in files), self.tree.bytes)
+        self.assertEqual(len([p for p in files if p.suffix == ".mod"]), self.tree.modules)
+        self.assertEqual(set(self.tree.roots), {"DE", "EE"})
+        for p in files:
+            self.assertEqual(p.parent.name, synthetic.SUBDIRECTORIES[p.suffix])
+            low, high = self.sizes[p.suffix]
+            self.assertTrue(low <= p.stat().st_size <= high, p)
+
+    def test_valid_erf(self):
+        haks = {p.stem for p in self.files() if p.suffix == ".hak"}
+        for p in self.files():
+            if p.suffix == ".mod":
+                info = erf.module_info(p)
+                self.assertTrue(info["title"].startswith("Module "))
+                self.assertEqual(len(info["haks"]), 2)
+                self.assertTrue(set(info["haks"]) <= haks)
+            if p.suffix == ".hak":
+                self.assertEqual(len(erf.hak_contents(p)), 1)
+
+    def test_deterministic(self):
+        other = synthetic.generate(self.root / "other", files=300, sizes=self.sizes, duplicates=0.1, seed=1)
+        self.assertEqual(other._replace(root=None, roots=None), self.tree._replace(root=None, roots=None))
+        names = [p.relative_to(self.root / "nwn") for p in self.files()]
+        self.assertEqual(names, sorted(p.relative_to(self.root / "other")
+                                       for p in (self.root / "other").rglob("*") if p.is_file()))
+
+    def test_scans(self):
+        report = diskusage.DiskUsage(self.tree.roots, index=DirectoryIndex(self.root / "index.json")).report()
+        self.assertEqual((report["files"], report["total"]), (self.tree.files, self.tree.bytes))
+        kinds = {".mod": File.FileType.module, ".hak": File.FileType.hakpack, ".bmu": File.FileType.music,
+                 ".bik": File.FileType.movie}
+        finder = duplicates.DuplicateFinder([(p, kinds[p.suffix]) for p in self.files()],
+                                            duplicates.HashCache(self.root / "hashes.json"))
+        groups = finder.find()
+        self.assertEqual(sum(len(g.paths) - 1 for g in groups), self.tree.duplicates)
+
+    def test_write_config(self):
+        with open(synthetic.write_config(self.tree)) as fi:
+            data = json.load(fi)
+        self.assertEqual(data["enhanced_version"], self.tree.roots["EE"][0])
+        self.assertEqual(data["diamond_version_local_dir"], self.tree.roots["DE"][0])
+        self.assertEqual(diskusage.roots_by_edition(self.root / "nwn" / "config.json"), self.tree.roots)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import pathlib
+
+import scrapper
+import vaultparser
+
+page = pathlib.Path(__file__).parent.joinpath("fixtures", "module_page.html").read_text(encoding="utf-8")
+
+variants = {
+    "original": page,
+    "no author": page.replace('class="username"', 'class="name"'),
+    "no title": page.replace(' title="enigma_island_complete.zip"', ""),
+    "no tags": page.replace("field-name-field-tags", "field-name-field-other"),
+    "entities and colons": page.replace("Version:&nbsp;</div>", "Version:&nbsp;</div>v&amp;2: beta:"),
+    "nested fields": page.replace('<div class="field-item even">English</div>',
+                                  '<div class="field-item even"><div class="field-name-field-tags">English</div></div>'),
+}
+
+
+class TestVaultParser(unittest.TestCase):
+
+    def test_equivalence(self):
+        for backend in vaultparser.backends:
+            for name, html in variants.items():
+                with self.subTest(backend=backend, variant=name):
+                    self.assertEqual(vaultparser.parse_nvn_vault(html, backend), scrapper.parse_nvn_vault(html))
+
+    def test_no_link(self):
+        html = page.replace("/modules/", "/files/")
+        for backend in vaultparser.backends:
+            with self.assertRaises(TypeError):
+                vaultparser.parse_nvn_vault(html, backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
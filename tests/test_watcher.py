@@ -0,0 +1,119 @@
+import unittest
+import os
+import queue
+import tempfile
+import pathlib
+from types import SimpleNamespace
+
+import watcher
+from fsindex import DirectoryIndex
+from mainLib import NWN
+
+
+def inotify_available() -> bool:
+    try:
+        watcher.InotifyBackend([]).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class WatcherTests:
+    backend = None
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = pathlib.Path(directory.name)
+        self.modules = self.root.joinpath("modules")
+        self.hak = self.root.joinpath("hak")
+        self.modules.mkdir()
+        self.hak.mkdir()
+        self.changes = queue.Queue()
+        self.watcher = watcher.Watcher(self.changes.put, watcher.watched_directories([str(self.root)]),
+                                       debounce=0.2, backend=self.backend, poll_interval=0.05).start()
+        self.addCleanup(self.watcher.stop)
+
+    def next_change(self) -> set:
+        return self.changes.get(timeout=5)
+
+    def test_debounced_changes(self):
+        for n in range(5):
+            self.modules.joinpath("module{}.mod".format(n)).write_bytes(b"MOD V1.0")
+        self.hak.joinpath("cep.hak").write_bytes(b"HAK V1.0")
+        self.assertEqual(self.next_change(), {str(self.modules), str(self.hak)})
+        self.assertTrue(self.changes.empty())
+        self.assertEqual(self.watcher.changes, 1)
+
+    def test_new_subdirectory(self):
+        subdirectory = self.modules.joinpath("series")
+        subdirectory.mkdir()
+        self.assertIn(str(subdirectory), self.next_change())
+        subdirectory.joinpath("part1.mod").write_bytes(b"MOD V1.0")
+        self.assertEqual(self.next_change(), {str(subdirectory)})
+
+    def test_removed_file(self):
+        path = self.hak.joinpath("old.hak")
+        path.write_bytes(b"HAK V1.0")
+        self.next_change()
+        os.remove(path)
+        self.assertEqual(self.next_change(), {str(self.hak)})
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+    backend = "poll"
+
+
+@unittest.skipUnless(inotify_available(), "inotify is not available")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+    backend = "inotify"
+
+
+class TestNWNRefresh(unittest.TestCase):
+
+    def test_refresh(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = pathlib.Path(directory.name)
+        for d in ("install/modules", "local/modules"):
+            root.joinpath(d).mkdir(parents=True)
+        root.joinpath("local", "modules", "Enigma Island.mod").write_bytes(b"MOD V1.0")
+        cfg = SimpleNamespace(game_config=SimpleNamespace(path=str(root.joinpath("install")),
+                                                          path_to_local_vault=str(root.joinpath("local"))))
+        index = DirectoryIndex(root.joinpath("index.json"))
+        nwn = NWN(cfg, index)
+        self.addCleanup(NWN._instances.remove, nwn)
+        self.assertEqual([m.title for m in nwn.show_modules()], ["Enigma Island"])
+
+        root.joinpath("install", "modules", "Aielund Saga.mod").write_bytes(b"MOD V1.0")
+        os.remove(root.joinpath("local", "modules", "Enigma Island.mod"))
+        added, removed = nwn.refresh([str(root.joinpath("install", "modules")), str(root.joinpath("local", "modules"))],
+                                     index)
+        self.assertEqual(([m.title for m in added], [m.title for m in removed]), (["Aielund Saga"], ["Enigma Island"]))
+        self.assertEqual([m.title for m in nwn.show_modules()], ["Aielund Saga"])
+
+    def test_refresh_keeps_copy_in_other_directory(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = pathlib.Path(directory.name)
+        for d in ("inst/modules", "loc/modules"):
+            root.joinpath(d, "Enigma Island.mod").parent.mkdir(parents=True)
+            root.joinpath(d, "Enigma Island.mod").write_bytes(b"MOD V1.0")
+        cfg = SimpleNamespace(game_config=SimpleNamespace(path=str(root.joinpath("inst")),
+                                                          path_to_local_vault=str(root.joinpath("loc"))))
+        index = DirectoryIndex(root.joinpath("index.json"))
+        nwn = NWN(cfg, index)
+        self.addCleanup(NWN._instances.remove, nwn)
+        self.assertEqual([str(m.path) for m in nwn.show_modules()],
+                         [str(root.joinpath("loc", "modules", "Enigma Island.mod"))])  # local copy first
+
+        os.remove(root.joinpath("loc", "modules", "Enigma Island.mod"))
+        added, removed = nwn.refresh([str(root.joinpath("loc", "modules"))], index)
+        self.assertEqual([str(m.path) for m in removed], [str(root.joinpath("loc", "modules", "Enigma Island.mod"))])
+        self.assertEqual([str(m.path) for m in added], [str(root.joinpath("inst", "modules", "Enigma Island.mod"))])
+        self.assertEqual([str(m.path) for m in nwn.show_modules()],
+                         [str(root.joinpath("inst", "modules", "Enigma Island.mod"))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+    Fast extraction of module data from pages of neverwintervault.org.
+    Returns the same dictionary as scrapper.parse_nvn_vault, but does not build a document tree:
+    only the link to the archive, the author and text of known fields are collected.
+    lxml is used if it is installed, otherwise a restricted parser built on html.parser.
+"""
+from html.parser import HTMLParser
+import logging
+import re
+
+import scrapper
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+_FIELDS = {i: scrapper.REPatterns.Module.strings_dict[i] for i in (1, 2, 3, 4, 5, 6, 7, 9, 11)}
+_FIELD_PATTERNS = {i: re.compile(pattern) for i, pattern in _FIELDS.items()}
+_ANY_FIELD = re.compile("|".join(_FIELDS.values()))
+_USERNAME = re.compile("username")
+
+
+def _class_matches(value, pattern) -> bool:
+    u"""Match class attribute the way BeautifulSoup does for attrs={"class", pattern}."""
+    if value is None:
+        return False
+    return bool(pattern.search(value)) or "class" in value.split()
+
+
+def _matching_fields(value, missing) -> list:
+    u"""Fields from missing, which a div with a given class attribute belongs to."""
+    if value is None or not (_ANY_FIELD.search(value) or "class" in value.split()):
+        return []
+    return [i for i in missing if _class_matches(value, _FIELD_PATTERNS[i])]
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class RestrictedParser(HTMLParser):
+    u"""Collects only nodes needed for a module record, stops as soon as all of them are found."""
+
+    def __init__(self):
+        super(RestrictedParser, self).__init__(convert_charrefs=True)
+        self.link = None
+        self.author = None
+        self.texts = dict.fromkeys(_FIELDS)
+        self._missing = set(_FIELDS)
+        self._open = []  # [field, depth of nested divs, collected strings]
+
+    def _complete(self):
+        if self.link is not None and self.author is not None and not self._missing and not self._open:
+            raise _StopParsing
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "div":
+            for capture in self._open:
+                capture[1] += 1
+            if self._missing:
+                value = None
+                for name, v in attrs:
+                    if name == "class":
+                        value = v
+                for i in _matching_fields(value, self._missing):
+                    self._missing.discard(i)
+                    self._open.append([i, 1, []])
+        elif tag == "a":
+            if self.link is None:
+                attributes = {name: v if v is not None else "" for name, v in attrs}
+                if scrapper.REPatterns.module_src.search(attributes.get("href", "")):
+                    self.link = attributes
+                    self._complete()
+        elif tag == "span":
+            if self.author is None:
+                attributes = {name: v if v is not None else "" for name, v in attrs}
+                if _class_matches(attributes.get("class"), _USERNAME):
+                    self.author = attributes
+                    self._complete()
+
+    def handle_endtag(self, tag):
+        if tag == "div" and self._open:
+            for capture in self._open:
+                capture[1] -= 1
+            for capture in [c for c in self._open if c[1] == 0]:
+                self._open.remove(capture)
+                self.texts[capture[0]] = "".join(capture[2])
+            self._complete()
+
+    def handle_data(self, data):
+        for capture in self._open:
+            capture[2].append(data)
+
+    def parse(self, html):
+        try:
+            self.feed(html)
+            self.close()
+        except _StopParsing:
+            pass
+        # Fields not closed until the end of a document
+        for i, _, strings in self._open:
+            self.texts[i] = "".join(strings)
+        return self
+
+
+_MARKERS = tuple(_FIELDS.values()) + ("username", "/modules/")
+
+
+def _start(html) -> int:
+    u"""Offset of the last tag opened before the first occurrence of any searched class or link,
+        nothing before it may be a part of the result."""
+    found = [position for position in (html.find(marker) for marker in _MARKERS) if position != -1]
+    if not found:
+        return 0
+    return max(html.rfind("<", 0, min(found)), 0)
+
+
+def _parse_restricted(html):
+    parser = RestrictedParser().parse(html[_start(html):])
+    return parser.link, parser.author, parser.texts
+
+
+if etree is not None:
+    _LXML_PARSER = etree.HTMLParser()
+    _TEXT = etree.XPath("string()")
+
+
+def _parse_lxml(html):
+    document = etree.fromstring(html, _LXML_PARSER)
+    link, author, texts = None, None, dict.fromkeys(_FIELDS)
+    missing = set(_FIELDS)
+    for element in document.iter("div", "a", "span"):
+        tag = element.tag
+        if tag == "div":
+            for i in _matching_fields(element.get("class"), missing):
+                missing.discard(i)
+                texts[i] = str(_TEXT(element))
+        elif tag == "a":
+            if link is None and scrapper.REPatterns.module_src.search(element.get("href", "")):
+                link = dict(element.attrib)
+        elif author is None and _class_matches(element.get("class"), _USERNAME):
+            author = dict(element.attrib)
+        if link is not None and author is not None and not missing:
+            break
+    return link, author, texts
+
+
+backends = {"html.parser": _parse_restricted}
+if etree is not None:
+    backends["lxml"] = _parse_lxml
+default_backend = "lxml" if etree is not None else "html.parser"
+
+
+def parse_nvn_vault(html: str, backend=None) -> dict:
+    u"""Parse html of a module page on neverwintervault.org. Return the same dictionary as
+        scrapper.parse_nvn_vault.
+        :backend - str, 'lxml' or 'html.parser', by default the fastest available."""
+    link, author, texts = backends[backend or default_backend](html)
+    result = scrapper.new_result()
+    scrapper.fill_link(result, link)
+    if author is not None:
+        result["author"] = re.split("/", author["about"])[-1]
+    scrapper.fill_fields(result, texts)
+    return result
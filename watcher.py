@@ -0,0 +1,267 @@
+"""
+    Watch game directories (modules, hak, music, movies and their subdirectories) for changes.
+    On Linux inotify is used through ctypes, so an idle watcher sleeps in select() and costs nothing;
+    elsewhere directories are polled by a stat of every directory (no file is read or listed unless
+    its directory changed). Changes are debounced and reported as a set of changed directories, which
+    is what fsindex.DirectoryIndex invalidates.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE = 0.5  # seconds without new events before changes are applied
+POLL_INTERVAL = 2.0  # seconds between polls of the fallback backend
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+         | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct("iIII")
+
+
+def _subdirectories(directory) -> list:
+    u"""Directory and all its subdirectories."""
+    result = []
+    stack = [str(directory)]
+    while stack:
+        current = stack.pop()
+        result.append(current)
+        try:
+            with os.scandir(current) as it:
+                stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+        except OSError as excep:
+            logger.debug("Could not list {}: {}".format(current, excep))
+    return result
+
+
+class InotifyBackend:
+    u"""Changes reported by the kernel. Raises OSError if inotify is not available."""
+
+    def __init__(self, directories):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is available on Linux only")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        self._watches = {}  # watch descriptor: directory
+        for directory in directories:
+            for d in _subdirectories(directory):
+                self._add(d)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code == errno.ENOSPC:
+                logger.error("Limit of inotify watches reached, {} is not watched "
+                             "(see /proc/sys/fs/inotify/max_user_watches).".format(directory))
+            elif code != errno.ENOENT:
+                logger.debug("Could not watch {}: {}".format(directory, os.strerror(code)))
+            return
+        self._watches[wd] = directory
+
+    @property
+    def directories(self) -> list:
+        return list(self._watches.values())
+
+    def wait(self, timeout=None) -> set:
+        u"""Block until something changes, timeout expires or wake() is called. Return changed directories."""
+        readable, _, _ = select.select([self.fd, self._wake_r], [], [], timeout)
+        if self._wake_r in readable:
+            os.read(self._wake_r, 4096)
+        if self.fd not in readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning("inotify queue overflow, all directories are considered changed.")
+                    changed.update(self._watches.values())
+                    continue
+                directory = self._watches.get(wd)
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                if directory is None:
+                    continue
+                changed.add(directory)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    for d in _subdirectories(os.path.join(directory, os.fsdecode(name))):
+                        self._add(d)
+                        changed.add(d)
+        return changed
+
+    def wake(self):
+        os.write(self._wake_w, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class PollingBackend:
+    u"""Changes found by comparing (mtime, inode) of every watched directory, one stat per directory."""
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._roots = [str(d) for d in directories]
+        self._fingerprints = {}  # directory: (mtime_ns, inode)
+        self._wake = threading.Event()
+        for root in self._roots:
+            for d in _subdirectories(root):
+                self._fingerprints[d] = self._fingerprint(d)
+
+    @staticmethod
+    def _fingerprint(directory):
+        try:
+            st = os.stat(directory)
+            return st.st_mtime_ns, st.st_ino
+        except OSError:
+            return None
+
+    @property
+    def directories(self) -> list:
+        return list(self._fingerprints)
+
+    def poll(self) -> set:
+        changed = set()
+        for directory, old in list(self._fingerprints.items()):
+            new = self._fingerprint(directory)
+            if new == old:
+                continue
+            changed.add(directory)
+            if new is None:
+                del self._fingerprints[directory]
+                continue
+            self._fingerprints[directory] = new
+            for d in _subdirectories(directory):  # new subdirectories
+                if d not in self._fingerprints:
+                    self._fingerprints[d] = self._fingerprint(d)
+                    changed.add(d)
+        for root in self._roots:  # a root created after the watcher was started
+            if root not in self._fingerprints and os.path.isdir(root):
+                self._fingerprints[root] = self._fingerprint(root)
+                changed.add(root)
+        return changed
+
+    def wait(self, timeout=None) -> set:
+        interval = self.interval if timeout is None else min(timeout, self.interval)
+        if self._wake.wait(interval):
+            self._wake.clear()
+            return set()
+        return self.poll()
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        pass
+
+
+def watched_directories(roots=None, subdirectories=None) -> list:
+    u"""Existing game subdirectories (see discovery.SUBDIRECTORIES) of roots, by default roots from config."""
+    import discovery
+    roots = roots if roots is not None else discovery.roots_from_config()
+    subdirectories = subdirectories or discovery.SUBDIRECTORIES
+    result = [os.path.join(root, sub) for root in roots for sub in subdirectories]
+    return list(dict.fromkeys(d for d in result if os.path.isdir(d)))
+
+
+class Watcher:
+    u"""Call on_change(set of changed directories) after changes settle for debounce seconds.
+        :directories - directories watched with their subdirectories, by default watched_directories(),
+        :backend - 'auto' (inotify if available, polling otherwise), 'inotify' or 'poll',
+        :index - fsindex.DirectoryIndex, changed directories are forgotten by it before on_change is called."""
+
+    def __init__(self, on_change, directories=None, debounce=DEBOUNCE, backend="auto", index=None,
+                 poll_interval=POLL_INTERVAL):
+        self.on_change = on_change
+        self.directories = list(directories) if directories is not None else watched_directories()
+        self.debounce = debounce
+        self.index = index
+        self.changes = 0
+        if backend in ("auto", "inotify"):
+            try:
+                self.backend = InotifyBackend(self.directories)
+            except (OSError, AttributeError) as excep:
+                if backend == "inotify":
+                    raise
+                logger.info("inotify is not available ({}), polling directories.".format(excep))
+                self.backend = PollingBackend(self.directories, poll_interval)
+        else:
+            self.backend = PollingBackend(self.directories, poll_interval)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        pending = set()
+        deadline = None
+        while not self._stop.is_set():
+            timeout = None if not pending else max(0.0, deadline - time.monotonic())
+            changed = self.backend.wait(timeout)
+            if changed:
+                pending.update(changed)
+                deadline = time.monotonic() + self.debounce
+            elif pending and time.monotonic() >= deadline:
+                self._apply(pending)
+                pending = set()
+
+    def _apply(self, directories):
+        self.changes += 1
+        logger.debug("Changed directories: {}".format(sorted(directories)))
+        if self.index is not None:
+            for directory in directories:
+                self.index.forget(directory)
+        try:
+            self.on_change(directories)
+        except Exception as excep:  # a failing consumer must not stop the watcher
+            logger.error("Could not apply changes of {}: {}".format(sorted(directories), excep))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching {} directories ({}).".format(len(self.backend.directories),
+                                                           type(self.backend).__name__))
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.backend.wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.backend.close()